@@ -0,0 +1,286 @@
+# Async entry points: chat, refactor, batch refactor and agent setup on the azure.ai.projects.aio client.
+# Everything runs on one event loop and shares one client (and its connection pool) per project, so hundreds
+# of runs can be in flight without a thread each. Settings come from the matching sync scripts.
+import os
+import json
+import time
+import asyncio
+import argparse
+from azure.ai.projects.models import FilePurpose
+import chat_with_agent as chat
+import chat_with_agent_refactor as refactor
+import setup_agents as setup
+from project_client_pool import get_async_project_client, get_async_pool
+from message_retrieval import message_text, run_and_fetch_reply_async
+from streaming import stream_run_async
+from chunked_refactor import refactor_in_chunks_async
+from polling import upload_files
+from provisioning import provision_agents_async
+from run_scheduler import PRIORITY_INTERACTIVE, describe_quota
+from upload_registry import cleanup_orphans_in_task
+from tracing import traced
+from language_router import detect_language
+
+MAX_IN_FLIGHT = 64  # Scripts refactored at the same time in batch mode; coroutines are cheap, the quota is not
+
+
+@traced("chat")
+async def chat_with_agent(agent_id, question=None, stream=None, project_client=None):
+    question = question or chat.QUESTION
+    stream = chat.STREAM if stream is None else stream
+    project_client = project_client or get_async_project_client(chat.PROJECT_CONNECTION_STRING)
+
+    thread = await project_client.agents.create_thread()
+    print(f"Created thread, thread ID: {thread.id}")
+
+    message = await project_client.agents.create_message(thread_id=thread.id, role="user", content=question)
+    print(f"Created message, message ID: {message.id}")
+
+    if stream:
+        result = await stream_run_async(
+            project_client, thread.id, agent_id, prompt_text=question, priority=PRIORITY_INTERACTIVE
+        )
+        print(f"Created run, run ID: {result['run_id']}")
+        return result["text"]
+
+    run, reply = await run_and_fetch_reply_async(
+        project_client.agents, thread.id, agent_id, prompt_text=question, priority=PRIORITY_INTERACTIVE
+    )
+    print(f"Created run, run ID: {run.id}")
+    if reply is None:
+        return None
+
+    response_json = {
+        "message_id": reply["id"],
+        "created_at": reply["created_at"],
+        "assistant_id": reply["assistant_id"],
+        "thread_id": reply["thread_id"],
+        "response": message_text(reply)
+    }
+    print(json.dumps(response_json, indent=4))
+    return response_json["response"]
+
+
+async def _upload_script(agents_client, script_path):
+    uploaded_files = await upload_files(agents_client, [script_path], FilePurpose.AGENTS, refactor.UPLOAD_REGISTRY)
+    return uploaded_files[script_path]
+
+
+# ✅ The same flow as chat_with_agent_refactor._refactor_script, sharing its prompt, cache and standards helpers:
+# the agent calls are awaited, and the helpers' file reads and hashing run in a worker thread, off the event loop
+@traced("refactor_script")
+async def _refactor_script(project_client, agent_id, script_path, output_file, vector_store_id,
+                           cache=refactor.RESULT_CACHE, stream=False, changed_lines=None, language="python"):
+    plan = await asyncio.to_thread(
+        refactor._prepare_refactor, agent_id, script_path, output_file, cache, changed_lines, language
+    )
+    if plan["status"] is not None:
+        return plan["code"], plan["status"]
+
+    if plan["chunked"]:
+        try:
+            refactored_code, chunk_stats = await refactor_in_chunks_async(
+                project_client.agents, agent_id, plan["source"], os.path.basename(script_path), plan["violations"],
+                refactor.CHUNK_WORKERS, standards_index=plan["standards_index"], changed_lines=plan["changed_lines"],
+            )
+        except ValueError as e:
+            print(f"⚠️ Unit by unit refactoring of {script_path} failed ({e}), refactoring the whole script")
+        else:
+            return await asyncio.to_thread(refactor._save_chunked, plan, output_file, cache, refactored_code,
+                                           chunk_stats)
+
+    thread = await project_client.agents.create_thread()
+    print(f"Created thread, thread ID: {thread.id}")
+
+    message_content, run_options, inlined = await asyncio.to_thread(refactor._refactor_message, plan, script_path)
+    attachments = None
+    if not inlined:
+        script_file = await _upload_script(project_client.agents, script_path)
+        print(f"Uploaded script file, file ID: {script_file.id}")
+        attachments = refactor._file_search_attachments(script_file, vector_store_id)
+
+    message = await project_client.agents.create_message(
+        thread_id=thread.id, role="user", content=message_content, attachments=attachments
+    )
+    print(f"Created message, message ID: {message.id}")
+
+    if stream:
+        result = await stream_run_async(
+            project_client, thread.id, agent_id, output_file=output_file, language=plan["spec"]["fence"],
+            run_options=run_options, prompt_text=message_content,
+        )
+        print(f"Created run, run ID: {result['run_id']}")
+        return await asyncio.to_thread(refactor._save_reply, plan, output_file, cache, streamed_code=result["code"])
+
+    run, reply = await run_and_fetch_reply_async(
+        project_client.agents, thread.id, agent_id, prompt_text=message_content, **run_options
+    )
+    print(f"Created run, run ID: {run.id}")
+    if reply is None:
+        return None, "no_response"
+    return await asyncio.to_thread(refactor._save_reply, plan, output_file, cache, message_text(reply))
+
+
+async def refactor_script(project_client, agent_id, script_path, output_file, vector_store_id,
+                          cache=refactor.RESULT_CACHE, stream=False, language="python"):
+    refactored_code, _ = await _refactor_script(
+        project_client, agent_id, script_path, output_file, vector_store_id, cache, stream, language=language
+    )
+    return refactored_code
+
+
+# The agent has to match the script's language, e.g. the java-coding-agent for a .java file
+async def chat_with_agent_refactor(agent_id, script_path, output_file, vector_store_id, stream=False):
+    if not os.path.exists(script_path):
+        raise FileNotFoundError(f"The script file {script_path} does not exist.")
+
+    project_client = get_async_project_client(refactor.PROJECT_CONNECTION_STRING)
+    cleanup = cleanup_orphans_in_task(project_client.agents, refactor.UPLOAD_REGISTRY)
+    try:
+        return await refactor_script(project_client, agent_id, script_path, output_file, vector_store_id,
+                                     stream=stream, language=detect_language(script_path) or "python")
+    finally:
+        if cleanup is not None:
+            await cleanup
+
+
+async def _refactor_one(project_client, agent_id, script_path, output_file, vector_store_id, cache, semaphore,
+                        changed_lines=None, language="python"):
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            _, status = await _refactor_script(
+                project_client, agent_id, script_path, output_file, vector_store_id, cache, changed_lines=changed_lines,
+                language=language,
+            )
+            error = None
+        except Exception as e:
+            status = "failed"
+            error = str(e)
+
+    return {
+        "script": script_path,
+        "language": language,
+        "output": output_file,
+        "status": status,
+        "seconds": round(time.perf_counter() - started, 3),
+        "error": error,
+    }
+
+
+# ✅ Refactor every script under a directory or glob as coroutines on one client, at most max_in_flight at a time.
+# With base_ref, only the Python scripts changed since then are refactored, like the sync --since sweep.
+async def batch_refactor(agent_id, target, vector_store_id, output_dir=refactor.BATCH_OUTPUT_DIR,
+                         max_in_flight=MAX_IN_FLIGHT, project_client=None, cache=refactor.RESULT_CACHE, base_ref=None):
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1.")
+
+    changed_lines = {}
+    if base_ref is None:
+        jobs = await asyncio.to_thread(refactor.collect_scripts, target, output_dir)
+        print(f"📂 Found {len(jobs)} scripts to refactor, {max_in_flight} at a time")
+    else:
+        jobs, changed_lines = await asyncio.to_thread(refactor.collect_changed_scripts, base_ref, target, output_dir)
+        lanes, skipped = refactor._route_jobs(jobs, {"python": None})
+        jobs = lanes.get("python", [])
+        print(f"📂 Found {len(jobs)} scripts changed since {base_ref} to refactor, {max_in_flight} at a time")
+        for script_path in skipped:
+            print(f"⏭️ Skipping {script_path}, only Python scripts are refactored")
+    print(describe_quota())
+
+    if project_client is None:
+        project_client = get_async_project_client(refactor.PROJECT_CONNECTION_STRING)
+
+    results = []
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(max_in_flight)
+    cleanup = cleanup_orphans_in_task(project_client.agents, refactor.UPLOAD_REGISTRY)
+    try:
+        for finished in asyncio.as_completed([
+            _refactor_one(project_client, agent_id, script_path, output_file, vector_store_id, cache, semaphore,
+                          changed_lines.get(script_path))
+            for script_path, output_file in jobs
+        ]):
+            result = await finished
+            results.append(result)
+            print(f"[{len(results)}/{len(jobs)}] {result['status']}: {result['script']} ({result['seconds']}s)")
+    finally:
+        if cleanup is not None:
+            await cleanup
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "target": target,
+        "base_ref": base_ref,
+        "max_in_flight": max_in_flight,
+        "total": len(results),
+        "refactored": sum(1 for result in results if result["status"] == "refactored"),
+        "compliant": sum(1 for result in results if result["status"] == "compliant"),
+        "cached": sum(1 for result in results if result["status"] == "cached"),
+        "failed": sum(1 for result in results if result["status"] == "failed"),
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_minute": round(len(results) / elapsed * 60 if elapsed > 0 else 0.0, 2),
+        "cache": cache.stats() if cache is not None else None,
+        "results": sorted(results, key=lambda result: result["script"]),
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary_path = os.path.join(output_dir, refactor.BATCH_SUMMARY_FILE)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4)
+
+    print(f"\n📊 Refactored {summary['refactored']}/{summary['total']} scripts "
+          f"({summary['compliant']} already compliant, {summary['cached']} cached, {summary['failed']} failed) "
+          f"in {summary['elapsed_seconds']}s, {summary['files_per_minute']} files/min")
+    print(f"📝 Batch summary saved to: {summary_path}\n")
+    return summary
+
+
+@traced("setup_agents")
+async def setup_agents(languages=None, prune=False, project_client=None):
+    specs = [spec for spec in setup.AGENT_SPECS if not languages or spec["name"].split("-")[0] in languages]
+    if project_client is None:
+        project_client = get_async_project_client(setup.PROJECT_CONNECTION_STRING)
+
+    results = await provision_agents_async(project_client.agents, specs, setup.UPLOAD_REGISTRY, prune=prune)
+
+    print("\n📦 Provisioning summary:")
+    for result in results:
+        print(f"   {result['name']:<20} agent {result['agent']:<9} vector store {result['vector_store']:<9} "
+              f"{result['seconds']}s")
+        print(f"   {'':<20} Agent ID: {result['agent_id']}, Vector Store ID: {result['vector_store_id']}")
+    return results
+
+
+# Run one of the entry points, closing the shared async clients before the event loop goes away
+async def _main(args):
+    try:
+        if args.command == "chat":
+            await chat_with_agent(chat.AGENT_ID, args.question)
+        elif args.command == "refactor" and (args.batch or args.since):
+            await batch_refactor(refactor.AGENT_ID, args.batch or ".", refactor.VECTOR_STORE_ID,
+                                 max_in_flight=args.in_flight, base_ref=args.since)
+        elif args.command == "refactor":
+            await chat_with_agent_refactor(refactor.AGENT_ID, refactor.SCRIPT_FILE_PATH, refactor.OUTPUT_FILE_PATH,
+                                           refactor.VECTOR_STORE_ID, stream=args.stream)
+        else:
+            await setup_agents(args.languages, args.prune)
+    finally:
+        await get_async_pool().close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the coding agent entry points on one asyncio event loop.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    chat_parser = commands.add_parser("chat", help="Ask the agent a question")
+    chat_parser.add_argument("--question", help="Defaults to QUESTION in chat_with_agent.py")
+    refactor_parser = commands.add_parser("refactor", help="Refactor SCRIPT_FILE_PATH, or a batch of scripts")
+    refactor_parser.add_argument("--batch", metavar="DIR_OR_GLOB", help="Refactor every script under a directory or glob")
+    refactor_parser.add_argument("--since", metavar="BASE_REF",
+                                 help="Only refactor scripts changed since this git ref (under --batch DIR, default: everywhere)")
+    refactor_parser.add_argument("--in-flight", type=int, default=MAX_IN_FLIGHT, help="Scripts refactored at once")
+    refactor_parser.add_argument("--stream", action="store_true", help="Stream the reply for a single script")
+    setup_parser = commands.add_parser("setup", help="Create or update the coding agents")
+    setup_parser.add_argument("--languages", nargs="+", choices=["python", "java"])
+    setup_parser.add_argument("--prune", action="store_true")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,217 @@
+# Warm chat threads kept per user or session, so a follow-up question costs one message and one run
+# instead of a new thread and a resent conversation. Runs only see the latest messages of a thread,
+# and idle sessions are expired with their threads deleted on a background worker.
+import time
+import threading
+from collections import OrderedDict
+from azure.ai.projects.models import TruncationObject
+from message_retrieval import forget_thread, message_text, run_and_fetch_reply
+from streaming import stream_run
+from run_scheduler import PRIORITY_INTERACTIVE
+from tracing import span
+
+HISTORY_MESSAGES = 20  # Questions and replies a run sees, older messages are truncated (None sends all of them)
+IDLE_SECONDS = 15 * 60  # Sessions unused this long are expired and their threads deleted
+MAX_SESSIONS = 256  # Beyond this, the least recently used session is expired
+WARM_THREADS = 2  # Empty threads created ahead of time, so a new session doesn't wait on create_thread
+SWEEP_SECONDS = 30  # How often the background worker expires sessions and refills the warm threads
+
+
+class ChatSession:
+    def __init__(self, session_id, thread_id):
+        self.session_id = session_id
+        self.thread_id = thread_id
+        self.turns = 0
+        self.last_used = time.monotonic()
+        self.closed = False
+        self.lock = threading.Lock()  # A thread takes one run at a time
+
+
+class ChatSessionPool:
+    def __init__(self, project_client, agent_id, history_messages=HISTORY_MESSAGES, idle_seconds=IDLE_SECONDS,
+                 max_sessions=MAX_SESSIONS, warm_threads=WARM_THREADS, sweep_seconds=SWEEP_SECONDS):
+        self.project_client = project_client
+        self.agent_id = agent_id
+        self.history_messages = history_messages
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self.warm_threads = warm_threads
+        self.sweep_seconds = sweep_seconds
+        self.deleted_threads = 0  # Threads cleaned up so far, handy when measuring
+        self._sessions = OrderedDict()  # Least recently used first
+        self._warm = []
+        self._retired = []  # Expired sessions whose threads still have to be deleted
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._maintain, name="chat-session-pool", daemon=True)
+        self._worker.start()
+
+    def _run_options(self):
+        if self.history_messages is None:
+            return {}
+        return {"truncation_strategy": TruncationObject(type="last_messages", last_messages=self.history_messages)}
+
+    def _retire(self, session):
+        session.closed = True
+        self._retired.append(session)
+
+    def _session(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+                return session
+            thread_id = self._warm.pop() if self._warm else None
+
+        if thread_id is None:
+            thread_id = self.project_client.agents.create_thread().id
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                # Another first question for this session got there first, keep the thread for the next one
+                self._warm.append(thread_id)
+                return session
+            session = self._sessions[session_id] = ChatSession(session_id, thread_id)
+            while len(self._sessions) > self.max_sessions:
+                self._retire(self._sessions.popitem(last=False)[1])
+        self._wake.set()
+        return session
+
+    # ✅ Ask in a session's thread; the first question takes a warm thread, later ones only add a message and a run
+    def ask(self, session_id, question, stream=False, echo=True):
+        while True:
+            session = self._session(session_id)
+            with session.lock:
+                # Expired between the lookup and the lock, start over on a new thread
+                if session.closed:
+                    continue
+                with span("chat_session", session_id=session_id, turn=session.turns + 1):
+                    result = self._ask(session, question, stream, echo)
+                session.turns += 1
+                session.last_used = time.monotonic()
+                return result
+
+    def _ask(self, session, question, stream, echo):
+        self.project_client.agents.create_message(thread_id=session.thread_id, role="user", content=question)
+        if stream:
+            result = stream_run(self.project_client, session.thread_id, self.agent_id, echo=echo,
+                                run_options=self._run_options(), prompt_text=question, priority=PRIORITY_INTERACTIVE)
+            run_id, text = result["run_id"], result["text"]
+        else:
+            run, reply = run_and_fetch_reply(
+                self.project_client.agents, session.thread_id, self.agent_id, prompt_text=question,
+                priority=PRIORITY_INTERACTIVE, **self._run_options()
+            )
+            run_id, text = run.id, message_text(reply) if reply is not None else ""
+        return {"session_id": session.session_id, "thread_id": session.thread_id, "turn": session.turns + 1,
+                "run_id": run_id, "text": text}
+
+    # ✅ Forget a session, e.g. when the user starts over; its thread is deleted in the background
+    def end_session(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._retire(session)
+        self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            return {"sessions": len(self._sessions), "warm_threads": len(self._warm),
+                    "pending_deletes": len(self._retired), "deleted_threads": self.deleted_threads}
+
+    def _expire_idle(self):
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            for session_id, session in list(self._sessions.items()):
+                # A run in progress counts as activity, however long it takes
+                if session.last_used < cutoff and not session.lock.locked():
+                    self._retire(self._sessions.pop(session_id))
+
+    def _delete_thread(self, thread_id):
+        try:
+            self.project_client.agents.delete_thread(thread_id)
+        except Exception:
+            # Already gone, nothing left to clean up
+            pass
+        forget_thread(thread_id)
+        with self._lock:
+            self.deleted_threads += 1
+
+    def _delete_retired(self):
+        with self._lock:
+            retired, self._retired = self._retired, []
+        for session in retired:
+            # Wait for a run still going on the thread before deleting it
+            with session.lock:
+                self._delete_thread(session.thread_id)
+
+    def _fill_warm(self):
+        while not self._stop.is_set():
+            with self._lock:
+                if len(self._warm) >= self.warm_threads:
+                    return
+            try:
+                thread_id = self.project_client.agents.create_thread().id
+            except Exception:
+                # Sessions fall back to creating their own thread, try again on the next sweep
+                return
+            with self._lock:
+                self._warm.append(thread_id)
+
+    def _maintain(self):
+        while not self._stop.is_set():
+            self._expire_idle()
+            self._delete_retired()
+            self._fill_warm()
+            self._wake.wait(self.sweep_seconds)
+            self._wake.clear()
+
+    # ✅ Stop the worker and delete every thread the pool still holds
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._worker.join()
+        with self._lock:
+            for session in self._sessions.values():
+                self._retire(session)
+            self._sessions.clear()
+            warm, self._warm = self._warm, []
+        self._delete_retired()
+        for thread_id in warm:
+            self._delete_thread(thread_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_details):
+        self.close()
+
+
+# One pool per agent for the process, created on first use
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_session_pool(project_client, agent_id):
+    with _pools_lock:
+        if agent_id not in _pools:
+            _pools[agent_id] = ChatSessionPool(project_client, agent_id)
+        return _pools[agent_id]
+
+
+def set_default_session_pool(pool):
+    with _pools_lock:
+        previous = _pools.get(pool.agent_id)
+        _pools[pool.agent_id] = pool
+        return previous
+
+
+def close_session_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -1,46 +1,102 @@
 import json
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
+import argparse
+from project_client_pool import get_project_client
+from message_retrieval import message_text, run_and_fetch_reply
+from streaming import stream_run
+from run_scheduler import PRIORITY_INTERACTIVE
+from tracing import traced
+from chat_sessions import close_session_pools, get_session_pool
 
 # Replace these with your actual values
 PROJECT_CONNECTION_STRING = ""
 AGENT_ID = ""  # Replace with actual agent ID from setup_agent.py
+STREAM = True  # Print the reply as it arrives instead of waiting for the whole run
+QUESTION = "What is our Python coding standard?"
+SESSION_ID = "default"  # Questions with the same session ID share a thread in the REPL and with ask()
 
-def chat_with_agent(agent_id):
-    project_client = AIProjectClient.from_connection_string(
-        credential=DefaultAzureCredential(), conn_str=PROJECT_CONNECTION_STRING
+@traced("chat")
+def chat_with_agent(agent_id, stream=STREAM):
+    # ✅ Reuse the shared client, so the token and connection survive across calls
+    project_client = get_project_client(PROJECT_CONNECTION_STRING)
+
+    # Create a chat thread
+    thread = project_client.agents.create_thread()
+    print(f"Created thread, thread ID: {thread.id}")
+
+    # Send a message
+    message = project_client.agents.create_message(
+        thread_id=thread.id, role="user", content=QUESTION
+    )
+    print(f"Created message, message ID: {message.id}")
+
+    # ✅ Stream the reply, so the answer starts printing while the run is still going.
+    # Someone is waiting on a chat, so it goes ahead of queued batch runs.
+    if stream:
+        result = stream_run(project_client, thread.id, agent_id, prompt_text=QUESTION, priority=PRIORITY_INTERACTIVE)
+        print(f"Created run, run ID: {result['run_id']}")
+        return
+
+    # Process the request and fetch only this run's reply
+    run, reply = run_and_fetch_reply(
+        project_client.agents, thread.id, agent_id, prompt_text=QUESTION, priority=PRIORITY_INTERACTIVE
     )
+    print(f"Created run, run ID: {run.id}")
+
+    # Extract assistant's response
+    if reply is not None:
+        response_json = {
+            "message_id": reply["id"],
+            "created_at": reply["created_at"],
+            "assistant_id": reply["assistant_id"],
+            "thread_id": reply["thread_id"],
+            "response": message_text(reply)
+        }
+        print(json.dumps(response_json, indent=4))
+
+# ✅ Ask in a pooled session: its thread stays warm between questions, so a follow-up is one message and one run.
+# Services call this with a user or conversation ID as the session.
+def ask(session_id, question, agent_id=AGENT_ID, stream=False):
+    pool = get_session_pool(get_project_client(PROJECT_CONNECTION_STRING), agent_id)
+    return pool.ask(session_id, question, stream=stream, echo=stream)
+
+
+# ✅ Interactive chat: every question goes to the current session's thread, so the agent keeps the context
+def chat_repl(agent_id, session_id=SESSION_ID, stream=STREAM):
+    pool = get_session_pool(get_project_client(PROJECT_CONNECTION_STRING), agent_id)
+    print("💬 Ask away. /new starts a fresh thread, /session <name> switches sessions, /exit quits.")
+    try:
+        while True:
+            try:
+                question = input(f"[{session_id}] > ").strip()
+            except EOFError:
+                break
+            if not question:
+                continue
+            if question in ("/exit", "/quit"):
+                break
+            if question == "/new":
+                pool.end_session(session_id)
+                continue
+            if question.startswith("/session "):
+                session_id = question.split(maxsplit=1)[1]
+                continue
+
+            result = pool.ask(session_id, question, stream=stream)
+            if not stream:
+                print(result["text"])
+    finally:
+        # Leaving the REPL ends its sessions, so their threads are deleted now
+        close_session_pools()
 
-    with project_client:
-        # Create a chat thread
-        thread = project_client.agents.create_thread()
-        print(f"Created thread, thread ID: {thread.id}")
-
-        # Send a message
-        message = project_client.agents.create_message(
-            thread_id=thread.id, role="user", content="What is our Python coding standard?"
-        )
-        print(f"Created message, message ID: {message.id}")
-
-        # Process the request
-        run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent_id)
-        print(f"Created run, run ID: {run.id}")
-
-        # Fetch responses
-        messages = project_client.agents.list_messages(thread_id=thread.id)
-
-        # Extract assistant's response
-        for message in messages["data"]:
-            if message["role"] == "assistant":
-                response_content = message["content"][0]["text"]["value"]
-                response_json = {
-                    "message_id": message["id"],
-                    "created_at": message["created_at"],
-                    "assistant_id": message["assistant_id"],
-                    "thread_id": message["thread_id"],
-                    "response": response_content
-                }
-                print(json.dumps(response_json, indent=4))
 
 if __name__ == "__main__":
-    chat_with_agent(AGENT_ID)
+    parser = argparse.ArgumentParser(description="Chat with the coding agent.")
+    parser.add_argument("--repl", action="store_true", help="Keep asking questions in a reused thread")
+    parser.add_argument("--session", default=SESSION_ID, help="Session to start the REPL in")
+    parser.add_argument("--no-stream", dest="stream", action="store_false", help="Wait for whole replies")
+    args = parser.parse_args()
+
+    if args.repl:
+        chat_repl(AGENT_ID, session_id=args.session, stream=args.stream)
+    else:
+        chat_with_agent(AGENT_ID, stream=args.stream)
\ No newline at end of file
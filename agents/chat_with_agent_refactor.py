@@ -1,8 +1,23 @@
 import os
+import glob
 import json
-from azure.ai.projects import AIProjectClient
-from azure.ai.projects.models import FilePurpose, MessageAttachment, FileSearchTool
-from azure.identity import DefaultAzureCredential
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from azure.ai.projects.models import FilePurpose, MessageAttachment, FileSearchTool, AgentsApiToolChoiceOptionMode
+from project_client_pool import get_project_client
+from code_blocks import extract_code_block
+from message_retrieval import message_text, run_and_fetch_reply
+from streaming import stream_run
+from chunked_refactor import refactor_in_chunks
+from standards_checker import check_source, format_violations
+from standards_index import load_index
+from result_cache import ResultCache, hash_file, make_cache_key
+from upload_registry import UploadRegistry, upload_file_deduplicated, cleanup_orphans_in_background
+from git_changes import changed_line_ranges
+from language_router import LANGUAGES, detect_language, group_by_language, language_spec, resolve_routes
+from run_scheduler import describe_quota
+from tracing import traced
 
 # Replace these with your actual values
 PROJECT_CONNECTION_STRING = ""
@@ -11,76 +26,494 @@ VECTOR_STORE_ID = ""  # Replace with actual Vector Store ID from setup_agent.py
 SCRIPT_FILE_PATH = "broken-scripts/py-nonstandard-script.py"  # Path to script for refactoring
 OUTPUT_FILE_PATH = "refactored_scripts/refactored_script.py"  # Path to save the refactored script
 
+# Batch mode settings
+BATCH_OUTPUT_DIR = "refactored_scripts"  # Root folder for batch results
+BATCH_SUMMARY_FILE = "batch_summary.json"  # Per-file status summary, written under BATCH_OUTPUT_DIR
+MAX_WORKERS = 8  # Maximum number of scripts refactored at the same time, started within the model quota (run_scheduler)
+DEFAULT_LANGUAGES = ["python"]  # Languages a sweep refactors unless --languages says otherwise
+
+# Result cache settings: unchanged scripts reuse the stored result instead of calling the agent
+INSTRUCTIONS_FILE_PATH = "agents/python/agent-instructions.text"  # Instructions the agent was created with
+STANDARDS_FILE_PATH = "instructions/py-standard-instructions.py"  # Standards file in the vector store
+RESULT_CACHE = ResultCache()
+
+# Local standards pre-check: compliant files skip the agent, the rest get the violations in the prompt
+PRECHECK_STANDARDS = True
+
+# "local" inlines the matching rules from STANDARDS_FILE_PATH via the in-process index,
+# "vector_store" attaches the script and lets the agent search the knowledge base (also the fallback)
+STANDARDS_SOURCE = "local"
+
+# Large scripts are split into top-level units that are refactored in parallel (0 disables chunking)
+CHUNK_THRESHOLD_LINES = 400
+CHUNK_WORKERS = 8  # Maximum number of units refactored at the same time, per script
+
+# Upload registry: byte-identical scripts reuse the file already uploaded to the project
+UPLOAD_REGISTRY = UploadRegistry()
+
+REFACTOR_PROMPT_TEMPLATE = (
+    "I have attached a {language_name} script (`{script_name}`). "
+    "Please refactor this script according to our company coding standards. "
+    "Use the {language_name} coding standards stored in the knowledge base (File Search Tool). "
+    "Make sure to fix any non-standard practices and improve readability. "
+    "Return the refactored script in a single ```{fence} block."
+)
+LOCAL_REFACTOR_PROMPT_TEMPLATE = (
+    "Please refactor the {language_name} script `{script_name}` below according to our company coding standards. "
+    "The relevant standards are listed below, so there is no need to search the knowledge base. "
+    "Make sure to fix any non-standard practices and improve readability. "
+    "Return the refactored script in a single ```{fence} block.\n\n"
+    "Coding standards:\n{standards}\n\n"
+    "Script:\n```{fence}\n{code}\n```"
+)
+VIOLATIONS_PROMPT_TEMPLATE = (
+    "\n\nA local standards check already found these violations, make sure they are all fixed:\n{violations}"
+)
+
+
+def _read_if_exists(file_path):
+    if not os.path.exists(file_path):
+        return ""
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read()
 
-def chat_with_agent_refactor(agent_id, script_path, output_file, vector_store_id):
-    if not os.path.exists(script_path):
-        raise FileNotFoundError(f"The script file {script_path} does not exist.")
 
-    project_client = AIProjectClient.from_connection_string(
-        credential=DefaultAzureCredential(), conn_str=PROJECT_CONNECTION_STRING
+# The instructions and standards files for a language; Python uses the settings above
+def _language_files(language):
+    if language == "python":
+        return INSTRUCTIONS_FILE_PATH, STANDARDS_FILE_PATH
+    spec = language_spec(language)
+    return spec["instructions_file_path"], spec["standards_file_path"]
+
+
+def refactor_cache_key(agent_id, script_content, changed_lines=None, language="python"):
+    instructions_file_path, standards_file_path = _language_files(language)
+    standards_hash = hash_file(standards_file_path) if os.path.exists(standards_file_path) else ""
+    prompt_template = LOCAL_REFACTOR_PROMPT_TEMPLATE if STANDARDS_SOURCE == "local" else REFACTOR_PROMPT_TEMPLATE
+    return make_cache_key(
+        script_content, agent_id, _read_if_exists(instructions_file_path), standards_hash,
+        prompt_template, scope=changed_lines,
     )
 
-    with project_client:
-        # Create a new chat thread
-        thread = project_client.agents.create_thread()
-        print(f"Created thread, thread ID: {thread.id}")
 
-        # Upload the script file
-        script_file = project_client.agents.upload_file_and_poll(file_path=script_path, purpose=FilePurpose.AGENTS)
-        print(f"Uploaded script file, file ID: {script_file.id}")
+# The in-process standards index, or None when the vector store should be used instead
+def _standards_index(language="python"):
+    if STANDARDS_SOURCE != "local":
+        return None
+    return load_index(_language_files(language)[1])
+
+
+def _save_script(output_file, code):
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    # Save the refactored script to a file
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(code)
+
+
+def _should_chunk(script_path, source, violations):
+    if not CHUNK_THRESHOLD_LINES or not script_path.endswith(".py"):
+        return False
+    if source.count("\n") + 1 < CHUNK_THRESHOLD_LINES:
+        return False
+    # Units can only be found in a module that parses
+    return not any(violation.rule == "SYNTAX" for violation in violations or [])
+
 
-        # ✅ Use the same vector store created in `setup_agent.py`
-        file_search_tool = FileSearchTool(vector_store_ids=[vector_store_id])
+# ✅ Everything a refactor does before the first agent call: the local standards check, the chunking decision and
+# the cache lookup. plan["status"] is set when the agent isn't needed at all. The helpers below only read files,
+# hash and build prompts, so async_agents.py runs them in a worker thread and shares the whole flow with this one.
+def _prepare_refactor(agent_id, script_path, output_file, cache, changed_lines=None, language="python"):
+    with open(script_path, "r", encoding="utf-8") as f:
+        source = f.read()
+    plan = {"source": source, "spec": language_spec(language), "violations": None, "cache_key": None,
+            "status": None, "code": None}
 
-        # Create a message with the script file attachment
-        attachment = MessageAttachment(file_id=script_file.id, tools=file_search_tool.definitions)
+    # ✅ Files that already pass the local standards check never reach the agent (the check knows Python only)
+    if PRECHECK_STANDARDS and language == "python":
+        plan["violations"] = check_source(source, script_path)
+        if not plan["violations"]:
+            _save_script(output_file, source)
+            print(f"✅ {script_path} already follows the coding standards, copied to: {output_file}")
+            return dict(plan, status="compliant", code=source)
 
+    # ✅ In an incremental sweep, large scripts only get the units that the diff touched
+    plan["chunked"] = _should_chunk(script_path, source, plan["violations"])
+    plan["changed_lines"] = changed_lines if plan["chunked"] else None
+
+    # ✅ Skip the agent entirely when this exact input was refactored before
+    if cache is not None:
+        plan["cache_key"] = refactor_cache_key(agent_id, source, plan["changed_lines"], language)
+        cached_code = cache.get(plan["cache_key"])
+        if cached_code is not None:
+            _save_script(output_file, cached_code)
+            print(f"♻️ Cache hit, refactored script saved to: {output_file}")
+            return dict(plan, status="cached", code=cached_code)
+
+    plan["standards_index"] = _standards_index(language)
+    return plan
+
+
+# The whole-script prompt and run options; without matching local rules the script goes as a File Search attachment
+def _refactor_message(plan, script_path):
+    spec, violations, standards_index = plan["spec"], plan["violations"], plan["standards_index"]
+
+    # ✅ Inline the script and only the rules that matter for it, so the run needs no File Search step
+    rules = None
+    if standards_index is not None:
+        rules = standards_index.relevant_rules(plan["source"], [violation.rule for violation in violations or []])
+
+    run_options = {}
+    if rules:
+        message_content = LOCAL_REFACTOR_PROMPT_TEMPLATE.format(
+            language_name=spec["display_name"], fence=spec["fence"], script_name=os.path.basename(script_path),
+            standards=standards_index.format_rules(rules), code=plan["source"],
+        )
+        run_options["tool_choice"] = AgentsApiToolChoiceOptionMode.NONE
+        print(f"Inlined {len(rules)} coding standards from the local index")
+    else:
         # ✅ Explicitly instruct the agent to use the coding standards from the vector store
-        message_content = (
-            f"I have attached a Python script (`{os.path.basename(script_path)}`). "
-            "Please refactor this script according to our company coding standards. "
-            "Use the Python coding standards stored in the knowledge base (File Search Tool). "
-            "Make sure to fix any non-standard practices and improve readability."
+        message_content = REFACTOR_PROMPT_TEMPLATE.format(
+            language_name=spec["display_name"], fence=spec["fence"], script_name=os.path.basename(script_path)
         )
 
-        message = project_client.agents.create_message(
-            thread_id=thread.id, role="user", content=message_content, attachments=[attachment]
+    # ✅ Point the agent at what the local check already found
+    if violations:
+        message_content += VIOLATIONS_PROMPT_TEMPLATE.format(violations=format_violations(violations))
+    return message_content, run_options, bool(rules)
+
+
+# ✅ Use the same vector store created in `setup_agent.py`, with the uploaded script attached to the message
+def _file_search_attachments(script_file, vector_store_id):
+    file_search_tool = FileSearchTool(vector_store_ids=[vector_store_id])
+    return [MessageAttachment(file_id=script_file.id, tools=file_search_tool.definitions)]
+
+
+def _save_chunked(plan, output_file, cache, refactored_code, chunk_stats):
+    _save_script(output_file, refactored_code)
+    print(f"\n🚀 Refactored {chunk_stats['refactored_units']}/{chunk_stats['units']} units, "
+          f"script saved to: {output_file}\n")
+    if cache is not None and not chunk_stats["failed_units"]:
+        cache.put(plan["cache_key"], refactored_code)
+    return refactored_code, "refactored"
+
+
+# Save the code block of the reply, or cache a streamed one that is already on disk
+def _save_reply(plan, output_file, cache, response_content=None, streamed_code=None):
+    if streamed_code is not None:
+        refactored_code = streamed_code
+    else:
+        # Print a readable response
+        print("\n✅ AI Refactored Script:")
+        print("-" * 50)
+        print(response_content)
+        print("-" * 50)
+
+        # Extract only the code in the script's language from the response
+        refactored_code = extract_code_block(response_content, plan["spec"]["fence"])
+        _save_script(output_file, refactored_code)
+
+    print(f"\n🚀 Refactored script saved to: {output_file}\n")
+    if cache is not None:
+        cache.put(plan["cache_key"], refactored_code)
+    return refactored_code, "refactored"
+
+
+@traced("refactor_script")
+def _refactor_script(project_client, agent_id, script_path, output_file, vector_store_id, cache=RESULT_CACHE,
+                     stream=False, changed_lines=None, language="python"):
+    plan = _prepare_refactor(agent_id, script_path, output_file, cache, changed_lines, language)
+    if plan["status"] is not None:
+        return plan["code"], plan["status"]
+
+    # ✅ Large scripts go through the agent one unit at a time, so no reply hits the output limit
+    if plan["chunked"]:
+        try:
+            refactored_code, chunk_stats = refactor_in_chunks(
+                project_client.agents, agent_id, plan["source"], os.path.basename(script_path), plan["violations"],
+                CHUNK_WORKERS, standards_index=plan["standards_index"], changed_lines=plan["changed_lines"],
+            )
+        except ValueError as e:
+            # The units don't fit back together, so the agent gets the whole script after all
+            print(f"⚠️ Unit by unit refactoring of {script_path} failed ({e}), refactoring the whole script")
+        else:
+            return _save_chunked(plan, output_file, cache, refactored_code, chunk_stats)
+
+    # Create a new chat thread
+    thread = project_client.agents.create_thread()
+    print(f"Created thread, thread ID: {thread.id}")
+
+    message_content, run_options, inlined = _refactor_message(plan, script_path)
+    attachments = None
+    if not inlined:
+        # Upload the script file, unless the same bytes are already uploaded
+        script_file = upload_file_deduplicated(project_client.agents, script_path, FilePurpose.AGENTS, UPLOAD_REGISTRY)
+        print(f"Uploaded script file, file ID: {script_file.id}")
+        attachments = _file_search_attachments(script_file, vector_store_id)
+
+    message = project_client.agents.create_message(
+        thread_id=thread.id, role="user", content=message_content, attachments=attachments
+    )
+    print(f"Created message, message ID: {message.id}")
+
+    # ✅ Stream the reply and write the code block to the output file while it arrives
+    if stream:
+        result = stream_run(
+            project_client, thread.id, agent_id, output_file=output_file, language=plan["spec"]["fence"],
+            run_options=run_options, prompt_text=message_content,
         )
-        print(f"Created message, message ID: {message.id}")
+        print(f"Created run, run ID: {result['run_id']}")
+        return _save_reply(plan, output_file, cache, streamed_code=result["code"])
+
+    # Process the request and fetch only this run's reply
+    run, reply = run_and_fetch_reply(
+        project_client.agents, thread.id, agent_id, prompt_text=message_content, **run_options
+    )
+    print(f"Created run, run ID: {run.id}")
+
+    if reply is None:
+        return None, "no_response"
+    return _save_reply(plan, output_file, cache, message_text(reply))
+
+
+def refactor_script(project_client, agent_id, script_path, output_file, vector_store_id, cache=RESULT_CACHE,
+                    stream=False, language="python"):
+    refactored_code, _ = _refactor_script(
+        project_client, agent_id, script_path, output_file, vector_store_id, cache, stream, language=language
+    )
+    return refactored_code
+
+
+# The agent has to match the script's language, e.g. the java-coding-agent for a .java file
+def chat_with_agent_refactor(agent_id, script_path, output_file, vector_store_id, stream=False):
+    if not os.path.exists(script_path):
+        raise FileNotFoundError(f"The script file {script_path} does not exist.")
+
+    # ✅ Reuse the shared client, so the token and connection survive across calls
+    project_client = get_project_client(PROJECT_CONNECTION_STRING)
+
+    cleanup_orphans_in_background(project_client.agents, UPLOAD_REGISTRY)
+    return refactor_script(project_client, agent_id, script_path, output_file, vector_store_id, stream=stream,
+                           language=detect_language(script_path) or "python")
+
+
+def _extensions(languages):
+    return tuple(extension for language in languages for extension in language_spec(language)["extensions"])
 
-        # Process the request
-        run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent_id)
-        print(f"Created run, run ID: {run.id}")
 
-        # Fetch responses
-        messages = project_client.agents.list_messages(thread_id=thread.id)
+# Resolve a directory, glob pattern or single file into (script path, output path) pairs.
+# Directories are searched for the languages' extensions, plus files without one whose content is in one of the
+# languages (e.g. scripts with a shebang); glob matches are kept as they are.
+def collect_scripts(target, output_dir=BATCH_OUTPUT_DIR, languages=DEFAULT_LANGUAGES):
+    if os.path.isdir(target):
+        root = target
+        script_paths = [
+            script_path for extension in _extensions(languages)
+            for script_path in glob.glob(os.path.join(target, "**", f"*{extension}"), recursive=True)
+        ] + [
+            script_path for script_path in glob.glob(os.path.join(target, "**", "*"), recursive=True)
+            if os.path.isfile(script_path) and not os.path.splitext(script_path)[1]
+            and detect_language(script_path) in languages
+        ]
+    else:
+        script_paths = [path for path in glob.glob(target, recursive=True) if os.path.isfile(path)]
+        if not script_paths:
+            raise FileNotFoundError(f"No scripts match {target}.")
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in script_paths])
 
-        # Extract assistant's response
-        for message in messages["data"]:
-            if message["role"] == "assistant":
-                response_content = message["content"][0]["text"]["value"]
+    # Never feed earlier results back into the sweep
+    output_root = os.path.abspath(output_dir) + os.sep
+    script_paths = [path for path in script_paths if not os.path.abspath(path).startswith(output_root)]
 
-                # Print a readable response
-                print("\n✅ AI Refactored Script:")
-                print("-" * 50)
-                print(response_content)
-                print("-" * 50)
+    # Mirror the source layout under the output folder so names never collide
+    return [
+        (script_path, os.path.join(output_dir, os.path.relpath(os.path.abspath(script_path), os.path.abspath(root))))
+        for script_path in sorted(script_paths)
+    ]
 
-                # Extract only the Python code from the response
-                if "```python" in response_content and "```" in response_content:
-                    refactored_code = response_content.split("```python")[1].split("```")[0].strip()
-                else:
-                    refactored_code = response_content
 
-                # Ensure output directory exists
-                os.makedirs(os.path.dirname(output_file), exist_ok=True)
+# Scripts changed since base_ref under a directory, in any known language, as (script path, output path) pairs
+# plus {script path: changed line ranges}
+def collect_changed_scripts(base_ref, target=".", output_dir=BATCH_OUTPUT_DIR):
+    if not os.path.isdir(target):
+        raise NotADirectoryError(f"Incremental sweeps take a directory, not {target}.")
 
-                # Save the refactored script to a file
-                with open(output_file, "w", encoding="utf-8") as f:
-                    f.write(refactored_code)
+    root = os.path.abspath(target)
+    output_root = os.path.abspath(output_dir) + os.sep
+    changed = {
+        script_path: line_ranges
+        for script_path, line_ranges in changed_line_ranges(base_ref, target, _extensions(LANGUAGES)).items()
+        if os.path.abspath(script_path).startswith(root + os.sep)
+        and not os.path.abspath(script_path).startswith(output_root)
+    }
 
-                print(f"\n🚀 Refactored script saved to: {output_file}\n")
+    jobs = [
+        (script_path, os.path.join(output_dir, os.path.relpath(os.path.abspath(script_path), root)))
+        for script_path in sorted(changed)
+    ]
+    return jobs, changed
+
+
+def _refactor_one(project_client, agent_id, script_path, output_file, vector_store_id, cache, changed_lines=None,
+                  language="python"):
+    started = time.perf_counter()
+    try:
+        _, status = _refactor_script(
+            project_client, agent_id, script_path, output_file, vector_store_id, cache, changed_lines=changed_lines,
+            language=language,
+        )
+        error = None
+    except Exception as e:
+        status = "failed"
+        error = str(e)
+
+    return {
+        "script": script_path,
+        "language": language,
+        "output": output_file,
+        "status": status,
+        "seconds": round(time.perf_counter() - started, 3),
+        "error": error,
+    }
+
+
+# Group jobs into one lane per routed language; scripts of any other language are skipped
+def _route_jobs(jobs, routes):
+    output_files = dict(jobs)
+    groups, skipped = group_by_language(list(output_files), routes)
+    lanes = {
+        language: [(script_path, output_files[script_path]) for script_path in script_paths]
+        for language, script_paths in groups.items()
+    }
+    return lanes, skipped
+
+
+# ✅ Refactor every script under a directory or glob, sharing one client across bounded worker pools.
+# With base_ref, only the scripts changed since then are refactored, so the cost follows the size of the diff.
+# routes ({language: {"agent_id", "vector_store_id", "max_workers"}}) sends each language to its own agent in its
+# own lane, so a mixed repository is refactored in one pass; without it every script goes to agent_id as Python.
+def batch_refactor(agent_id, target, vector_store_id, output_dir=BATCH_OUTPUT_DIR, max_workers=MAX_WORKERS, project_client=None,
+                   cache=RESULT_CACHE, base_ref=None, routes=None):
+    if routes is None:
+        routes = {"python": {"agent_id": agent_id, "vector_store_id": vector_store_id, "max_workers": max_workers}}
+    if any(route["max_workers"] < 1 for route in routes.values()):
+        raise ValueError("max_workers must be at least 1.")
+
+    changed_lines = {}
+    if base_ref is None:
+        jobs = collect_scripts(target, output_dir, list(routes))
+    else:
+        jobs, changed_lines = collect_changed_scripts(base_ref, target, output_dir)
+    lanes, skipped = _route_jobs(jobs, routes)
+
+    scope = f" changed since {base_ref}" if base_ref else ""
+    print(f"📂 Found {sum(len(lane) for lane in lanes.values())} scripts{scope} to refactor: " + (", ".join(
+        f"{len(lane)} {LANGUAGES[language]['display_name']} ({routes[language]['max_workers']} workers)"
+        for language, lane in lanes.items()
+    ) or "nothing to do"))
+    for script_path in skipped:
+        print(f"⏭️ Skipping {script_path}, no agent for its language")
+    print(describe_quota())
+
+    if project_client is None:
+        project_client = get_project_client(PROJECT_CONNECTION_STRING)
+
+    results = []
+    started = time.perf_counter()
+    cleanup = cleanup_orphans_in_background(project_client.agents, UPLOAD_REGISTRY)
+    # ✅ One worker pool per language, so a slow lane never holds up the other
+    executors = {
+        language: ThreadPoolExecutor(max_workers=routes[language]["max_workers"], thread_name_prefix=f"refactor-{language}")
+        for language in lanes
+    }
+    total = sum(len(lane) for lane in lanes.values())
+    try:
+        futures = [
+            executors[language].submit(
+                _refactor_one, project_client, routes[language]["agent_id"], script_path, output_file,
+                routes[language]["vector_store_id"], cache, changed_lines.get(script_path), language,
+            )
+            for language, lane in lanes.items()
+            for script_path, output_file in lane
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"[{len(results)}/{total}] {result['status']}: {result['script']} ({result['seconds']}s)")
+    finally:
+        for executor in executors.values():
+            executor.shutdown()
+        if cleanup is not None:
+            cleanup.join()
+
+    elapsed = time.perf_counter() - started
+    files_per_minute = len(results) / elapsed * 60 if elapsed > 0 else 0.0
+
+    summary = {
+        "target": target,
+        "base_ref": base_ref,
+        "max_workers": sum(routes[language]["max_workers"] for language in lanes),
+        "lanes": {
+            language: {"scripts": len(lane), "max_workers": routes[language]["max_workers"]}
+            for language, lane in lanes.items()
+        },
+        "total": len(results),
+        "refactored": sum(1 for result in results if result["status"] == "refactored"),
+        "compliant": sum(1 for result in results if result["status"] == "compliant"),
+        "cached": sum(1 for result in results if result["status"] == "cached"),
+        "failed": sum(1 for result in results if result["status"] == "failed"),
+        "skipped": skipped,
+        "changed_lines": sum(last - first + 1 for line_ranges in changed_lines.values() for first, last in line_ranges),
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_minute": round(files_per_minute, 2),
+        "cache": cache.stats() if cache is not None else None,
+        "results": sorted(results, key=lambda result: result["script"]),
+    }
+
+    # Save the per-file status summary next to the refactored scripts
+    os.makedirs(output_dir, exist_ok=True)
+    summary_path = os.path.join(output_dir, BATCH_SUMMARY_FILE)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4)
+
+    print(f"\n📊 Refactored {summary['refactored']}/{summary['total']} scripts "
+          f"({summary['compliant']} already compliant, {summary['cached']} cached, {summary['failed']} failed) "
+          f"in {summary['elapsed_seconds']}s, "
+          f"{summary['files_per_minute']} files/min")
+    if cache is not None:
+        print(f"♻️ Cache: {summary['cache']['hits']} hits, {summary['cache']['misses']} misses")
+    print(f"📝 Batch summary saved to: {summary_path}\n")
+
+    return summary
 
 
 if __name__ == "__main__":
-    chat_with_agent_refactor(AGENT_ID, SCRIPT_FILE_PATH, OUTPUT_FILE_PATH, VECTOR_STORE_ID)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Refactor Python scripts with the coding agent.")
+    parser.add_argument("--batch", metavar="DIR_OR_GLOB", help="Refactor every script under a directory or glob pattern")
+    parser.add_argument("--since", metavar="BASE_REF",
+                        help="Only refactor scripts changed since this git ref (under --batch DIR, default: everywhere)")
+    parser.add_argument("--languages", nargs="+", choices=list(LANGUAGES),
+                        help="Route each language to its own provisioned agent in its own lane "
+                             "(IDs from <LANGUAGE>_AGENT_ID or the last setup_agents.py run)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Maximum concurrent refactors in batch mode, started within MODEL_REQUESTS_PER_MINUTE")
+    parser.add_argument("--output-dir", default=BATCH_OUTPUT_DIR, help="Root folder for batch results")
+    parser.add_argument("--stream", action="store_true", help="Stream the reply while refactoring a single script")
+    parser.add_argument("--standards", choices=["local", "vector_store"], default=STANDARDS_SOURCE,
+                        help="Inline rules from the local standards index, or search the vector store")
+    parser.add_argument("--chunk-lines", type=int, default=CHUNK_THRESHOLD_LINES,
+                        help="Refactor scripts of at least this many lines unit by unit (0 disables)")
+    args = parser.parse_args()
+    CHUNK_THRESHOLD_LINES = args.chunk_lines
+    STANDARDS_SOURCE = args.standards
+
+    if args.languages:
+        batch_refactor(None, args.batch or ".", None, output_dir=args.output_dir, base_ref=args.since,
+                       routes=resolve_routes(args.languages))
+    elif args.since:
+        batch_refactor(AGENT_ID, args.batch or ".", VECTOR_STORE_ID, output_dir=args.output_dir,
+                       max_workers=args.workers, base_ref=args.since)
+    elif args.batch:
+        batch_refactor(AGENT_ID, args.batch, VECTOR_STORE_ID, output_dir=args.output_dir, max_workers=args.workers)
+    else:
+        chat_with_agent_refactor(AGENT_ID, SCRIPT_FILE_PATH, OUTPUT_FILE_PATH, VECTOR_STORE_ID, stream=args.stream)
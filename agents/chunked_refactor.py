@@ -0,0 +1,363 @@
+# Refactor large modules one top-level unit at a time, so no single reply has to hold the whole file.
+# Units are refactored in parallel and stitched back in their original order.
+import re
+import ast
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from azure.ai.projects.models import AgentsApiToolChoiceOptionMode
+from code_blocks import extract_code_block
+from message_retrieval import message_text, run_and_fetch_reply, run_and_fetch_reply_async
+from standards_checker import check_source, format_violations, TOP_LEVEL_BLANK_LINES, METHOD_BLANK_LINES, _import_group
+from git_changes import touches
+
+MAX_WORKERS = 8  # Maximum number of units refactored at the same time, started within the model quota (run_scheduler)
+
+UNIT_PROMPT_TEMPLATE = (
+    "I am refactoring the Python module `{script_name}` one part at a time. "
+    "Please refactor the part below ({unit_label}) according to our company coding standards. "
+    "{standards_hint}"
+    "Return only the refactored part in a single ```python block, without the module header.\n\n"
+    "Module header, for context only:\n```python\n{header}\n```\n\n"
+    "Part to refactor:\n```python\n{code}\n```"
+)
+RENAMES_PROMPT_TEMPLATE = (
+    "\n\nOther parts of the module are refactored separately, so use exactly these new names "
+    "wherever the old ones appear:\n{renames}"
+)
+KNOWLEDGE_BASE_HINT = "Use the Python coding standards stored in the knowledge base (File Search Tool). "
+INLINE_STANDARDS_HINT = "The relevant standards are listed at the end, so there is no need to search the knowledge base. "
+UNIT_STANDARDS_PROMPT_TEMPLATE = "\n\nCoding standards:\n{standards}"
+UNIT_VIOLATIONS_PROMPT_TEMPLATE = (
+    "\n\nA local standards check found these violations in this part (line numbers are for the whole module):\n"
+    "{violations}"
+)
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+class Unit:
+    def __init__(self, kind, name, start, end, text):
+        self.kind = kind  # header, class, function or code
+        self.name = name
+        self.start = start  # First and last line (1-based, inclusive), leading comments included
+        self.end = end
+        self.text = text
+
+    @property
+    def label(self):
+        return f"{self.kind} `{self.name}`" if self.name else f"{self.kind}, lines {self.start}-{self.end}"
+
+
+# ✅ Split a module into its import header and top-level classes, functions and statement runs
+def split_units(source):
+    tree = ast.parse(source)
+    lines = source.splitlines(keepends=True)
+
+    # Group top-level statements: every definition is its own unit, other statements are kept together
+    groups = []
+    for node in tree.body:
+        start = min([node.lineno] + [decorator.lineno for decorator in getattr(node, "decorator_list", [])])
+        if isinstance(node, _DEFINITIONS):
+            kind = "class" if isinstance(node, ast.ClassDef) else "function"
+            groups.append([kind, node.name, start, node.end_lineno])
+        elif groups and groups[-1][0] in ("header", "code"):
+            groups[-1][3] = node.end_lineno
+        else:
+            groups.append(["header" if not groups else "code", None, start, node.end_lineno])
+
+    # Comments and blank lines before a unit belong to it, trailing lines to the last unit
+    units = []
+    next_start = 1
+    for index, (kind, name, start, end) in enumerate(groups):
+        if index == len(groups) - 1:
+            end = len(lines)
+        units.append(Unit(kind, name, next_start, end, "".join(lines[next_start - 1:end])))
+        next_start = end + 1
+    return units
+
+
+def _pascal_case(name):
+    return "".join(part[:1].upper() + part[1:] for part in name.split("_"))
+
+
+def _snake_case(name):
+    return re.sub(r"(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+
+
+# ✅ One module-wide rename map, so every unit agrees on the new definition names
+def plan_renames(violations):
+    renames = {}
+    for violation in violations:
+        old_name = violation.message.split("'")[1] if "'" in violation.message else None
+        if violation.rule == "CLASS_NAMES":
+            renames[old_name] = _pascal_case(old_name)
+        elif violation.rule == "FUNCTION_NAMES":
+            renames[old_name] = _snake_case(old_name)
+    return {old_name: new_name for old_name, new_name in renames.items() if old_name != new_name}
+
+
+def _rename_pattern(renames):
+    return re.compile(r"\b(" + "|".join(map(re.escape, renames)) + r")\b") if renames else None
+
+
+# A unit needs the agent when it has violations or uses a name that is being changed elsewhere
+def units_to_refactor(units, violations, renames):
+    rename_pattern = _rename_pattern(renames)
+    selected = []
+    for unit in units:
+        unit_violations = [violation for violation in violations if unit.start <= violation.line <= unit.end]
+        if unit_violations or (rename_pattern and rename_pattern.search(unit.text)):
+            selected.append((unit, unit_violations))
+    return selected
+
+
+def _unit_prompt(unit, header, script_name, unit_violations, renames, rules=None):
+    prompt = UNIT_PROMPT_TEMPLATE.format(
+        script_name=script_name, unit_label=unit.label, header=header.strip(), code=unit.text.strip("\n"),
+        standards_hint=INLINE_STANDARDS_HINT if rules else KNOWLEDGE_BASE_HINT,
+    )
+    # Only the renames this unit actually touches, to keep the prompt small
+    unit_renames = sorted(
+        (old_name, new_name) for old_name, new_name in renames.items() if re.search(rf"\b{re.escape(old_name)}\b", unit.text)
+    )
+    if unit_renames:
+        prompt += RENAMES_PROMPT_TEMPLATE.format(
+            renames="\n".join(f"- {old_name} -> {new_name}" for old_name, new_name in unit_renames)
+        )
+    if unit_violations:
+        prompt += UNIT_VIOLATIONS_PROMPT_TEMPLATE.format(violations=format_violations(unit_violations))
+    if rules:
+        prompt += UNIT_STANDARDS_PROMPT_TEMPLATE.format(standards=rules)
+    return prompt
+
+
+def _unit_code(reply):
+    if reply is None:
+        raise ValueError("the agent did not reply")
+
+    code = extract_code_block(message_text(reply), "python")
+    # Each unit is top-level code, so it has to parse on its own
+    ast.parse(code)
+    return code
+
+
+def _refactor_unit(agents_client, agent_id, prompt, run_options):
+    thread = agents_client.create_thread()
+    agents_client.create_message(thread_id=thread.id, role="user", content=prompt)
+    _, reply = run_and_fetch_reply(agents_client, thread.id, agent_id, prompt_text=prompt, **run_options)
+    return _unit_code(reply)
+
+
+async def _refactor_unit_async(agents_client, agent_id, prompt, run_options, semaphore):
+    async with semaphore:
+        thread = await agents_client.create_thread()
+        await agents_client.create_message(thread_id=thread.id, role="user", content=prompt)
+        _, reply = await run_and_fetch_reply_async(
+            agents_client, thread.id, agent_id, prompt_text=prompt, **run_options
+        )
+    return _unit_code(reply)
+
+
+def _imports(tree):
+    return [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+# Where an import of `group` goes in the header: after the last import of the same or an earlier group,
+# with a blank line when it starts a new group
+def _insert_import(header_code, import_code, group):
+    lines = header_code.splitlines(keepends=True)
+    imports = [(node, _import_group(node, None)) for node in _imports(ast.parse(header_code))]
+    earlier = [(node, node_group) for node, node_group in imports if node_group <= group]
+    if earlier:
+        node, node_group = earlier[-1]
+        lines.insert(node.end_lineno, import_code if node_group == group else "\n" + import_code)
+    elif imports:
+        lines.insert(imports[0][0].lineno - 1, import_code + "\n")
+    else:
+        lines.append(("\n" if lines else "") + import_code)
+    return "".join(lines)
+
+
+# ✅ Imports the agent added to a unit (e.g. for TYPE_HINTS) move up into the module header, once each
+def _hoist_imports(units, replacements):
+    replacements = dict(replacements)
+    hoisted = []
+    for unit in units:
+        if unit.kind == "header" or unit.start not in replacements:
+            continue
+        lines = replacements[unit.start].splitlines(keepends=True)
+        imports = _imports(ast.parse(replacements[unit.start]))
+        unit_imports = []
+        for node in reversed(imports):
+            unit_imports.insert(0, (node, "".join(lines[node.lineno - 1:node.end_lineno]).strip() + "\n"))
+            del lines[node.lineno - 1:node.end_lineno]
+        if imports:
+            replacements[unit.start] = "".join(lines)
+            hoisted.extend(unit_imports)
+    if not hoisted:
+        return units, replacements
+
+    header = units[0] if units and units[0].kind == "header" else None
+    header_code = (replacements.get(header.start, header.text) if header else "").rstrip("\n")
+    header_code = header_code + "\n" if header_code else ""
+    known = {ast.unparse(node) for node in _imports(ast.parse(header_code))}
+    for node, import_code in hoisted:
+        if ast.unparse(node) not in known:
+            known.add(ast.unparse(node))
+            header_code = _insert_import(header_code, import_code, _import_group(node, None))
+
+    if header is None:
+        return [Unit("header", None, 0, 0, header_code)] + units, replacements
+    if header.start in replacements:
+        replacements[header.start] = header_code
+        return units, replacements
+    return [Unit("header", None, header.start, header.end, header_code)] + units[1:], replacements
+
+
+# BLANK_LINES between the methods of a class and of the classes nested in it, as the standards checker counts them
+def _space_methods(code):
+    lines = code.splitlines(keepends=True)
+    gaps = []
+
+    def collect(body):
+        for previous, node in zip(body, body[1:]):
+            if isinstance(previous, _DEFINITIONS) and isinstance(node, _DEFINITIONS):
+                end = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list]) - 1
+                while end > 0 and lines[end - 1].strip().startswith("#"):
+                    end -= 1
+                start = end
+                while start > 0 and not lines[start - 1].strip():
+                    start -= 1
+                gaps.append((start, end))
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                collect(node.body)
+
+    for node in ast.parse(code).body:
+        if isinstance(node, ast.ClassDef):
+            collect(node.body)
+    for start, end in sorted(gaps, reverse=True):
+        lines[start:end] = ["\n"] * METHOD_BLANK_LINES
+    return "".join(lines)
+
+
+# Units are joined with the standard's blank lines, not the ones they came with: the agent only sees a unit's
+# own text, so it can't fix the spacing around it
+def _stitch(units, replacements):
+    parts = []
+    for unit in units:
+        code = _space_methods(replacements.get(unit.start, unit.text))
+        code = re.sub(r"\A(?:[ \t]*\n)+", "", code).rstrip()
+        if code:
+            parts.append(code + "\n")
+    return ("\n" * TOP_LEVEL_BLANK_LINES).join(parts)
+
+
+# Split the module and build one prompt per unit that needs work: [(unit, prompt, run options)].
+# With changed_lines, only the violations inside changed units count.
+def _plan_units(source, script_name, violations, standards_index, changed_lines=None):
+    if violations is None:
+        violations = check_source(source, script_name)
+
+    units = split_units(source)
+    header = units[0].text if units and units[0].kind == "header" else ""
+    scope = ""
+    if changed_lines is not None:
+        changed_units = [unit for unit in units if touches(changed_lines, unit.start, unit.end)]
+        violations = [
+            violation for violation in violations
+            if any(unit.start <= violation.line <= unit.end for unit in changed_units)
+        ]
+        scope = f" ({len(changed_units)} changed)"
+    # Units that use a renamed name are still included, so the module stays consistent
+    renames = plan_renames(violations)
+    selected = units_to_refactor(units, violations, renames)
+    print(f"🧩 Split {script_name} into {len(units)} units{scope}, {len(selected)} need refactoring")
+
+    # With a local standards index each unit carries its own rules and skips File Search
+    prompts = []
+    for unit, unit_violations in selected:
+        rules = None
+        if standards_index is not None:
+            rules = standards_index.format_rules(standards_index.relevant_rules(
+                unit.text, [violation.rule for violation in unit_violations]
+            ))
+        prompts.append((
+            unit,
+            _unit_prompt(unit, header, script_name, unit_violations, renames, rules),
+            {"tool_choice": AgentsApiToolChoiceOptionMode.NONE} if rules else {},
+        ))
+    return units, renames, prompts
+
+
+def _assemble(units, renames, replacements, failed):
+    # ✅ A unit kept as it was still uses the old names, which the other units no longer define or call
+    rename_pattern = _rename_pattern(renames)
+    if failed and rename_pattern:
+        stale = [unit.label for unit in units if unit.start not in replacements and rename_pattern.search(unit.text)]
+        if stale:
+            raise ValueError(f"{', '.join(stale)} could not be refactored and use names renamed elsewhere")
+
+    units, replacements = _hoist_imports(units, replacements)
+    refactored_code = _stitch(units, replacements)
+
+    # ✅ Never write a module that no longer parses
+    try:
+        ast.parse(refactored_code)
+    except SyntaxError as e:
+        raise ValueError(f"Reassembled module does not parse (line {e.lineno}): {e.msg}") from e
+
+    return refactored_code, {
+        "units": len(units),
+        "refactored_units": len(replacements),
+        "failed_units": failed,
+        "renames": renames,
+    }
+
+
+# ✅ Refactor a large module unit by unit, in parallel, and return the validated result
+def refactor_in_chunks(agents_client, agent_id, source, script_name, violations=None, max_workers=MAX_WORKERS,
+                       standards_index=None, changed_lines=None):
+    units, renames, prompts = _plan_units(source, script_name, violations, standards_index, changed_lines)
+
+    replacements = {}
+    failed = []
+    if prompts:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as executor:
+            futures = {
+                executor.submit(_refactor_unit, agents_client, agent_id, prompt, run_options): unit
+                for unit, prompt, run_options in prompts
+            }
+            for future, unit in futures.items():
+                try:
+                    replacements[unit.start] = future.result()
+                except Exception as e:
+                    # A unit that could not be refactored is kept as it was
+                    failed.append(unit.label)
+                    print(f"⚠️ Keeping {unit.label} unchanged: {e}")
+
+    return _assemble(units, renames, replacements, failed)
+
+
+# ✅ The same on the async client: units run as coroutines, at most max_workers at a time
+async def refactor_in_chunks_async(agents_client, agent_id, source, script_name, violations=None,
+                                   max_workers=MAX_WORKERS, standards_index=None, changed_lines=None):
+    units, renames, prompts = _plan_units(source, script_name, violations, standards_index, changed_lines)
+
+    semaphore = asyncio.Semaphore(max_workers)
+    results = await asyncio.gather(
+        *(_refactor_unit_async(agents_client, agent_id, prompt, run_options, semaphore)
+          for _, prompt, run_options in prompts),
+        return_exceptions=True,
+    )
+
+    replacements = {}
+    failed = []
+    for (unit, _, _), result in zip(prompts, results):
+        if isinstance(result, Exception):
+            failed.append(unit.label)
+            print(f"⚠️ Keeping {unit.label} unchanged: {result}")
+        else:
+            replacements[unit.start] = result
+
+    return _assemble(units, renames, replacements, failed)
@@ -0,0 +1,66 @@
+# Helpers for pulling fenced code out of agent replies, in one go or while the reply streams in
+import os
+
+
+def extract_code_block(response_content, language="python"):
+    fence = f"```{language}"
+    if fence in response_content:
+        return response_content.split(fence)[1].split("```")[0].strip()
+    return response_content
+
+
+# Writes the fenced code block to a file as soon as each piece of it arrives
+class FencedCodeWriter:
+    def __init__(self, output_file, language="python"):
+        self.output_file = output_file
+        self.fence = f"```{language}"
+        self._text = []
+        self._pending = ""
+        self._state = "search"  # search -> code -> done
+        self._file = None
+
+    def _write(self, code):
+        if not code:
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.output_file) or ".", exist_ok=True)
+            self._file = open(self.output_file, "w", encoding="utf-8")
+        self._file.write(code)
+        self._file.flush()
+
+    def feed(self, chunk):
+        self._text.append(chunk)
+        self._pending += chunk
+
+        if self._state == "search":
+            start = self._pending.find(self.fence)
+            # Wait for the end of the fence line before writing anything
+            line_end = self._pending.find("\n", start) if start != -1 else -1
+            if line_end == -1:
+                # Only the tail can still turn into a fence, drop the rest
+                self._pending = self._pending[-len(self.fence):]
+                return
+            self._pending = self._pending[line_end + 1:]
+            self._state = "code"
+
+        if self._state == "code":
+            end = self._pending.find("```")
+            if end != -1:
+                self._write(self._pending[:end])
+                self._pending = ""
+                self._state = "done"
+            else:
+                # Hold back a possible half-received closing fence
+                self._write(self._pending[:-2])
+                self._pending = self._pending[-2:]
+
+    def close(self):
+        # Rewrite with the same cleaned-up code the blocking path would save
+        code = extract_code_block("".join(self._text), self.fence[3:])
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        os.makedirs(os.path.dirname(self.output_file) or ".", exist_ok=True)
+        with open(self.output_file, "w", encoding="utf-8") as f:
+            f.write(code)
+        return code
@@ -0,0 +1,56 @@
+# Which source files and lines changed since a base ref, read from the local `git diff`,
+# so a refactor sweep only sends the agent what a commit or pull request actually touched
+import os
+import re
+import subprocess
+
+SOURCE_EXTENSIONS = (".py", ".java")  # Files an incremental sweep looks at
+HUNK_PATTERN = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+def _git(repo_dir, *args):
+    result = subprocess.run(["git", "-c", "core.quotePath=false", *args], cwd=repo_dir, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def _parse_diff(diff):
+    ranges = {}
+    path = None
+    for line in diff.splitlines():
+        if line.startswith("+++ "):
+            path = line[len("+++ b/"):] if line.startswith("+++ b/") else None
+            if path is not None:
+                ranges.setdefault(path, [])
+            continue
+
+        match = HUNK_PATTERN.match(line)
+        if path is None or match is None:
+            continue
+        start = int(match.group(1))
+        count = int(match.group(2)) if match.group(2) is not None else 1
+        # A hunk that only deletes lines still changes the code around where they were
+        ranges[path].append((max(start, 1), max(start + count - 1, start, 1)))
+    return ranges
+
+
+# ✅ {path: [(first line, last line), ...]} for every added or modified source file since base_ref.
+# Uncommitted changes count too; paths are relative to the current directory.
+def changed_line_ranges(base_ref, repo_dir=".", extensions=SOURCE_EXTENSIONS):
+    root = _git(repo_dir, "rev-parse", "--show-toplevel").strip()
+    # Diff against where the branch left base_ref, so commits that landed on the base since don't count
+    merge_base = _git(root, "merge-base", base_ref, "HEAD").strip()
+    diff = _git(root, "diff", "--unified=0", "--no-color", "--no-ext-diff", "--diff-filter=ACMR", merge_base,
+                "--", *[f"*{extension}" for extension in extensions])
+
+    changed = {}
+    for path, line_ranges in _parse_diff(diff).items():
+        full_path = os.path.join(root, path)
+        if os.path.isfile(full_path):
+            changed[os.path.relpath(full_path)] = line_ranges
+    return changed
+
+
+def touches(line_ranges, start, end):
+    return any(first <= end and last >= start for first, last in line_ranges)
@@ -1,7 +1,11 @@
 import os
-from azure.ai.projects import AIProjectClient
-from azure.ai.projects.models import FilePurpose, FileSearchTool
-from azure.identity import DefaultAzureCredential
+import sys
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from project_client_pool import get_project_client
+from upload_registry import UploadRegistry
+from provisioning import provision_agent
 
 # Replace these with your actual values
 PROJECT_CONNECTION_STRING = ""
@@ -9,50 +13,41 @@ MODEL_DEPLOYMENT_NAME = "gpt-4o-mini-coding-agent"
 name = "java-coding-agent"
 standards_file_path = "instructions/java-standard-instructions.java"
 INSTRUCTIONS_FILE_PATH = "agents/java/agent-instructions.text"
+# Standards files stay referenced by vector stores, so they never expire from the registry
+UPLOAD_REGISTRY = UploadRegistry(".agent_cache/standards_uploads.json", max_age_seconds=None)
 vector_store_name = "Java-Coding-Standards-Vector-Store"
 
 
-def setup_agent():
-    project_client = AIProjectClient.from_connection_string(
-        credential=DefaultAzureCredential(), conn_str=PROJECT_CONNECTION_STRING
+def setup_agent(prune=False):
+    # ✅ Reuse the shared client, so the token and connection survive across calls
+    project_client = get_project_client(PROJECT_CONNECTION_STRING)
+
+    # Load agent instructions
+    instructions_file_path = INSTRUCTIONS_FILE_PATH
+    if not os.path.exists(instructions_file_path):
+        raise FileNotFoundError(f"The file {instructions_file_path} does not exist.")
+
+    # ✅ Reuse the existing agent and vector store, and only upload or update what changed
+    result = provision_agent(
+        project_client.agents,
+        {
+            "name": name,
+            "model": MODEL_DEPLOYMENT_NAME,
+            "instructions_file_path": instructions_file_path,
+            "standards_file_path": standards_file_path,
+            "vector_store_name": vector_store_name,
+        },
+        UPLOAD_REGISTRY,
+        prune=prune,
     )
+    print(f"Agent {result['agent']}, vector store {result['vector_store']} in {result['seconds']}s")
 
-    with project_client:
-        # Upload the standard instructions file
-        standards_file = project_client.agents.upload_file_and_poll(
-            file_path=standards_file_path, purpose=FilePurpose.AGENTS
-        )
-        print(f"Uploaded standards file, file ID: {standards_file.id}")
-
-        # Create a vector store
-        vector_store = project_client.agents.create_vector_store_and_poll(
-            file_ids=[standards_file.id], name=vector_store_name
-        )
-        print(f"Created vector store, vector store ID: {vector_store.id}")
-
-        # Create a file search tool
-        file_search_tool = FileSearchTool(vector_store_ids=[vector_store.id])
-
-        # Load agent instructions
-        instructions_file_path = INSTRUCTIONS_FILE_PATH
-        if not os.path.exists(instructions_file_path):
-            raise FileNotFoundError(f"The file {instructions_file_path} does not exist.")
-        
-        with open(instructions_file_path, "r") as file:
-            instructions = file.read()
-
-        # Create agent
-        agent = project_client.agents.create_agent(
-            model=MODEL_DEPLOYMENT_NAME,
-            name=name,
-            instructions=instructions,
-            tools=file_search_tool.definitions,
-            tool_resources=file_search_tool.resources,
-        )
-        print(f"Created agent, agent ID: {agent.id}")
-
-        return agent.id, vector_store.id
+    return result["agent_id"], result["vector_store_id"]
 
 if __name__ == "__main__":
-    agent_id, vector_store_id = setup_agent()
+    parser = argparse.ArgumentParser(description="Create or update the coding agent and its vector store.")
+    parser.add_argument("--prune", action="store_true", help="Delete older agents and vector stores with the same name")
+    args = parser.parse_args()
+
+    agent_id, vector_store_id = setup_agent(prune=args.prune)
     print(f"Setup complete. Agent ID: {agent_id}, Vector Store ID: {vector_store_id}")
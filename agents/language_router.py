@@ -0,0 +1,97 @@
+# Route source files to the coding agent for their language: Python files to python-coding-agent, Java files to
+# java-coding-agent, each with its own vector store, standards file, code fence and concurrency lane
+import os
+import re
+from provisioning import STATE_PATH, provisioned_ids
+
+LANGUAGES = {
+    "python": {
+        "display_name": "Python",
+        "extensions": (".py", ".pyw"),
+        "fence": "python",
+        "agent_name": "python-coding-agent",  # As created by agents/setup_agents.py
+        "instructions_file_path": "agents/python/agent-instructions.text",
+        "standards_file_path": "instructions/py-standard-instructions.py",
+        "max_workers": 8,  # Scripts of this language refactored at the same time
+    },
+    "java": {
+        "display_name": "Java",
+        "extensions": (".java",),
+        "fence": "java",
+        "agent_name": "java-coding-agent",
+        "instructions_file_path": "agents/java/agent-instructions.text",
+        "standards_file_path": "instructions/java-standard-instructions.java",
+        "max_workers": 4,
+    },
+}
+CONTENT_SNIFF_BYTES = 4096  # Read this much of a file without a known extension to guess its language
+
+# Checked in order on files without a known extension; a shebang wins over everything else
+CONTENT_PATTERNS = [
+    ("python", re.compile(r"\A#!.*\bpython")),
+    ("java", re.compile(r"^\s*(package\s+[\w.]+\s*;|import\s+(static\s+)?[\w.]+(\.\*)?\s*;"
+                        r"|(public\s+|final\s+|abstract\s+)*(class|interface|enum|record)\s+\w+[^:\n]*\{)", re.M)),
+    ("python", re.compile(r"^\s*(def\s+\w+\s*\(.*\)\s*(->.*)?:|class\s+\w+(\(.*\))?\s*:|from\s+[\w.]+\s+import\s"
+                          r"|import\s+[\w.]+(\s+as\s+\w+)?\s*$)", re.M)),
+]
+
+
+def _read_head(file_path):
+    try:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read(CONTENT_SNIFF_BYTES)
+    except OSError:
+        return ""
+
+
+# ✅ The language of a file from its extension, or from its content when the extension says nothing; None if unknown
+def detect_language(file_path, content=None):
+    extension = os.path.splitext(file_path)[1].lower()
+    for language, spec in LANGUAGES.items():
+        if extension in spec["extensions"]:
+            return language
+
+    if content is None:
+        content = _read_head(file_path)
+    for language, pattern in CONTENT_PATTERNS:
+        if pattern.search(content):
+            return language
+    return None
+
+
+def language_spec(language):
+    if language not in LANGUAGES:
+        raise ValueError(f"Unsupported language: {language} (choose from {', '.join(LANGUAGES)})")
+    return LANGUAGES[language]
+
+
+# ✅ Agent, vector store and lane size for a language: <LANGUAGE>_AGENT_ID / <LANGUAGE>_VECTOR_STORE_ID if set,
+# otherwise the IDs the setup scripts last provisioned
+def resolve_route(language, state_path=STATE_PATH):
+    spec = language_spec(language)
+    prefix = language.upper()
+    provisioned = provisioned_ids(spec["agent_name"], state_path) or {}
+    agent_id = os.getenv(f"{prefix}_AGENT_ID") or provisioned.get("agent_id")
+    if not agent_id:
+        raise ValueError(f"No {spec['display_name']} agent: set {prefix}_AGENT_ID or run agents/setup_agents.py")
+    return {
+        "agent_id": agent_id,
+        "vector_store_id": os.getenv(f"{prefix}_VECTOR_STORE_ID") or provisioned.get("vector_store_id"),
+        "max_workers": spec["max_workers"],
+    }
+
+
+def resolve_routes(languages=None, state_path=STATE_PATH):
+    return {language: resolve_route(language, state_path) for language in languages or LANGUAGES}
+
+
+# ✅ Split paths into {language: [paths]}, plus the paths no language could be detected for
+def group_by_language(file_paths, languages=None):
+    groups, unknown = {}, []
+    for file_path in file_paths:
+        language = detect_language(file_path)
+        if language is None or (languages is not None and language not in languages):
+            unknown.append(file_path)
+        else:
+            groups.setdefault(language, []).append(file_path)
+    return groups, unknown
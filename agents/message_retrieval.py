@@ -0,0 +1,95 @@
+# Fetch only the reply produced by a run, instead of listing and scanning the whole thread.
+# A per-thread high-water mark keeps the lookup cost flat however long the thread grows.
+import threading
+from collections import OrderedDict
+from run_scheduler import PRIORITY_BATCH, estimate_tokens, get_scheduler
+
+PAGE_SIZE = 20  # Messages per list_messages page
+MAX_TRACKED_THREADS = 10000  # High-water marks kept, least recently used first out; one-shot threads never come back
+
+_high_water_marks = OrderedDict()
+_lock = threading.Lock()
+
+
+def message_text(message):
+    return message["content"][0]["text"]["value"]
+
+
+def _reply_request(thread_id, run_id, page_size):
+    with _lock:
+        high_water_mark = _high_water_marks.get(thread_id)
+    request = {"thread_id": thread_id, "run_id": run_id, "order": "asc", "limit": page_size}
+    if high_water_mark is not None:
+        request["after"] = high_water_mark
+    return request
+
+
+# Scan one page; returns whether another page has to be fetched
+def _scan_page(messages, run_id, request, found):
+    for message in messages["data"]:
+        found["last_seen"] = message["id"]
+        if message["role"] == "assistant" and message.get("run_id") in (None, run_id):
+            found["reply"] = message
+
+    if not messages.get("has_more") or not messages["data"]:
+        return False
+    request["after"] = messages["data"][-1]["id"]
+    return True
+
+
+def _remember(thread_id, found):
+    if found["last_seen"] is not None:
+        with _lock:
+            _high_water_marks[thread_id] = found["last_seen"]
+            _high_water_marks.move_to_end(thread_id)
+            # A thread that drops out is scanned from its start the next time, nothing else is lost
+            while len(_high_water_marks) > MAX_TRACKED_THREADS:
+                _high_water_marks.popitem(last=False)
+    return found["reply"]
+
+
+# ✅ Return the assistant reply written by run_id (the newest one if the run wrote several)
+def get_run_reply(agents_client, thread_id, run_id, page_size=PAGE_SIZE):
+    request = _reply_request(thread_id, run_id, page_size)
+    found = {"reply": None, "last_seen": request.get("after")}
+    while _scan_page(agents_client.list_messages(**request), run_id, request, found):
+        pass
+    return _remember(thread_id, found)
+
+
+# The same lookup on the async client
+async def get_run_reply_async(agents_client, thread_id, run_id, page_size=PAGE_SIZE):
+    request = _reply_request(thread_id, run_id, page_size)
+    found = {"reply": None, "last_seen": request.get("after")}
+    while _scan_page(await agents_client.list_messages(**request), run_id, request, found):
+        pass
+    return _remember(thread_id, found)
+
+
+def forget_thread(thread_id):
+    with _lock:
+        _high_water_marks.pop(thread_id, None)
+
+
+# ✅ Run the agent on a thread and return the run together with its single reply.
+# The run goes through the shared scheduler, budgeted by the size of the prompt it answers.
+def run_and_fetch_reply(agents_client, thread_id, agent_id, prompt_text="", priority=PRIORITY_BATCH, **run_options):
+    run = get_scheduler().run(
+        lambda: agents_client.create_and_process_run(thread_id=thread_id, assistant_id=agent_id, **run_options),
+        estimate_tokens(prompt_text),
+        priority,
+    )
+    reply = get_run_reply(agents_client, thread_id, run.id)
+    return run, reply
+
+
+# ✅ Async version for the azure.ai.projects.aio client, scheduled on the same shared budget
+async def run_and_fetch_reply_async(agents_client, thread_id, agent_id, prompt_text="", priority=PRIORITY_BATCH,
+                                    **run_options):
+    run = await get_scheduler().run_async(
+        lambda: agents_client.create_and_process_run(thread_id=thread_id, assistant_id=agent_id, **run_options),
+        estimate_tokens(prompt_text),
+        priority,
+    )
+    reply = await get_run_reply_async(agents_client, thread_id, run.id)
+    return run, reply
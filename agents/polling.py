@@ -0,0 +1,163 @@
+# Async, adaptive polling for uploads and vector-store ingestion.
+# Many pending files and batches are tracked at once: checks start quick and back off while
+# nothing changes, everything shares one deadline, and the whole wait can be cancelled.
+import asyncio
+import random
+import inspect
+from result_cache import hash_file
+
+INITIAL_DELAY_SECONDS = 0.1  # First check comes quickly, small files are often ready at once
+MAX_DELAY_SECONDS = 5.0  # Slowest check interval for long ingestions
+BACKOFF_FACTOR = 1.6  # Growth of the interval after every check that is still pending
+DEADLINE_SECONDS = 600  # Overall limit for one wait_all call
+MAX_CONCURRENT_UPLOADS = 8  # Uploads in flight at the same time
+
+FILE_DONE = {"processed"}
+FILE_FAILED = {"error", "deleting", "deleted"}
+VECTOR_STORE_DONE = {"completed"}
+VECTOR_STORE_FAILED = {"expired"}
+FILE_BATCH_DONE = {"completed"}
+FILE_BATCH_FAILED = {"cancelled", "failed"}
+
+
+async def call_client(func, *args, **kwargs):
+    # The sync SDK client runs on worker threads, an async client is awaited directly
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    result = await asyncio.to_thread(func, *args, **kwargs)
+    # A lambda around an async client method hands back a coroutine
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+# ✅ Call `check` until its status is done, waiting a little longer after every pending answer
+async def poll_until(check, done, failed=(), label="resource", cancel_event=None,
+                     initial_delay=INITIAL_DELAY_SECONDS, max_delay=MAX_DELAY_SECONDS, factor=BACKOFF_FACTOR):
+    delay = initial_delay
+    while True:
+        result = await call_client(check)
+        status = getattr(result, "status", None)
+        if status in done:
+            return result
+        if status in failed:
+            raise RuntimeError(f"{label} ended with status {status}")
+
+        # Jitter keeps many pollers from hitting the service in lockstep
+        wait_seconds = random.uniform(delay / 2, delay)
+        if cancel_event is None:
+            await asyncio.sleep(wait_seconds)
+        else:
+            try:
+                await asyncio.wait_for(cancel_event.wait(), timeout=wait_seconds)
+            except asyncio.TimeoutError:
+                pass
+            else:
+                raise asyncio.CancelledError(f"Polling {label} was cancelled")
+        delay = min(max_delay, delay * factor)
+
+
+# ✅ Run many waits together under one deadline; what is still pending at the deadline is cancelled
+async def wait_all(waits, deadline_seconds=DEADLINE_SECONDS):
+    tasks = {name: asyncio.ensure_future(wait) for name, wait in waits.items()}
+    if not tasks:
+        return {}
+    try:
+        _, pending = await asyncio.wait(tasks.values(), timeout=deadline_seconds)
+    finally:
+        # Also reached when the caller cancels us, so nothing keeps polling in the background
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    if pending:
+        timed_out = [name for name, task in tasks.items() if task in pending]
+        raise TimeoutError(f"Still pending after {deadline_seconds}s: {', '.join(map(str, timed_out))}")
+    if any(task.cancelled() for task in tasks.values()):
+        raise asyncio.CancelledError("Polling was cancelled")
+
+    errors = {name: task.exception() for name, task in tasks.items() if task.exception() is not None}
+    if errors:
+        raise RuntimeError("; ".join(f"{name}: {error}" for name, error in errors.items()))
+    return {name: task.result() for name, task in tasks.items()}
+
+
+async def _upload_one(agents_client, file_path, purpose, registry, semaphore, cancel_event):
+    file_hash = hash_file(file_path) if registry is not None else None
+    if registry is not None:
+        file_id = registry.lookup(file_hash)
+        if file_id is not None:
+            # Validate the remote file, it may have been deleted from the project
+            try:
+                remote_file = await call_client(agents_client.get_file, file_id)
+                if getattr(remote_file, "status", "processed") not in FILE_FAILED:
+                    return remote_file
+            except Exception:
+                pass
+            registry.forget(file_hash, file_id)
+
+    async with semaphore:
+        uploaded_file = await call_client(agents_client.upload_file, file_path=file_path, purpose=purpose)
+    ready_file = await poll_until(
+        lambda: agents_client.get_file(uploaded_file.id), FILE_DONE, FILE_FAILED,
+        label=f"upload of {file_path}", cancel_event=cancel_event,
+    )
+    if registry is not None:
+        registry.record(file_hash, uploaded_file.id, file_path)
+    return ready_file
+
+
+# ✅ Upload many files in parallel and wait until every one is processed, returning {path: file}
+async def upload_files(agents_client, file_paths, purpose, registry=None, deadline_seconds=DEADLINE_SECONDS,
+                       cancel_event=None, max_concurrency=MAX_CONCURRENT_UPLOADS):
+    semaphore = asyncio.Semaphore(max_concurrency)
+    return await wait_all(
+        {
+            file_path: _upload_one(agents_client, file_path, purpose, registry, semaphore, cancel_event)
+            for file_path in dict.fromkeys(file_paths)
+        },
+        deadline_seconds,
+    )
+
+
+# ✅ Create a vector store and wait for its initial files to be indexed
+async def create_vector_store(agents_client, name, file_ids, metadata=None, deadline_seconds=DEADLINE_SECONDS,
+                              cancel_event=None):
+    vector_store = await call_client(agents_client.create_vector_store, file_ids=file_ids, name=name, metadata=metadata)
+    results = await wait_all(
+        {
+            name: poll_until(
+                lambda: agents_client.get_vector_store(vector_store.id), VECTOR_STORE_DONE, VECTOR_STORE_FAILED,
+                label=f"vector store {name}", cancel_event=cancel_event,
+            )
+        },
+        deadline_seconds,
+    )
+    return results[name]
+
+
+# ✅ Add files to an existing vector store as one batch; the batch is cancelled if we give up on it
+async def index_files(agents_client, vector_store_id, file_ids, deadline_seconds=DEADLINE_SECONDS,
+                      cancel_event=None):
+    batch = await call_client(agents_client.create_vector_store_file_batch, vector_store_id=vector_store_id, file_ids=file_ids)
+    try:
+        results = await wait_all(
+            {
+                batch.id: poll_until(
+                    lambda: agents_client.get_vector_store_file_batch(vector_store_id=vector_store_id, batch_id=batch.id),
+                    FILE_BATCH_DONE, FILE_BATCH_FAILED, label=f"file batch {batch.id}", cancel_event=cancel_event,
+                )
+            },
+            deadline_seconds,
+        )
+    except (TimeoutError, asyncio.CancelledError):
+        await call_client(agents_client.cancel_vector_store_file_batch, vector_store_id=vector_store_id, batch_id=batch.id)
+        raise
+    return results[batch.id]
+
+
+# Blocking helper for sync callers: upload one file with adaptive instead of fixed-interval polling
+def upload_and_wait(agents_client, file_path, purpose, deadline_seconds=DEADLINE_SECONDS):
+    results = asyncio.run(upload_files(agents_client, [file_path], purpose, deadline_seconds=deadline_seconds))
+    return results[file_path]
@@ -0,0 +1,213 @@
+# Shared, long-lived AIProjectClient and credential for all agent entry points.
+# Building a client per call costs a token acquisition and a cold HTTPS connection,
+# so every script asks this module for its client instead.
+import time
+import atexit
+import asyncio
+import threading
+from azure.ai.projects import AIProjectClient
+from azure.ai.projects.aio import AIProjectClient as AsyncAIProjectClient
+from azure.identity import DefaultAzureCredential
+from azure.identity.aio import DefaultAzureCredential as AsyncDefaultAzureCredential
+from tracing import trace_project_client
+
+TOKEN_REFRESH_MARGIN_SECONDS = 300  # Refresh tokens this long before they expire
+
+
+# Token cache in front of any credential, refreshed before expiry instead of after
+class CachedTokenCredential:
+    def __init__(self, credential, refresh_margin_seconds=TOKEN_REFRESH_MARGIN_SECONDS):
+        self._credential = credential
+        self._refresh_margin_seconds = refresh_margin_seconds
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes, **kwargs):
+        # Claims challenges must always reach the real credential
+        if kwargs.get("claims"):
+            return self._credential.get_token(*scopes, **kwargs)
+
+        key = (scopes, kwargs.get("tenant_id"))
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is not None and token.expires_on - time.time() > self._refresh_margin_seconds:
+                return token
+
+            try:
+                token = self._credential.get_token(*scopes, **kwargs)
+            except Exception:
+                # Keep serving the old token while it is still valid, the next call retries the refresh
+                if token is not None and token.expires_on > time.time():
+                    return token
+                raise
+
+            self._tokens[key] = token
+            return token
+
+    def close(self):
+        close = getattr(self._credential, "close", None)
+        if close is not None:
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_details):
+        self.close()
+
+
+# The same cache for the azure.identity.aio credentials used by the async clients
+class AsyncCachedTokenCredential:
+    def __init__(self, credential, refresh_margin_seconds=TOKEN_REFRESH_MARGIN_SECONDS):
+        self._credential = credential
+        self._refresh_margin_seconds = refresh_margin_seconds
+        self._tokens = {}
+        self._lock = asyncio.Lock()
+
+    async def get_token(self, *scopes, **kwargs):
+        if kwargs.get("claims"):
+            return await self._credential.get_token(*scopes, **kwargs)
+
+        key = (scopes, kwargs.get("tenant_id"))
+        async with self._lock:
+            token = self._tokens.get(key)
+            if token is not None and token.expires_on - time.time() > self._refresh_margin_seconds:
+                return token
+
+            try:
+                token = await self._credential.get_token(*scopes, **kwargs)
+            except Exception:
+                if token is not None and token.expires_on > time.time():
+                    return token
+                raise
+
+            self._tokens[key] = token
+            return token
+
+    async def close(self):
+        close = getattr(self._credential, "close", None)
+        if close is not None:
+            await close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_details):
+        await self.close()
+
+
+def _default_client_factory(credential, conn_str):
+    return AIProjectClient.from_connection_string(credential=credential, conn_str=conn_str)
+
+
+# Lazily builds one client per connection string and hands the same instance to every caller
+class ProjectClientPool:
+    def __init__(self, client_factory=_default_client_factory, credential_factory=DefaultAzureCredential):
+        self._client_factory = client_factory
+        self._credential_factory = credential_factory
+        self._credential = None
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def get_credential(self):
+        with self._lock:
+            if self._credential is None:
+                self._credential = CachedTokenCredential(self._credential_factory())
+            return self._credential
+
+    def get_client(self, conn_str):
+        credential = self.get_credential()
+        with self._lock:
+            client = self._clients.get(conn_str)
+            if client is None:
+                client = trace_project_client(self._client_factory(credential, conn_str))
+                self._clients[conn_str] = client
+            return client
+
+    def close(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            credential = self._credential
+            self._clients = {}
+            self._credential = None
+
+        for client in clients:
+            client.close()
+        if credential is not None:
+            credential.close()
+
+
+def _default_async_client_factory(credential, conn_str):
+    return AsyncAIProjectClient.from_connection_string(credential=credential, conn_str=conn_str)
+
+
+# One async client per connection string for everything running on an event loop; the clients and their
+# connection pools belong to the loop they were created on, so close the pool before that loop ends
+class AsyncProjectClientPool:
+    def __init__(self, client_factory=_default_async_client_factory, credential_factory=AsyncDefaultAzureCredential):
+        self._client_factory = client_factory
+        self._credential_factory = credential_factory
+        self._credential = None
+        self._clients = {}
+
+    def get_credential(self):
+        if self._credential is None:
+            self._credential = AsyncCachedTokenCredential(self._credential_factory())
+        return self._credential
+
+    # Only touched from the event loop's thread, so no lock is needed
+    def get_client(self, conn_str):
+        credential = self.get_credential()
+        client = self._clients.get(conn_str)
+        if client is None:
+            client = trace_project_client(self._client_factory(credential, conn_str))
+            self._clients[conn_str] = client
+        return client
+
+    async def close(self):
+        clients, credential = list(self._clients.values()), self._credential
+        self._clients, self._credential = {}, None
+        for client in clients:
+            await client.close()
+        if credential is not None:
+            await credential.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_details):
+        await self.close()
+
+
+_default_pool = ProjectClientPool()
+atexit.register(lambda: _default_pool.close())
+
+
+def get_project_client(conn_str):
+    return _default_pool.get_client(conn_str)
+
+
+# Swap the process-wide pool, e.g. to point every entry point at a local stub
+def set_default_pool(pool):
+    global _default_pool
+    previous = _default_pool
+    _default_pool = pool
+    return previous
+
+
+_default_async_pool = AsyncProjectClientPool()
+
+
+def get_async_project_client(conn_str):
+    return _default_async_pool.get_client(conn_str)
+
+
+def get_async_pool():
+    return _default_async_pool
+
+
+def set_default_async_pool(pool):
+    global _default_async_pool
+    previous = _default_async_pool
+    _default_async_pool = pool
+    return previous
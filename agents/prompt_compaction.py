@@ -0,0 +1,235 @@
+# Shrinks free-form ticket text (ADO HTML with pasted logs and screenshots) before it goes into a prompt:
+# HTML becomes plain text, repeated log lines and long stack traces are collapsed, and what is still over
+# the token budget is trimmed from the least important sections first.
+import os
+import re
+from html.parser import HTMLParser
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1500"))  # Tokens left for the work item text
+STACK_FRAMES_KEPT = 3  # Frames kept from the top of a stack trace, the innermost one is kept as well
+
+# Local stand-in for the model's tokenizer: short words, numbers and single symbols each count as a token,
+# which lands within about 10% of the real count for English prose, code and logs
+TOKEN_PATTERN = re.compile(r"[A-Za-z]{1,8}|\d{1,3}|[^\sA-Za-z\d]|\n")
+
+HTML_PATTERN = re.compile(r"</?(?:p|div|br|span|li|ul|ol|table|tr|td|img|h[1-6]|pre|code|b|i|strong|em|a)\b", re.IGNORECASE)
+BLOCK_TAGS = {"div", "li", "tr", "pre", "blockquote"}
+PARAGRAPH_TAGS = {"p", "ul", "ol", "table", "h1", "h2", "h3", "h4", "h5", "h6"}  # Followed by a blank line
+SKIPPED_TAGS = {"script", "style", "head"}
+PREFORMATTED_TAGS = {"pre", "code"}  # Pasted logs and code, their line breaks and indentation are content
+STACK_FRAME_PATTERN = re.compile(
+    r"^\s*(?:at [\w$.<>/`\[\], ]+\(.*\)|at .+ in .+:line \d+|File \".*\", line \d+.*|\.\.\. \d+ more)\s*$"
+)
+LOG_LINE_PATTERN = re.compile(r"^\s*\[?\d{2,4}[-/:]\d{2}[-/:]\d{2}|\b(?:TRACE|DEBUG|INFO|WARN(?:ING)?|ERROR|FATAL)\b")
+
+# Sections a heading belongs to, most important first; anything else is regular description text
+PRIORITY_PINNED = 0  # The task title, never trimmed
+SECTION_PRIORITIES = [
+    (1, re.compile(r"acceptance criteria|requirements?|expected (?:result|behaviou?r)|definition of done", re.IGNORECASE)),
+    (2, re.compile(r"steps to reproduce|repro|scenario|example", re.IGNORECASE)),
+    (4, re.compile(r"logs?\b|stack ?trace|output|error details|attachments?|screenshots?", re.IGNORECASE)),
+]
+PRIORITY_DEFAULT = 3
+PRIORITY_LOGS = 4
+
+TRIMMED_MARKER = "[... trimmed]"
+TRIMMED_NOTE = "({trimmed} section{s} trimmed to fit the prompt budget)"
+
+
+def count_tokens(text):
+    return len(TOKEN_PATTERN.findall(text or ""))
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skipping = 0
+        self._preformatted = 0
+        self._block_start = False
+
+    # Block elements start a new line, but only <br> and paragraph ends make blank ones
+    def _line_break(self):
+        if self.parts and not self.parts[-1].endswith("\n"):
+            self.parts.append("\n")
+
+    def handle_starttag(self, tag, attrs):
+        if tag in PREFORMATTED_TAGS:
+            self._preformatted += 1
+            # A line break right after <pre> (or <pre><code>) is not part of its text
+            self._block_start = self._block_start or tag == "pre"
+        if tag in SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag == "img":
+            # Pasted screenshots are inline base64, only their alt text is worth any tokens
+            alt = dict(attrs).get("alt")
+            self.parts.append(f"[image: {alt}]" if alt else "[image]")
+        elif tag == "br":
+            self.parts.append("\n")
+        elif tag == "li":
+            self._line_break()
+            self.parts.append("- ")
+        elif tag in BLOCK_TAGS:
+            self._line_break()
+
+    def handle_endtag(self, tag):
+        if tag in PREFORMATTED_TAGS:
+            self._preformatted = max(0, self._preformatted - 1)
+        if tag in SKIPPED_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in PARAGRAPH_TAGS:
+            self._line_break()
+            self.parts.append("\n")
+        elif tag in BLOCK_TAGS:
+            self._line_break()
+
+    def handle_data(self, data):
+        if self._skipping:
+            return
+        if self._block_start:
+            self._block_start = False
+            data = data[1:] if data.startswith("\n") else data
+        if not self._preformatted:
+            # Line breaks and runs of spaces in the markup are layout, not content
+            data = re.sub(r"\s+", " ", data)
+            if not self.parts or self.parts[-1].endswith(("\n", " ")):
+                data = data.lstrip()
+        if data:
+            self.parts.append(data)
+
+
+def html_to_text(text):
+    if not HTML_PATTERN.search(text):
+        return text
+    extractor = _TextExtractor()
+    extractor.feed(text)
+    extractor.close()
+    return "\n".join(line.rstrip() for line in "".join(extractor.parts).splitlines())
+
+
+# Consecutive identical lines are kept once, log lines even when only their numbers (timestamps, IDs) differ
+def _repeat_key(line):
+    if line is None:
+        return None
+    return re.sub(r"\d+", "0", line.strip()) if LOG_LINE_PATTERN.search(line) else line.strip()
+
+
+def collapse_repeated_lines(lines):
+    collapsed = []
+    previous, repeats = None, 0
+    for line in lines + [None]:
+        key = _repeat_key(line)
+        if key and key == previous:
+            repeats += 1
+            continue
+        if repeats:
+            collapsed.append(f"(same line repeated {repeats} more time{'s' if repeats > 1 else ''})")
+        if line is not None and (line.strip() or (collapsed and collapsed[-1].strip())):
+            collapsed.append(line)
+        previous, repeats = key, 0
+    return collapsed
+
+
+# Keep the top of every stack trace and its innermost frame, the frames in between rarely matter
+def collapse_stack_traces(lines):
+    collapsed, frames = [], []
+
+    def flush():
+        if len(frames) > STACK_FRAMES_KEPT + 1:
+            collapsed.extend(frames[:STACK_FRAMES_KEPT])
+            collapsed.append(f"    ... {len(frames) - STACK_FRAMES_KEPT - 1} more frames")
+            collapsed.append(frames[-1])
+        else:
+            collapsed.extend(frames)
+        frames.clear()
+
+    for line in lines:
+        if STACK_FRAME_PATTERN.match(line):
+            frames.append(line)
+        elif frames and frames[-1].lstrip().startswith("File ") and "\n" not in frames[-1] and line.startswith("    "):
+            # A Python frame is followed by the indented source line it points at
+            frames[-1] += "\n" + line
+        else:
+            flush()
+            collapsed.append(line)
+    flush()
+    return collapsed
+
+
+# Split into blank-line separated sections, each with the priority of the heading it falls under
+def split_sections(text):
+    sections, current, priority = [], [], PRIORITY_DEFAULT
+    for line in text.split("\n") + [""]:
+        if line.strip():
+            current.append(line)
+            continue
+        if current:
+            heading = current[0].strip().rstrip(":")
+            if len(heading) <= 60:
+                for section_priority, pattern in SECTION_PRIORITIES:
+                    if pattern.search(heading):
+                        priority = section_priority
+                        break
+            section_priority = priority
+            if sum(1 for line in current if LOG_LINE_PATTERN.search(line) or STACK_FRAME_PATTERN.match(line)) * 2 > len(current):
+                section_priority = max(priority, PRIORITY_LOGS)
+            sections.append({"lines": current, "priority": section_priority})
+            current = []
+    return sections
+
+
+def _join(sections):
+    return "\n\n".join("\n".join(section["lines"]) for section in sections if section["lines"])
+
+
+# Drop or cut the least important sections, latest first, until the text fits
+def trim_to_budget(sections, budget):
+    trimmed = 0
+    budget -= count_tokens(TRIMMED_NOTE.format(trimmed=10, s="s"))
+    candidates = sorted(
+        (index for index, section in enumerate(sections) if section["priority"] != PRIORITY_PINNED),
+        key=lambda index: (-sections[index]["priority"], -index),
+    )
+    for index in candidates:
+        excess = count_tokens(_join(sections)) - budget
+        if excess <= 0:
+            break
+        section = sections[index]
+        section_tokens = count_tokens("\n".join(section["lines"]))
+        trimmed += 1
+        if section_tokens - excess < 40:
+            section["lines"] = []
+            continue
+        # Worth keeping the start of it: cut lines from the end, then the last line itself if needed
+        target = section_tokens - excess - count_tokens("\n" + TRIMMED_MARKER)
+        while section["lines"] and count_tokens("\n".join(section["lines"])) > target:
+            line = section["lines"].pop()
+            keep = target - count_tokens("\n".join(section["lines"])) - 1
+            if keep > 10:
+                ends = [match.end() for match in TOKEN_PATTERN.finditer(line)]
+                section["lines"].append(line[:ends[keep - 1]] if len(ends) > keep else line)
+                break
+        section["lines"].append(TRIMMED_MARKER)
+
+    if trimmed:
+        sections.append({"lines": [TRIMMED_NOTE.format(trimmed=trimmed, s="s" if trimmed > 1 else "")],
+                         "priority": PRIORITY_PINNED})
+    return trimmed
+
+
+# ✅ Compact ticket text for a prompt and report its size before and after
+# The first `pinned_lines` lines (the task title) are kept as they are and never trimmed
+def compact_prompt(text, budget=PROMPT_TOKEN_BUDGET, pinned_lines=1):
+    tokens_before = count_tokens(text)
+    lines = text.replace("\r\n", "\n").split("\n")
+    pinned, lines = lines[:pinned_lines], html_to_text("\n".join(lines[pinned_lines:])).split("\n")
+    lines = collapse_repeated_lines(collapse_stack_traces(lines))
+    sections = [{"lines": pinned, "priority": PRIORITY_PINNED}] + split_sections("\n".join(lines))
+    trimmed = trim_to_budget(sections, budget) if budget else 0
+    compacted = "\n".join(pinned + [_join(sections[1:])]).rstrip("\n")
+    return {
+        "text": compacted,
+        "tokens_before": tokens_before,
+        "tokens_after": count_tokens(compacted),
+        "trimmed_sections": trimmed,
+    }
@@ -0,0 +1,247 @@
+# Idempotent agent provisioning: find the agent and vector store by name, compare the standards and
+# instructions files by hash, and only upload, re-index or update what actually changed.
+import os
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from azure.ai.projects.models import FilePurpose, FileSearchTool
+from result_cache import hash_file, hash_text
+from polling import DEADLINE_SECONDS, call_client, upload_files, create_vector_store, index_files
+
+STATE_PATH = ".agent_cache/provisioning.json"  # Last provisioned agent / vector store IDs per agent name
+LIST_PAGE_SIZE = 100  # Agents or vector stores per list request when searching by name
+
+# Metadata stored on the remote resources, so any machine can tell what they were built from
+STANDARDS_HASH_KEY = "standards_sha256"
+INSTRUCTIONS_HASH_KEY = "instructions_sha256"
+VECTOR_STORE_KEY = "vector_store_id"
+
+_state_lock = threading.Lock()
+
+
+def _load_state(state_path):
+    if not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # The state is only a shortcut, the remote metadata is the source of truth
+        return {}
+
+
+def _save_state(state_path, name, entry):
+    with _state_lock:
+        state = _load_state(state_path)
+        state[name] = entry
+        os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+        temp_path = f"{state_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=4)
+        os.replace(temp_path, state_path)
+
+
+async def _get_or_none(getter, resource_id):
+    if not resource_id:
+        return None
+    try:
+        return await call_client(getter, resource_id)
+    except Exception:
+        # Deleted from the project since we last saw it
+        return None
+
+
+def _metadata(resource):
+    return dict(getattr(resource, "metadata", None) or {})
+
+
+def _is_current(resource, metadata):
+    current = _metadata(resource)
+    return all(current.get(key) == value for key, value in metadata.items())
+
+
+# Every resource with this name, newest first
+async def _find_by_name(list_method, name):
+    return [item for item in await _list_all(list_method, order="desc") if item["name"] == name]
+
+
+async def _list_all(list_method, **kwargs):
+    items = []
+    request = dict(kwargs, limit=LIST_PAGE_SIZE)
+    while True:
+        page = await call_client(list_method, **request)
+        items.extend(page["data"])
+        if not page.get("has_more") or not page["data"]:
+            return items
+        request["after"] = page["data"][-1]["id"]
+
+
+# The standards file plus any extra corpus files (style guides, examples) go into the same store
+def _corpus_paths(spec):
+    return [spec["standards_file_path"]] + list(spec.get("corpus_file_paths", []))
+
+
+def _corpus_hash(file_paths):
+    return hash_text("\n".join(f"{os.path.basename(file_path)}:{hash_file(file_path)}" for file_path in file_paths))
+
+
+# ✅ Make the vector store hold exactly the current corpus, uploading and re-indexing only what changed
+async def _sync_vector_store(agents_client, spec, corpus_hash, vector_store, registry, deadline_seconds):
+    file_paths = _corpus_paths(spec)
+    # All files upload in parallel; unchanged ones are found in the registry and not sent again
+    uploaded_files = await upload_files(agents_client, file_paths, FilePurpose.AGENTS, registry, deadline_seconds)
+    file_ids = [uploaded_files[file_path].id for file_path in file_paths]
+    metadata = {STANDARDS_HASH_KEY: corpus_hash}
+
+    if vector_store is None:
+        vector_store = await create_vector_store(
+            agents_client, spec["vector_store_name"], file_ids, metadata, deadline_seconds
+        )
+        print(f"🆕 Created vector store {spec['vector_store_name']} with {len(file_ids)} file(s), ID: {vector_store.id}")
+        return vector_store, "created"
+
+    # Index the new files first, then drop the old ones, so searches never hit an empty store
+    indexed_ids = {
+        vector_store_file["id"]
+        for vector_store_file in await _list_all(agents_client.list_vector_store_files, vector_store_id=vector_store.id)
+    }
+    new_ids = [file_id for file_id in file_ids if file_id not in indexed_ids]
+    if new_ids:
+        await index_files(agents_client, vector_store.id, new_ids, deadline_seconds)
+
+    for file_id in indexed_ids.difference(file_ids):
+        await call_client(agents_client.delete_vector_store_file, vector_store_id=vector_store.id, file_id=file_id)
+        try:
+            await call_client(agents_client.delete_file, file_id)
+        except Exception:
+            # Still used elsewhere or already gone, either way it is out of this store
+            pass
+    vector_store = await call_client(agents_client.modify_vector_store, vector_store.id, metadata=metadata)
+    print(f"🔄 Re-indexed {len(new_ids)} of {len(file_ids)} file(s) in vector store {spec['vector_store_name']}, "
+          f"ID: {vector_store.id}")
+    return vector_store, "updated"
+
+
+async def _provision_vector_store(agents_client, spec, corpus_hash, vector_store, registry, deadline_seconds):
+    if vector_store is not None and _is_current(vector_store, {STANDARDS_HASH_KEY: corpus_hash}):
+        return vector_store, "unchanged"
+    return await _sync_vector_store(agents_client, spec, corpus_hash, vector_store, registry, deadline_seconds)
+
+
+# ✅ Create or update one agent and its vector store, doing nothing when both are current.
+# Takes the sync client (calls run on worker threads) or the azure.ai.projects.aio one.
+async def provision_agent_async(agents_client, spec, registry, state_path=STATE_PATH, prune=False,
+                                deadline_seconds=DEADLINE_SECONDS):
+    started = time.perf_counter()
+    standards_hash = _corpus_hash(_corpus_paths(spec))
+    instructions_hash = hash_file(spec["instructions_file_path"])
+    known = _load_state(state_path).get(spec["name"], {})
+
+    # The locally remembered IDs save a listing, as long as they still exist (pruning always lists)
+    agent = await _get_or_none(agents_client.get_agent, known.get("agent_id"))
+    duplicate_agent_ids = []
+    if agent is None or prune:
+        matches = await _find_by_name(agents_client.list_agents, spec["name"])
+        if agent is None and matches:
+            agent = await call_client(agents_client.get_agent, matches[0]["id"])
+        duplicate_agent_ids = [match["id"] for match in matches if agent is None or match["id"] != agent.id]
+
+    vector_store_id = _metadata(agent).get(VECTOR_STORE_KEY) or known.get("vector_store_id")
+    vector_store = await _get_or_none(agents_client.get_vector_store, vector_store_id)
+    duplicate_vector_store_ids = []
+    if vector_store is None or prune:
+        matches = await _find_by_name(agents_client.list_vector_stores, spec["vector_store_name"])
+        if vector_store is None and matches:
+            vector_store = await call_client(agents_client.get_vector_store, matches[0]["id"])
+        duplicate_vector_store_ids = [
+            match["id"] for match in matches if vector_store is None or match["id"] != vector_store.id
+        ]
+
+    vector_store, vector_store_action = await _provision_vector_store(
+        agents_client, spec, standards_hash, vector_store, registry, deadline_seconds
+    )
+
+    metadata = {
+        STANDARDS_HASH_KEY: standards_hash,
+        INSTRUCTIONS_HASH_KEY: instructions_hash,
+        VECTOR_STORE_KEY: vector_store.id,
+    }
+    if agent is not None and _is_current(agent, metadata) and agent.model == spec["model"]:
+        agent_action = "unchanged"
+    else:
+        with open(spec["instructions_file_path"], "r", encoding="utf-8") as f:
+            instructions = f.read()
+        file_search_tool = FileSearchTool(vector_store_ids=[vector_store.id])
+        agent_settings = {
+            "model": spec["model"],
+            "name": spec["name"],
+            "instructions": instructions,
+            "tools": file_search_tool.definitions,
+            "tool_resources": file_search_tool.resources,
+            "metadata": metadata,
+        }
+        if agent is None:
+            agent = await call_client(agents_client.create_agent, **agent_settings)
+            agent_action = "created"
+        else:
+            agent = await call_client(agents_client.update_agent, agent.id, **agent_settings)
+            agent_action = "updated"
+        print(f"{'🆕' if agent_action == 'created' else '🔄'} {agent_action.capitalize()} agent {spec['name']}, ID: {agent.id}")
+
+    # Earlier non-idempotent runs left copies behind, they are only deleted on request
+    duplicates = len(duplicate_agent_ids) + len(duplicate_vector_store_ids)
+    if duplicates and prune:
+        for agent_id in duplicate_agent_ids:
+            await call_client(agents_client.delete_agent, agent_id)
+        for duplicate_vector_store_id in duplicate_vector_store_ids:
+            await call_client(agents_client.delete_vector_store, duplicate_vector_store_id)
+        print(f"🧹 Deleted {duplicates} duplicate resource(s) of {spec['name']}")
+    elif duplicates:
+        print(f"⚠️ {duplicates} older copies of {spec['name']} resources exist, run with --prune to delete them")
+
+    _save_state(state_path, spec["name"], {
+        "agent_id": agent.id,
+        "vector_store_id": vector_store.id,
+        STANDARDS_HASH_KEY: standards_hash,
+        INSTRUCTIONS_HASH_KEY: instructions_hash,
+    })
+
+    return {
+        "name": spec["name"],
+        "agent_id": agent.id,
+        "vector_store_id": vector_store.id,
+        "agent": agent_action,
+        "vector_store": vector_store_action,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def provision_agent(agents_client, spec, registry, state_path=STATE_PATH, prune=False,
+                    deadline_seconds=DEADLINE_SECONDS):
+    return asyncio.run(provision_agent_async(agents_client, spec, registry, state_path, prune, deadline_seconds))
+
+
+# ✅ The agent and vector store IDs last provisioned under an agent name, or None
+def provisioned_ids(name, state_path=STATE_PATH):
+    return _load_state(state_path).get(name)
+
+
+# ✅ Provision several agents concurrently on the shared client
+def provision_agents(agents_client, specs, registry, state_path=STATE_PATH, prune=False,
+                     deadline_seconds=DEADLINE_SECONDS):
+    with ThreadPoolExecutor(max_workers=len(specs) or 1) as executor:
+        futures = [
+            executor.submit(provision_agent, agents_client, spec, registry, state_path, prune, deadline_seconds)
+            for spec in specs
+        ]
+        return [future.result() for future in futures]
+
+
+# ✅ The same from an event loop, with the agents provisioned as concurrent coroutines
+async def provision_agents_async(agents_client, specs, registry, state_path=STATE_PATH, prune=False,
+                                 deadline_seconds=DEADLINE_SECONDS):
+    return list(await asyncio.gather(
+        *(provision_agent_async(agents_client, spec, registry, state_path, prune, deadline_seconds) for spec in specs)
+    ))
@@ -0,0 +1,127 @@
+# Content-addressed cache for agent results, so unchanged inputs skip the model round trip
+import os
+import json
+import time
+import hashlib
+import threading
+
+CACHE_DIR = ".agent_cache/results"  # Where cached results are stored
+MAX_CACHE_BYTES = 200 * 1024 * 1024  # Evict least recently used entries above this size
+MAX_CACHE_AGE_SECONDS = 30 * 24 * 60 * 60  # Evict entries older than this
+EVICT_EVERY_PUTS = 100  # Sweep the cache folder after this many writes
+
+
+def hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Build the cache key from everything that can change the agent's answer
+def make_cache_key(content, agent_id, instructions_text, standards_hash, prompt_template, scope=None):
+    parts = {
+        "content": hash_text(content),
+        "agent_id": agent_id or "",
+        "instructions": hash_text(instructions_text or ""),
+        "standards": standards_hash or "",
+        "prompt_template": hash_text(prompt_template),
+    }
+    # Results limited to part of the content (e.g. the lines a diff changed) are keyed on that part too
+    if scope is not None:
+        parts["scope"] = scope
+    return hash_text(json.dumps(parts, sort_keys=True))
+
+
+class ResultCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, max_age_seconds=MAX_CACHE_AGE_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._puts_since_evict = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        # Fan out into sub-folders so a large cache doesn't end up in one directory
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age_seconds:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            # Touch the entry so eviction keeps recently used results
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial entry
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(temp_path, path)
+
+        # Walking the folder is not free, so only sweep every few writes
+        with self._lock:
+            self._puts_since_evict += 1
+            should_evict = self._puts_since_evict >= EVICT_EVERY_PUTS
+            if should_evict:
+                self._puts_since_evict = 0
+        if should_evict:
+            self.evict()
+
+    def evict(self):
+        entries = []
+        now = time.time()
+
+        with self._lock:
+            for folder, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith(".txt"):
+                        continue
+                    path = os.path.join(folder, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    if now - stat.st_mtime > self.max_age_seconds:
+                        os.remove(path)
+                    else:
+                        entries.append((stat.st_mtime, stat.st_size, path))
+
+            # Drop the least recently used entries until the cache fits
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                os.remove(path)
+                total_bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
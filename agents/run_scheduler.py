@@ -0,0 +1,256 @@
+# Shared, rate-limit-aware scheduling of agent runs for the model deployment.
+# Every run waits for request and token budget, interactive work goes ahead of batch work,
+# and a 429 pauses all callers for the Retry-After time instead of turning into an error storm.
+import os
+import re
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from tracing import span
+
+# The deployment quota, or this process's share of it when several scripts run at the same time
+REQUESTS_PER_MINUTE = int(os.getenv("MODEL_REQUESTS_PER_MINUTE", "60"))
+TOKENS_PER_MINUTE = int(os.getenv("MODEL_TOKENS_PER_MINUTE", "60000"))
+BURST_SECONDS = 1  # The service checks the quota over short windows, so bursts are kept to about a second's share
+CHARS_PER_TOKEN = 4  # Rough prompt size estimate, corrected with the real usage after every run
+ESTIMATED_COMPLETION_TOKENS = 1000  # Reply and instructions tokens budgeted on top of the prompt
+MAX_RATE_LIMIT_RETRIES = 5  # 429s retried before the error reaches the caller
+DEFAULT_RETRY_AFTER_SECONDS = 10  # Wait when a 429 doesn't say how long
+ASYNC_CHECK_SECONDS = 0.05  # How often a waiting coroutine checks whether it is its turn
+
+PRIORITY_INTERACTIVE = 0  # Chat sessions, someone is waiting for the answer
+PRIORITY_BATCH = 10  # Refactors, chunked units and work items
+
+RATE_LIMIT_ERROR_CODE = "rate_limit_exceeded"
+RETRY_IN_PATTERN = re.compile(r"try again in (\d+(?:\.\d+)?) seconds?", re.IGNORECASE)
+
+
+def estimate_tokens(prompt_text):
+    return len(prompt_text or "") // CHARS_PER_TOKEN + ESTIMATED_COMPLETION_TOKENS
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst_seconds=BURST_SECONDS):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Seconds until `amount` fits; a request larger than the bucket goes as soon as the bucket is full
+    def wait_time(self, amount, now):
+        self._refill(now)
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def consume(self, amount, now):
+        self._refill(now)
+        self.level -= amount
+
+    # Correct an estimate afterwards; going negative makes the next callers wait it off
+    def adjust(self, delta):
+        self.level = min(self.capacity, self.level - delta)
+
+    # Nothing is left for `seconds`, after that the bucket refills at the steady rate instead of in a burst
+    def drain(self, seconds, now):
+        self.level = min(self.level, -self.rate * seconds)
+        self.updated = now
+
+
+def _field(value, name):
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+# Seconds to wait from a 429 HttpResponseError, or None for any other error
+def rate_limit_retry_after(error):
+    if getattr(error, "status_code", None) != 429:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for header, scale in (("retry-after-ms", 1000.0), ("Retry-After", 1.0), ("retry-after", 1.0)):
+        try:
+            return float(headers[header]) / scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return DEFAULT_RETRY_AFTER_SECONDS
+
+
+# A run can also be accepted and then fail on the rate limit, with the wait only in the error message
+def _run_retry_after(run):
+    if _field(run, "status") != "failed":
+        return None
+    last_error = _field(run, "last_error")
+    if _field(last_error, "code") != RATE_LIMIT_ERROR_CODE:
+        return None
+    match = RETRY_IN_PATTERN.search(_field(last_error, "message") or "")
+    return float(match.group(1)) if match else DEFAULT_RETRY_AFTER_SECONDS
+
+
+class RunScheduler:
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE,
+                 max_retries=MAX_RATE_LIMIT_RETRIES):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.stats = {"runs": 0, "rate_limited": 0, "waited_seconds": 0.0}
+        self._condition = threading.Condition()
+        self._queue = []  # (priority, sequence) of the callers waiting for budget
+        self._sequence = itertools.count()
+
+    # ✅ Block until this caller is first in line and both budgets have room, then take its share
+    def acquire(self, estimated_tokens, priority=PRIORITY_BATCH):
+        entry = (priority, next(self._sequence))
+        started = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._queue, entry)
+            self._condition.notify_all()
+            try:
+                while True:
+                    now = time.monotonic()
+                    timeout = None
+                    if self._queue[0] == entry:
+                        timeout = max(self.requests.wait_time(1, now), self.tokens.wait_time(estimated_tokens, now))
+                        if timeout <= 0:
+                            break
+                    # Woken early when someone with a higher priority arrives or budget is handed back
+                    self._condition.wait(timeout)
+                self.requests.consume(1, now)
+                self.tokens.consume(estimated_tokens, now)
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+            self.stats["waited_seconds"] += time.monotonic() - started
+
+    # ✅ The same wait for coroutines: the event loop keeps running, threads and coroutines share one queue
+    async def acquire_async(self, estimated_tokens, priority=PRIORITY_BATCH):
+        entry = (priority, next(self._sequence))
+        started = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._queue, entry)
+            self._condition.notify_all()
+        try:
+            while True:
+                with self._condition:
+                    now = time.monotonic()
+                    timeout = ASYNC_CHECK_SECONDS
+                    if self._queue[0] == entry:
+                        timeout = max(self.requests.wait_time(1, now), self.tokens.wait_time(estimated_tokens, now))
+                        if timeout <= 0:
+                            self.requests.consume(1, now)
+                            self.tokens.consume(estimated_tokens, now)
+                            break
+                # A condition can't wake a coroutine, so check again after a short sleep
+                await asyncio.sleep(min(timeout, ASYNC_CHECK_SECONDS))
+        finally:
+            with self._condition:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._condition.notify_all()
+        with self._condition:
+            self.stats["waited_seconds"] += time.monotonic() - started
+
+    # Hold every caller back after a 429, the whole deployment is over its quota
+    def pause(self, seconds):
+        with self._condition:
+            now = time.monotonic()
+            self.requests.drain(seconds, now)
+            self.tokens.drain(seconds, now)
+            self.stats["rate_limited"] += 1
+            self._condition.notify_all()
+
+    def report_usage(self, estimated_tokens, actual_tokens):
+        with self._condition:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+            self._condition.notify_all()
+
+    # ✅ Call `func` (one model request) within the budget, retrying it after 429s
+    def run(self, func, estimated_tokens, priority=PRIORITY_BATCH):
+        with span("model.run", estimated_tokens=estimated_tokens, priority=priority) as run_span:
+            attempt, queued = 0, 0.0
+            while True:
+                started = time.perf_counter()
+                self.acquire(estimated_tokens, priority)
+                queued += time.perf_counter() - started
+                run_span.set(queued_seconds=round(queued, 3), retries=attempt)
+                try:
+                    result = func()
+                except Exception as e:
+                    retry_after = rate_limit_retry_after(e)
+                    if retry_after is None or attempt >= self.max_retries:
+                        raise
+                else:
+                    retry_after = _run_retry_after(result)
+                    if retry_after is None or attempt >= self.max_retries:
+                        break
+                attempt += 1
+                self.pause(retry_after)
+                print(f"⏳ Rate limited, retrying in {retry_after:g}s (attempt {attempt} of {self.max_retries})")
+            run_span.set(total_tokens=_field(_field(result, "usage"), "total_tokens"))
+
+        total_tokens = _field(_field(result, "usage"), "total_tokens")
+        if total_tokens:
+            self.report_usage(estimated_tokens, total_tokens)
+        with self._condition:
+            self.stats["runs"] += 1
+        return result
+
+    # ✅ Await `func()` (one model request on the async client) within the budget, retrying it after 429s
+    async def run_async(self, func, estimated_tokens, priority=PRIORITY_BATCH):
+        with span("model.run", estimated_tokens=estimated_tokens, priority=priority) as run_span:
+            attempt, queued = 0, 0.0
+            while True:
+                started = time.perf_counter()
+                await self.acquire_async(estimated_tokens, priority)
+                queued += time.perf_counter() - started
+                run_span.set(queued_seconds=round(queued, 3), retries=attempt)
+                try:
+                    result = await func()
+                except Exception as e:
+                    retry_after = rate_limit_retry_after(e)
+                    if retry_after is None or attempt >= self.max_retries:
+                        raise
+                else:
+                    retry_after = _run_retry_after(result)
+                    if retry_after is None or attempt >= self.max_retries:
+                        break
+                attempt += 1
+                self.pause(retry_after)
+                print(f"⏳ Rate limited, retrying in {retry_after:g}s (attempt {attempt} of {self.max_retries})")
+            run_span.set(total_tokens=_field(_field(result, "usage"), "total_tokens"))
+
+        total_tokens = _field(_field(result, "usage"), "total_tokens")
+        if total_tokens:
+            self.report_usage(estimated_tokens, total_tokens)
+        with self._condition:
+            self.stats["runs"] += 1
+        return result
+
+
+# One scheduler per process, shared by every entry point
+_default_scheduler = RunScheduler()
+
+
+def get_scheduler():
+    return _default_scheduler
+
+
+# One line for batch entry points to print next to their worker count: with the default quota (60 requests a
+# minute) runs start about once a second however many workers there are
+def describe_quota(scheduler=None):
+    scheduler = scheduler or get_scheduler()
+    return (f"⏱️ Runs start within the model quota of {scheduler.requests.rate * 60:.0f} requests/min and "
+            f"{scheduler.tokens.rate * 60:.0f} tokens/min (MODEL_REQUESTS_PER_MINUTE, MODEL_TOKENS_PER_MINUTE)")
+
+
+# Swap the process-wide scheduler, e.g. to give a benchmark its own budget
+def set_default_scheduler(scheduler):
+    global _default_scheduler
+    previous = _default_scheduler
+    _default_scheduler = scheduler
+    return previous
@@ -0,0 +1,55 @@
+# Provision the Python and Java coding agents together, in parallel.
+# Unchanged agents and vector stores are left alone, so a no-op redeploy only costs a few lookups.
+import argparse
+from project_client_pool import get_project_client
+from upload_registry import UploadRegistry
+from provisioning import provision_agents
+from tracing import traced
+
+# Replace these with your actual values
+PROJECT_CONNECTION_STRING = ""
+# Standards files stay referenced by vector stores, so they never expire from the registry
+UPLOAD_REGISTRY = UploadRegistry(".agent_cache/standards_uploads.json", max_age_seconds=None)
+
+AGENT_SPECS = [
+    {
+        "name": "python-coding-agent",
+        "model": "",  # Replace with your model deployment name
+        "instructions_file_path": "agents/python/agent-instructions.text",
+        "standards_file_path": "instructions/py-standard-instructions.py",
+        "corpus_file_paths": [],  # Extra style guides or examples to index next to the standards
+        "vector_store_name": "Python-Coding-Standards-Vector-Store",
+    },
+    {
+        "name": "java-coding-agent",
+        "model": "gpt-4o-mini-coding-agent",
+        "instructions_file_path": "agents/java/agent-instructions.text",
+        "standards_file_path": "instructions/java-standard-instructions.java",
+        "corpus_file_paths": [],
+        "vector_store_name": "Java-Coding-Standards-Vector-Store",
+    },
+]
+
+
+@traced("setup_agents")
+def setup_agents(languages=None, prune=False, project_client=None):
+    specs = [spec for spec in AGENT_SPECS if not languages or spec["name"].split("-")[0] in languages]
+    if project_client is None:
+        project_client = get_project_client(PROJECT_CONNECTION_STRING)
+
+    results = provision_agents(project_client.agents, specs, UPLOAD_REGISTRY, prune=prune)
+
+    print("\n📦 Provisioning summary:")
+    for result in results:
+        print(f"   {result['name']:<20} agent {result['agent']:<9} vector store {result['vector_store']:<9} "
+              f"{result['seconds']}s")
+        print(f"   {'':<20} Agent ID: {result['agent_id']}, Vector Store ID: {result['vector_store_id']}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or update all coding agents and their vector stores.")
+    parser.add_argument("--languages", nargs="+", choices=["python", "java"], help="Only provision these agents")
+    parser.add_argument("--prune", action="store_true", help="Delete older agents and vector stores with the same name")
+    args = parser.parse_args()
+    setup_agents(args.languages, args.prune)
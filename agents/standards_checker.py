@@ -0,0 +1,255 @@
+# Fast local check of the deterministic rules in instructions/py-standard-instructions.py.
+# Compliant files skip the agent entirely; for the rest the violations are attached to the prompt.
+# COMMENT_STYLE, COMPREHENSIONS and the testing rules are judgement calls left to the agent.
+import os
+import re
+import ast
+import sys
+from collections import namedtuple
+
+MAX_LINE_LENGTH = 79
+MAX_FUNCTION_LINES = 50  # FUNCTION_LENGTH
+TOP_LEVEL_BLANK_LINES = 2  # BLANK_LINES between top-level definitions
+METHOD_BLANK_LINES = 1  # BLANK_LINES between methods
+MAX_REPORTED_VIOLATIONS = 30  # Keep the list attached to the prompt compact
+
+PASCAL_CASE = re.compile(r"^_*[A-Z][a-zA-Z0-9]*$")
+SNAKE_CASE = re.compile(r"^_*[a-z][a-z0-9_]*$")
+UPPER_CASE = re.compile(r"^_*[A-Z][A-Z0-9_]*$")
+DUNDER = re.compile(r"^__\w+__$")
+
+# Rule names match the constants in the standards file, so the agent can look them up
+Violation = namedtuple("Violation", ["line", "rule", "message"])
+
+
+def _check_variable(node, name, in_function, violations):
+    if SNAKE_CASE.match(name) or DUNDER.match(name):
+        return
+    # Module-level names may be constants
+    if not in_function and UPPER_CASE.match(name):
+        return
+    violations.append(Violation(node.lineno, "VARIABLE_NAMES", f"variable '{name}' should be snake_case"))
+
+
+def _is_public(name):
+    return not name.startswith("_")
+
+
+def _check_class(node, in_function, violations):
+    if not PASCAL_CASE.match(node.name):
+        violations.append(Violation(node.lineno, "CLASS_NAMES", f"class '{node.name}' should be PascalCase"))
+    if not in_function and _is_public(node.name) and ast.get_docstring(node) is None:
+        violations.append(Violation(node.lineno, "DOCSTRINGS", f"class '{node.name}' has no docstring"))
+
+
+def _check_function(node, in_function, violations):
+    if not SNAKE_CASE.match(node.name) and not DUNDER.match(node.name):
+        violations.append(Violation(node.lineno, "FUNCTION_NAMES", f"function '{node.name}' should be snake_case"))
+    args = node.args.posonlyargs + node.args.args + node.args.kwonlyargs
+    for arg in args:
+        _check_variable(arg, arg.arg, True, violations)
+
+    # Nested helpers aren't part of the public interface
+    if not in_function and _is_public(node.name) and ast.get_docstring(node) is None:
+        violations.append(Violation(node.lineno, "DOCSTRINGS", f"function '{node.name}' has no docstring"))
+
+    # The first argument of a method needs no hint
+    if args and args[0].arg in ("self", "cls"):
+        args = args[1:]
+    args += [arg for arg in (node.args.vararg, node.args.kwarg) if arg is not None]
+    unannotated = [arg.arg for arg in args if arg.annotation is None]
+    if unannotated:
+        violations.append(Violation(node.lineno, "TYPE_HINTS",
+                                    f"function '{node.name}' has no type hint for {', '.join(unannotated)}"))
+    if node.returns is None and node.name != "__init__":
+        violations.append(Violation(node.lineno, "TYPE_HINTS", f"function '{node.name}' has no return type hint"))
+
+    length = node.end_lineno - node.lineno + 1
+    if length > MAX_FUNCTION_LINES:
+        violations.append(Violation(node.lineno, "FUNCTION_LENGTH",
+                                    f"function '{node.name}' is {length} lines long (max {MAX_FUNCTION_LINES})"))
+
+
+def _check_lambda(node, in_function, violations):
+    for arg in node.args.posonlyargs + node.args.args + node.args.kwonlyargs:
+        _check_variable(arg, arg.arg, True, violations)
+
+
+def _check_name(node, in_function, violations):
+    if isinstance(node.ctx, ast.Store):
+        _check_variable(node, node.id, in_function, violations)
+
+
+def _check_attribute(node, in_function, violations):
+    # Instance attributes assigned through self follow the variable rule too
+    if isinstance(node.ctx, ast.Store) and isinstance(node.value, ast.Name) and node.value.id == "self":
+        _check_variable(node, node.attr, in_function, violations)
+
+
+def _check_import_from(node, in_function, violations):
+    if any(alias.name == "*" for alias in node.names):
+        violations.append(Violation(node.lineno, "IMPORT_STYLE", f"wildcard import from '{node.module}'"))
+
+
+def _check_except_handler(node, in_function, violations):
+    if node.type is None:
+        violations.append(Violation(node.lineno, "EXCEPTION_HANDLING", "bare 'except:'"))
+
+
+def _check_compare(node, in_function, violations):
+    operands = [node.left] + node.comparators
+    for op, left, right in zip(node.ops, operands, operands[1:]):
+        if not isinstance(op, (ast.Eq, ast.NotEq)):
+            continue
+        for operand in (left, right):
+            if isinstance(operand, ast.Constant) and (operand.value is None or isinstance(operand.value, bool)):
+                symbol = "==" if isinstance(op, ast.Eq) else "!="
+                violations.append(Violation(node.lineno, "BOOLEAN_CHECKS", f"comparison '{symbol} {operand.value}'"))
+                break
+
+
+_NODE_CHECKS = {
+    ast.ClassDef: _check_class,
+    ast.FunctionDef: _check_function,
+    ast.AsyncFunctionDef: _check_function,
+    ast.Lambda: _check_lambda,
+    ast.Name: _check_name,
+    ast.Attribute: _check_attribute,
+    ast.ImportFrom: _check_import_from,
+    ast.ExceptHandler: _check_except_handler,
+    ast.Compare: _check_compare,
+}
+_FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+# Context and operator nodes never hold anything worth checking
+_LEAF_NODES = (ast.expr_context, ast.boolop, ast.operator, ast.unaryop, ast.cmpop)
+
+
+# A flat walk with a type -> check table is much faster than ast.NodeVisitor on large corpora
+def _check_tree(tree):
+    violations = []
+    stack = [(tree, False)]
+    push = stack.append
+    while stack:
+        node, in_function = stack.pop()
+        check = _NODE_CHECKS.get(type(node))
+        if check is not None:
+            check(node, in_function, violations)
+        child_in_function = in_function or isinstance(node, _FUNCTION_NODES)
+        for field in node._fields:
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST) and not isinstance(item, _LEAF_NODES):
+                        push((item, child_in_function))
+            elif isinstance(value, ast.AST) and not isinstance(value, _LEAF_NODES):
+                push((value, child_in_function))
+    return violations
+
+
+_DEFINITION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+# Blank lines right above a statement, not counting the comments and decorators that belong to it
+def _blank_lines_before(node, lines):
+    line_number = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list]) - 1
+    while line_number > 0 and lines[line_number - 1].strip().startswith("#"):
+        line_number -= 1
+    blank = 0
+    while line_number > 0 and not lines[line_number - 1].strip():
+        blank += 1
+        line_number -= 1
+    return blank
+
+
+# BLANK_LINES between consecutive definitions of a module or class body, then inside nested classes
+def _check_blank_lines(body, lines, expected, violations):
+    for previous, node in zip(body, body[1:]):
+        if isinstance(previous, _DEFINITION_NODES) and isinstance(node, _DEFINITION_NODES):
+            blank = _blank_lines_before(node, lines)
+            if blank != expected:
+                kind = "top-level definitions" if expected == TOP_LEVEL_BLANK_LINES else "methods"
+                violations.append(Violation(node.lineno, "BLANK_LINES",
+                                            f"{blank} blank lines before '{node.name}', use {expected} between {kind}"))
+    for node in body:
+        if isinstance(node, ast.ClassDef):
+            _check_blank_lines(node.body, lines, METHOD_BLANK_LINES, violations)
+
+
+IMPORT_GROUPS = ["standard library", "third-party", "local"]
+
+
+def _import_group(node, script_dir):
+    if isinstance(node, ast.ImportFrom) and node.level:
+        return 2
+    module = (node.module if isinstance(node, ast.ImportFrom) else node.names[0].name).split(".")[0]
+    if module in sys.stdlib_module_names:
+        return 0
+    # Modules next to the script are the application's own
+    if script_dir is not None and (os.path.exists(os.path.join(script_dir, f"{module}.py"))
+                                   or os.path.isdir(os.path.join(script_dir, module))):
+        return 2
+    return 1
+
+
+# IMPORTS_ORDER: module-level imports go standard library, third-party, local, with a blank line between groups
+def _check_imports_order(body, lines, filename, violations):
+    script_dir = os.path.dirname(os.path.abspath(filename)) if os.path.isfile(filename) else None
+    imports = [node for node in body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    groups = [_import_group(node, script_dir) for node in imports]
+    for (previous, node), (previous_group, group) in zip(zip(imports, imports[1:]), zip(groups, groups[1:])):
+        if group < previous_group:
+            violations.append(Violation(node.lineno, "IMPORTS_ORDER",
+                                        f"{IMPORT_GROUPS[group]} import after {IMPORT_GROUPS[previous_group]} imports"))
+        elif group > previous_group and not any(not line.strip() for line in lines[previous.end_lineno:node.lineno - 1]):
+            violations.append(Violation(node.lineno, "IMPORTS_ORDER",
+                                        f"no blank line between {IMPORT_GROUPS[previous_group]} "
+                                        f"and {IMPORT_GROUPS[group]} imports"))
+
+
+def check_source(source, filename="<script>"):
+    violations = []
+
+    # Line-based rules are cheap and don't need a parse
+    for line_number, line in enumerate(source.splitlines(), start=1):
+        indent = line[:len(line) - len(line.lstrip())]
+        if "\t" in indent:
+            violations.append(Violation(line_number, "INDENTATION", "tab used for indentation"))
+        if len(line) > MAX_LINE_LENGTH:
+            violations.append(Violation(line_number, "MAX_LINE_LENGTH", f"line longer than {MAX_LINE_LENGTH} characters"))
+
+    try:
+        tree = ast.parse(source, filename=filename)
+    except SyntaxError as e:
+        violations.append(Violation(e.lineno or 0, "SYNTAX", f"file does not parse: {e.msg}"))
+        return violations
+
+    if ast.get_docstring(tree) is None:
+        violations.append(Violation(1, "DOCSTRINGS", "module has no docstring"))
+    violations.extend(_check_tree(tree))
+    lines = source.splitlines()
+    _check_blank_lines(tree.body, lines, TOP_LEVEL_BLANK_LINES, violations)
+    _check_imports_order(tree.body, lines, filename, violations)
+
+    return sorted(violations)
+
+
+def check_file(file_path):
+    with open(file_path, "r", encoding="utf-8") as f:
+        return check_source(f.read(), file_path)
+
+
+# Compact, prompt-friendly summary: repeated findings are folded into one line
+def format_violations(violations, limit=MAX_REPORTED_VIOLATIONS):
+    grouped = {}
+    for violation in violations:
+        grouped.setdefault((violation.rule, violation.message), []).append(violation.line)
+
+    lines = []
+    for (rule, message), line_numbers in list(grouped.items())[:limit]:
+        shown = ", ".join(str(line_number) for line_number in line_numbers[:5])
+        if len(line_numbers) > 5:
+            shown += f" and {len(line_numbers) - 5} more"
+        lines.append(f"- {rule}: {message} (line{'s' if len(line_numbers) > 1 else ''} {shown})")
+    if len(grouped) > limit:
+        lines.append(f"- ... and {len(grouped) - limit} more")
+    return "\n".join(lines)
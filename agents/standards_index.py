@@ -0,0 +1,165 @@
+# In-process BM25 index over the rule sections of a standards file.
+# Built once per standards version, pickled to disk, and queried locally so the relevant
+# rules can be inlined into the prompt instead of paying for a File Search round trip.
+import os
+import re
+import math
+import pickle
+import threading
+from result_cache import hash_file
+
+INDEX_DIR = ".agent_cache/standards_index"  # Pickled indexes, one per standards file version
+TOP_K = 6  # Rules returned by a free-text search
+EXAMPLE_MAX_LINES = 20  # Longest example block inlined per section
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "e", "for", "from", "g", "if", "in", "is", "it", "of", "on",
+    "or", "the", "to", "use", "with",
+}
+
+_loaded = {}  # (standards path, file hash) -> StandardsIndex
+_lock = threading.Lock()
+
+
+# Split snake_case, camelCase and prose into lowercase search terms
+def tokenize(text):
+    tokens = re.findall(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+", text)
+    return [token.lower() for token in tokens if token.lower() not in STOP_WORDS]
+
+
+# ✅ Parse a standards file into named rules grouped under their numbered sections
+def parse_standards(text, comment_prefix="#"):
+    prefix = re.escape(comment_prefix)
+    section_pattern = re.compile(rf"^{prefix}\s*\d+\.\s*(.+)$")
+    python_rule_pattern = re.compile(r'^([A-Z][A-Z0-9_]*)\s*=\s*"(.*)"\s*$')
+    labelled_rule_pattern = re.compile(rf"^{prefix}\s*-\s*([A-Za-z]+(?: [A-Za-z]+){{0,2}}):\s*(.+)$")
+    prose_rule_pattern = re.compile(rf"^{prefix}\s*(?:-\s*)?([A-Z].*\.)$")
+
+    rules = []  # (name, section, text)
+    examples = {}  # section -> example lines
+    section = "General"
+    for line in text.splitlines():
+        stripped = line.strip()
+        match = section_pattern.match(stripped)
+        if match:
+            section = match.group(1).strip()
+            continue
+        match = python_rule_pattern.match(stripped)
+        if match:
+            rules.append((match.group(1), section, match.group(2)))
+            continue
+        match = labelled_rule_pattern.match(stripped)
+        if match:
+            name = re.sub(r"\W+", "_", match.group(1).strip()).upper()
+            rules.append((name, section, match.group(2).strip()))
+            continue
+        # Unlabelled rules are plain sentences, named after their section
+        match = prose_rule_pattern.match(stripped)
+        if match and section != "General":
+            section_rules = sum(1 for _, rule_section, _ in rules if rule_section == section)
+            name = re.sub(r"\W+", "_", section).upper() + f"_{section_rules + 1}"
+            rules.append((name, section, match.group(1)))
+            continue
+        if stripped and section != "General":
+            examples.setdefault(section, []).append(line.rstrip())
+    return rules, {name: "\n".join(lines) for name, lines in examples.items()}
+
+
+class StandardsIndex:
+    def __init__(self, rules, examples, postings, doc_lengths):
+        self.rules = rules
+        self.examples = examples
+        self.postings = postings  # term -> [(rule index, term frequency)]
+        self.doc_lengths = doc_lengths
+        self.average_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+        self.idf = {
+            term: math.log(1 + (len(rules) - len(docs) + 0.5) / (len(docs) + 0.5)) for term, docs in postings.items()
+        }
+        self._by_name = {name: index for index, (name, _, _) in enumerate(rules)}
+
+    @classmethod
+    def build(cls, text, comment_prefix="#"):
+        rules, examples = parse_standards(text, comment_prefix)
+        postings = {}
+        doc_lengths = []
+        for index, (name, section, rule_text) in enumerate(rules):
+            counts = {}
+            for term in tokenize(f"{name} {section} {rule_text}"):
+                counts[term] = counts.get(term, 0) + 1
+            for term, count in counts.items():
+                postings.setdefault(term, []).append((index, count))
+            doc_lengths.append(sum(counts.values()))
+        return cls(rules, examples, postings, doc_lengths)
+
+    def to_dict(self):
+        return {
+            "rules": self.rules, "examples": self.examples, "postings": self.postings, "doc_lengths": self.doc_lengths,
+        }
+
+    # ✅ BM25 ranking of the rules against free text (a work item, a script, violation messages)
+    def search(self, query, top_k=TOP_K):
+        scores = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for index, count in self.postings[term]:
+                length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[index] / self.average_length
+                scores[index] = scores.get(index, 0.0) + idf * count * (BM25_K1 + 1) / (count + BM25_K1 * length_norm)
+        ranked = sorted(scores, key=lambda index: (-scores[index], index))[:top_k]
+        return [self.rules[index] for index in ranked]
+
+    def lookup(self, names):
+        return [self.rules[self._by_name[name]] for name in names if name in self._by_name]
+
+    # Exact matches for the rules a local check flagged first, then the best free-text matches
+    def relevant_rules(self, query="", rule_names=(), top_k=TOP_K):
+        selected = self.lookup(dict.fromkeys(rule_names))
+        selected.extend(rule for rule in self.search(query, top_k) if rule not in selected)
+        return selected
+
+    def format_rules(self, rules, with_examples=True):
+        lines = [f"- {name}: {text}" for name, _, text in rules]
+        if with_examples:
+            for section in dict.fromkeys(section for _, section, _ in rules):
+                example = self.examples.get(section)
+                if example:
+                    example_lines = example.splitlines()[:EXAMPLE_MAX_LINES]
+                    lines.append(f"\nExamples for '{section}':\n" + "\n".join(example_lines))
+        return "\n".join(lines)
+
+
+def _comment_prefix(standards_path):
+    return "#" if standards_path.endswith(".py") else "//"
+
+
+# ✅ Load the index for a standards file, building and pickling it the first time that version is seen
+def load_index(standards_path, index_dir=INDEX_DIR):
+    if not os.path.exists(standards_path):
+        return None
+
+    file_hash = hash_file(standards_path)
+    with _lock:
+        index = _loaded.get((standards_path, file_hash))
+    if index is not None:
+        return index
+
+    index_path = os.path.join(index_dir, f"{os.path.basename(standards_path)}.{file_hash[:16]}.pkl")
+    try:
+        with open(index_path, "rb") as f:
+            index = StandardsIndex(**pickle.load(f))
+    except (OSError, pickle.UnpicklingError, EOFError, TypeError):
+        with open(standards_path, "r", encoding="utf-8") as f:
+            index = StandardsIndex.build(f.read(), _comment_prefix(standards_path))
+        # Write to a temporary file first, so concurrent readers never see half an index
+        os.makedirs(index_dir, exist_ok=True)
+        temp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(index.to_dict(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, index_path)
+
+    with _lock:
+        _loaded[(standards_path, file_hash)] = index
+    return index
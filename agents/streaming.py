@@ -0,0 +1,187 @@
+# Streaming runs: print the reply as it arrives and track time-to-first-token,
+# falling back to the blocking create_and_process_run path when streaming isn't available
+import sys
+import time
+from azure.ai.projects.models import AgentEventHandler, AsyncAgentEventHandler
+from code_blocks import FencedCodeWriter, extract_code_block
+from message_retrieval import message_text, run_and_fetch_reply, run_and_fetch_reply_async
+from run_scheduler import PRIORITY_BATCH, estimate_tokens, get_scheduler, rate_limit_retry_after
+
+
+# Collects the reply and the latency of the first chunk, for the sync and the async handler alike
+class _ReplyCollector:
+    def _init_collector(self, started, echo, code_writer):
+        self.started = started
+        self.echo = echo
+        self.code_writer = code_writer
+        self.run_id = None
+        self.usage = None
+        self.first_token_at = None
+        self.error = None
+        self._parts = []
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def _on_run(self, run):
+        self.run_id = run.id
+        # Set on the final run event, lets the scheduler correct its token estimate
+        self.usage = getattr(run, "usage", None)
+
+    def _on_delta(self, delta):
+        chunk = delta.text
+        if not chunk:
+            return
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self._parts.append(chunk)
+
+        if self.echo:
+            sys.stdout.write(chunk)
+            sys.stdout.flush()
+        if self.code_writer is not None:
+            self.code_writer.feed(chunk)
+
+
+class StreamingReplyHandler(_ReplyCollector, AgentEventHandler):
+    def __init__(self, started, echo=True, code_writer=None):
+        super().__init__()
+        self._init_collector(started, echo, code_writer)
+
+    def on_thread_run(self, run):
+        self._on_run(run)
+
+    def on_message_delta(self, delta):
+        self._on_delta(delta)
+
+    def on_error(self, data):
+        self.error = data
+
+
+class AsyncStreamingReplyHandler(_ReplyCollector, AsyncAgentEventHandler):
+    def __init__(self, started, echo=True, code_writer=None):
+        super().__init__()
+        self._init_collector(started, echo, code_writer)
+
+    async def on_thread_run(self, run):
+        self._on_run(run)
+
+    async def on_message_delta(self, delta):
+        self._on_delta(delta)
+
+    async def on_error(self, data):
+        self.error = data
+
+
+def _stream(project_client, thread_id, agent_id, handler, run_options):
+    with project_client.agents.create_stream(
+        thread_id=thread_id, assistant_id=agent_id, event_handler=handler, **run_options
+    ) as stream:
+        stream.until_done()
+    return handler
+
+
+async def _stream_async(project_client, thread_id, agent_id, handler, run_options):
+    async with await project_client.agents.create_stream(
+        thread_id=thread_id, assistant_id=agent_id, event_handler=handler, **run_options
+    ) as stream:
+        await stream.until_done()
+    return handler
+
+
+def _blocking_run(project_client, thread_id, agent_id, started, run_options, prompt_text, priority):
+    run, reply = run_and_fetch_reply(
+        project_client.agents, thread_id, agent_id, prompt_text=prompt_text, priority=priority, **run_options
+    )
+    text = message_text(reply) if reply is not None else ""
+    return run.id, text, time.perf_counter()
+
+
+def _finish(run_id, text, started, first_token_at, streamed, echo, code_writer, language):
+    finished = time.perf_counter()
+    if echo and streamed:
+        print()
+
+    code = code_writer.close() if code_writer is not None else extract_code_block(text, language)
+
+    metrics = {
+        "streamed": streamed,
+        "time_to_first_token": round((first_token_at or finished) - started, 3),
+        "total_latency": round(finished - started, 3),
+    }
+    print(f"⏱️ Time to first token: {metrics['time_to_first_token']}s, total: {metrics['total_latency']}s")
+
+    return {"run_id": run_id, "text": text, "code": code, "metrics": metrics}
+
+
+# ✅ Run the agent and stream its reply, returning the text plus latency metrics
+def stream_run(project_client, thread_id, agent_id, output_file=None, language="python", echo=True,
+               run_options=None, prompt_text="", priority=PRIORITY_BATCH):
+    run_options = run_options or {}
+    started = time.perf_counter()
+    code_writer = FencedCodeWriter(output_file, language) if output_file else None
+    handler = StreamingReplyHandler(started, echo=echo, code_writer=code_writer)
+
+    try:
+        # A 429 comes back before the run exists, so the scheduler can retry the whole stream
+        get_scheduler().run(
+            lambda: _stream(project_client, thread_id, agent_id, handler, run_options),
+            estimate_tokens(prompt_text),
+            priority,
+        )
+        if handler.error:
+            raise RuntimeError(f"Streaming run failed: {handler.error}")
+        streamed = True
+        run_id, text, first_token_at = handler.run_id, handler.text, handler.first_token_at
+    except Exception as e:
+        # Once a run exists on the thread, starting another one would just fail, so give up;
+        # the same goes for a rate limit that outlasted the scheduler's retries
+        if handler.run_id is not None or rate_limit_retry_after(e) is not None:
+            raise
+        print(f"⚠️ Streaming not available ({e}), falling back to a blocking run")
+        streamed = False
+        run_id, text, first_token_at = _blocking_run(
+            project_client, thread_id, agent_id, started, run_options, prompt_text, priority
+        )
+        if echo:
+            print(text)
+        if code_writer is not None:
+            code_writer.feed(text)
+
+    return _finish(run_id, text, started, first_token_at, streamed, echo, code_writer, language)
+
+
+# ✅ The same on the azure.ai.projects.aio client, for callers running many streams on one event loop
+async def stream_run_async(project_client, thread_id, agent_id, output_file=None, language="python", echo=True,
+                           run_options=None, prompt_text="", priority=PRIORITY_BATCH):
+    run_options = run_options or {}
+    started = time.perf_counter()
+    code_writer = FencedCodeWriter(output_file, language) if output_file else None
+    handler = AsyncStreamingReplyHandler(started, echo=echo, code_writer=code_writer)
+
+    try:
+        await get_scheduler().run_async(
+            lambda: _stream_async(project_client, thread_id, agent_id, handler, run_options),
+            estimate_tokens(prompt_text),
+            priority,
+        )
+        if handler.error:
+            raise RuntimeError(f"Streaming run failed: {handler.error}")
+        streamed = True
+        run_id, text, first_token_at = handler.run_id, handler.text, handler.first_token_at
+    except Exception as e:
+        if handler.run_id is not None or rate_limit_retry_after(e) is not None:
+            raise
+        print(f"⚠️ Streaming not available ({e}), falling back to a blocking run")
+        streamed = False
+        run, reply = await run_and_fetch_reply_async(
+            project_client.agents, thread_id, agent_id, prompt_text=prompt_text, priority=priority, **run_options
+        )
+        run_id, text, first_token_at = run.id, message_text(reply) if reply is not None else "", time.perf_counter()
+        if echo:
+            print(text)
+        if code_writer is not None:
+            code_writer.feed(text)
+
+    return _finish(run_id, text, started, first_token_at, streamed, echo, code_writer, language)
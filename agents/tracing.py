@@ -0,0 +1,300 @@
+# Lightweight spans around agent SDK calls, model runs, ADO requests and pipeline stages.
+# Set AGENT_TRACE to a .jsonl path (or "otel" to hand spans to the OpenTelemetry SDK); when it is unset,
+# span() returns a shared no-op object and clients are not wrapped at all.
+import os
+import sys
+import json
+import time
+import atexit
+import inspect
+import functools
+import secrets
+import argparse
+import threading
+import contextvars
+from collections import defaultdict
+
+TRACE_TARGET = os.getenv("AGENT_TRACE")  # JSON-lines file, or "otel"
+OTEL_TARGET = "otel"
+
+_current_span = contextvars.ContextVar("agent_trace_span", default=None)
+
+
+def _field(value, name):
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+class _NoopSpan:
+    def set(self, **attributes):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_details):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.parent = _current_span.get()
+        self.trace_id = self.parent.trace_id if self.parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.start = None
+        self.duration = None
+        self.error = None
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        return self
+
+    def __enter__(self):
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._token = _current_span.set(self)
+        self.tracer.exporter.start(self)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.duration = time.perf_counter() - self._started
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.tracer.exporter.finish(self)
+        return False
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent is not None else None,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+# One finished span per line, appended as spans end
+class JsonLinesExporter:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def start(self, span):
+        pass
+
+    def finish(self, span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+# Mirrors spans into the globally configured OpenTelemetry tracer provider (OTLP, console, ...)
+class OpenTelemetryExporter:
+    def __init__(self):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError("AGENT_TRACE=otel needs the opentelemetry-api and opentelemetry-sdk packages")
+        self._trace = trace
+        self._tracer = trace.get_tracer("coding-agent")
+        self._spans = {}
+
+    def start(self, span):
+        parent = self._spans.get(span.parent.span_id) if span.parent is not None else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        self._spans[span.span_id] = self._tracer.start_span(span.name, context=context,
+                                                            start_time=int(span.start * 1e9))
+
+    def finish(self, span):
+        otel_span = self._spans.pop(span.span_id)
+        otel_span.set_attributes({name: value for name, value in span.attributes.items() if value is not None})
+        if span.error:
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=int((span.start + span.duration) * 1e9))
+
+    def close(self):
+        pass
+
+
+class Tracer:
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    def span(self, name, attributes):
+        return Span(self, name, attributes)
+
+    def close(self):
+        self.exporter.close()
+
+
+def tracer_for(target):
+    if target == OTEL_TARGET:
+        return Tracer(OpenTelemetryExporter())
+    return Tracer(JsonLinesExporter(target))
+
+
+_tracer = tracer_for(TRACE_TARGET) if TRACE_TARGET else None
+atexit.register(lambda: _tracer is not None and _tracer.close())
+
+
+def get_tracer():
+    return _tracer
+
+
+# Swap the process-wide tracer (None turns tracing off), e.g. to trace one benchmark run into its own file
+def set_default_tracer(tracer):
+    global _tracer
+    previous = _tracer
+    _tracer = tracer
+    return previous
+
+
+# ✅ Time a block of work; attributes can be added while it runs with .set()
+def span(name, **attributes):
+    if _tracer is None:
+        return NOOP_SPAN
+    return _tracer.span(name, attributes)
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+# ✅ Decorator for entry points: the whole call becomes one span, with the SDK and REST calls nested under it
+def traced(name):
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def traced_async(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return traced_async
+
+        @functools.wraps(func)
+        def traced_call(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return traced_call
+    return decorate
+
+
+# What each SDK call sends and gets back, as span attributes
+def _request_attributes(kwargs):
+    attributes = {"thread_id": kwargs.get("thread_id")}
+    content = kwargs.get("content")
+    if isinstance(content, str):
+        attributes["request_bytes"] = len(content.encode("utf-8"))
+    file_path = kwargs.get("file_path")
+    if file_path and os.path.exists(file_path):
+        attributes["request_bytes"] = os.path.getsize(file_path)
+    if kwargs.get("file_ids"):
+        attributes["files"] = len(kwargs["file_ids"])
+    return {name: value for name, value in attributes.items() if value is not None}
+
+
+def _response_attributes(result):
+    attributes = {"status": _field(result, "status")}
+    usage = _field(result, "usage")
+    if usage is not None:
+        attributes["prompt_tokens"] = _field(usage, "prompt_tokens")
+        attributes["completion_tokens"] = _field(usage, "completion_tokens")
+        attributes["total_tokens"] = _field(usage, "total_tokens")
+    data = _field(result, "data")
+    if isinstance(data, list):
+        attributes["items"] = len(data)
+    return {name: value for name, value in attributes.items() if value is not None}
+
+
+# Wraps the client's `agents` operations so every call becomes an "agents.<method>" span
+class _TracedOperations:
+    def __init__(self, operations):
+        self._operations = operations
+
+    def __getattr__(self, name):
+        method = getattr(self._operations, name)
+        if not callable(method):
+            return method
+
+        if inspect.iscoroutinefunction(method):
+            async def traced_async(*args, **kwargs):
+                with span(f"agents.{name}", **_request_attributes(kwargs)) as call_span:
+                    result = await method(*args, **kwargs)
+                    call_span.set(**_response_attributes(result))
+                    return result
+            return traced_async
+
+        def traced(*args, **kwargs):
+            with span(f"agents.{name}", **_request_attributes(kwargs)) as call_span:
+                result = method(*args, **kwargs)
+                call_span.set(**_response_attributes(result))
+                return result
+        return traced
+
+
+class _TracedProjectClient:
+    def __init__(self, client):
+        self._client = client
+        self.agents = _TracedOperations(client.agents)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+# ✅ The client itself when tracing is off, so untraced runs pay nothing per call
+def trace_project_client(client):
+    if _tracer is None or isinstance(client, _TracedProjectClient):
+        return client
+    return _TracedProjectClient(client)
+
+
+# ✅ Where the time went: per span name, call count, total and percentile durations, and tokens
+def summarize(path):
+    durations, tokens, errors = defaultdict(list), defaultdict(int), defaultdict(int)
+    root_ms = 0.0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            durations[record["name"]].append(record["duration_ms"])
+            tokens[record["name"]] += record["attributes"].get("total_tokens") or 0
+            errors[record["name"]] += record["status"] == "error"
+            if record["parent_id"] is None:
+                root_ms += record["duration_ms"]
+
+    print(f"{'Span':<48} {'calls':>6} {'errors':>6} {'total s':>8} {'p50 ms':>8} {'p95 ms':>8} {'tokens':>8}")
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        values.sort()
+        p50 = values[len(values) // 2]
+        p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+        print(f"{name:<48} {len(values):>6} {errors[name]:>6} {sum(values) / 1000:>8.2f} {p50:>8.1f} {p95:>8.1f} "
+              f"{tokens[name] or '':>8}")
+    print(f"\nTime in top-level spans: {root_ms / 1000:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a JSON-lines trace written with AGENT_TRACE=<file>.")
+    parser.add_argument("trace_file")
+    args = parser.parse_args()
+    if not os.path.exists(args.trace_file):
+        sys.exit(f"❌ No trace file at {args.trace_file}")
+    summarize(args.trace_file)
@@ -0,0 +1,201 @@
+# Local sha256 -> file_id registry, so byte-identical files are uploaded only once
+import os
+import json
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from result_cache import hash_file
+from polling import call_client, upload_and_wait
+
+REGISTRY_PATH = ".agent_cache/uploads.json"  # Where the hash -> file_id map is stored
+MAX_UPLOAD_AGE_SECONDS = 7 * 24 * 60 * 60  # Re-upload (and clean up) files older than this, None keeps them
+SWEEP_INTERVAL_SECONDS = 60 * 60  # Sweep the registry against the project at most this often, 0 sweeps on every call
+LOCK_STALE_SECONDS = 10  # A lock file this old was left behind by a crashed process and is taken over
+
+
+class UploadRegistry:
+    def __init__(self, path=REGISTRY_PATH, max_age_seconds=MAX_UPLOAD_AGE_SECONDS,
+                 sweep_interval_seconds=SWEEP_INTERVAL_SECONDS):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        entries = {"files": {}, "orphans": [], "last_swept_at": 0}
+        if not os.path.exists(self.path):
+            return entries
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries.update(json.load(f))
+        except (OSError, ValueError):
+            # A corrupt registry only costs us re-uploads, so start over
+            pass
+        return entries
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=4)
+        os.replace(temp_path, self.path)
+
+    # Read-modify-write under a lock file: processes sharing the registry see each other's entries and sweeps
+    # instead of the last writer dropping them
+    @contextmanager
+    def _updating(self):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            lock_path = f"{self.path}.lock"
+            while True:
+                try:
+                    lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                    break
+                except FileExistsError:
+                    try:
+                        if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+                            os.remove(lock_path)
+                    except OSError:
+                        pass  # Released in the meantime
+                    time.sleep(0.01)
+            try:
+                self._entries = self._load()
+                yield self._entries
+                self._save()
+            finally:
+                os.close(lock_fd)
+                os.remove(lock_path)
+
+    def _is_expired(self, entry):
+        if self.max_age_seconds is None:
+            return False
+        return time.time() - entry["uploaded_at"] > self.max_age_seconds
+
+    def lookup(self, file_hash):
+        with self._lock:
+            entry = self._entries["files"].get(file_hash)
+            if entry is None or self._is_expired(entry):
+                return None
+            return entry["file_id"]
+
+    def record(self, file_hash, file_id, file_path):
+        with self._updating() as entries:
+            # A replaced upload is no longer referenced, remember it for cleanup
+            previous = entries["files"].get(file_hash)
+            if previous is not None and previous["file_id"] != file_id:
+                entries["orphans"].append(previous["file_id"])
+            entries["files"][file_hash] = {
+                "file_id": file_id,
+                "filename": os.path.basename(file_path),
+                "uploaded_at": time.time(),
+            }
+
+    def forget(self, file_hash, file_id=None):
+        with self._updating() as entries:
+            entry = entries["files"].get(file_hash)
+            # Only drop the entry we were asked about, a newer upload may have replaced it
+            if entry is not None and file_id in (None, entry["file_id"]):
+                del entries["files"][file_hash]
+
+    def claim_sweep(self):
+        # The sweep costs a get_file per entry, so only one caller per interval runs it, across processes too
+        with self._updating() as entries:
+            now = time.time()
+            if now - entries["last_swept_at"] < self.sweep_interval_seconds:
+                return False
+            entries["last_swept_at"] = now
+            return True
+
+    def live_entries(self):
+        with self._lock:
+            return {
+                file_hash: entry["file_id"]
+                for file_hash, entry in self._entries["files"].items()
+                if not self._is_expired(entry)
+            }
+
+    def orphaned_file_ids(self):
+        with self._lock:
+            expired = [entry["file_id"] for entry in self._entries["files"].values() if self._is_expired(entry)]
+            return list(self._entries["orphans"]) + expired
+
+    def drop_orphan(self, file_id):
+        with self._updating() as entries:
+            if file_id in entries["orphans"]:
+                entries["orphans"].remove(file_id)
+            for file_hash, entry in list(entries["files"].items()):
+                if entry["file_id"] == file_id and self._is_expired(entry):
+                    del entries["files"][file_hash]
+
+
+# ✅ Upload a file only when no live copy of the same bytes exists yet
+def upload_file_deduplicated(agents_client, file_path, purpose, registry):
+    file_hash = hash_file(file_path)
+    file_id = registry.lookup(file_hash)
+
+    if file_id is not None:
+        # Validate the remote file, it may have been deleted from the project
+        try:
+            remote_file = agents_client.get_file(file_id)
+            if getattr(remote_file, "status", "processed") != "error":
+                print(f"♻️ Reusing uploaded file {os.path.basename(file_path)}, file ID: {file_id}")
+                return remote_file
+        except Exception:
+            pass
+        registry.forget(file_hash, file_id)
+
+    # Adaptive polling returns as soon as the file is processed, instead of on a fixed one-second tick
+    uploaded_file = upload_and_wait(agents_client, file_path, purpose)
+    registry.record(file_hash, uploaded_file.id, file_path)
+    return uploaded_file
+
+
+# ✅ Clean up the registry and the project without blocking the caller:
+# expired or replaced uploads are deleted, entries whose remote file vanished are dropped.
+# Returns None when the registry was swept less than sweep_interval_seconds ago.
+def cleanup_orphans_in_background(agents_client, registry):
+    if not registry.claim_sweep():
+        return None
+
+    def cleanup():
+        for file_id in registry.orphaned_file_ids():
+            try:
+                agents_client.delete_file(file_id)
+            except Exception:
+                # Already gone or not ours to delete anymore, drop it either way
+                pass
+            registry.drop_orphan(file_id)
+
+        for file_hash, file_id in registry.live_entries().items():
+            try:
+                agents_client.get_file(file_id)
+            except Exception:
+                registry.forget(file_hash, file_id)
+
+    worker = threading.Thread(target=cleanup, name="upload-registry-cleanup", daemon=True)
+    worker.start()
+    return worker
+
+
+# ✅ The same cleanup as a task on the running event loop, for the async entry points
+def cleanup_orphans_in_task(agents_client, registry):
+    if not registry.claim_sweep():
+        return None
+
+    async def cleanup():
+        for file_id in registry.orphaned_file_ids():
+            try:
+                await call_client(agents_client.delete_file, file_id)
+            except Exception:
+                pass
+            registry.drop_orphan(file_id)
+
+        for file_hash, file_id in registry.live_entries().items():
+            try:
+                await call_client(agents_client.get_file, file_id)
+            except Exception:
+                registry.forget(file_hash, file_id)
+
+    return asyncio.ensure_future(cleanup())
@@ -0,0 +1,75 @@
+# Exercise the pooled AdoClient against the local fake ADO server: connection reuse and retry behavior
+import os
+import sys
+import time
+import argparse
+
+import requests
+from requests.auth import HTTPBasicAuth
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "devops_tasks"))
+
+from ado_client import AdoClient
+from fake_ado_server import FakeAdoServer
+
+WORK_ITEM_ID = 42
+
+
+def measure(label, server, calls, get):
+    connections_before = server.state.connections
+    started = time.perf_counter()
+    for _ in range(calls):
+        assert get().status_code == 200
+    per_call_ms = (time.perf_counter() - started) / calls * 1000
+    connections = server.state.connections - connections_before
+    print(f"{label:<8} {per_call_ms:7.2f} ms/call, {connections} TCP connections for {calls} calls")
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+def run(calls):
+    with FakeAdoServer() as server:
+        server.state.add_work_item(WORK_ITEM_ID, "Fake work item")
+        path = f"wit/workitems/{WORK_ITEM_ID}?api-version=6.0"
+
+        # Before: bare requests calls, one new connection per call
+        measure("bare", server, calls, lambda: requests.get(f"{server.base_url}/{path}", auth=HTTPBasicAuth("", "pat")))
+
+        with AdoClient(server.base_url, "pat", backoff_base_seconds=0.01) as client:
+            # After: the pooled keep-alive session
+            measure("pooled", server, calls, lambda: client.get(path))
+
+            results = []
+
+            server.inject_failures(2, status=429, retry_after=0)
+            retries_before = client.retries
+            response = client.get(path)
+            results.append(check("429 with Retry-After is retried", response.status_code == 200 and client.retries - retries_before == 2))
+
+            server.inject_failures(1, status=503)
+            response = client.post("git/repositories/repo/pullrequests?api-version=6.0", json={"title": "PR"})
+            results.append(check("503 on POST is retried", response.status_code == 201))
+
+            server.inject_failures(1, status=500)
+            response = client.post("git/repositories/repo/pullrequests?api-version=6.0", json={"title": "PR"})
+            results.append(check("500 on POST is not retried", response.status_code == 500))
+
+            server.inject_failures(1, status=502)
+            response = client.get(path)
+            results.append(check("502 on GET is retried", response.status_code == 200))
+
+            server.inject_failures(client.max_retries + 1, status=429, retry_after=0)
+            response = client.get(path)
+            results.append(check("Retries stop after max_retries", response.status_code == 429))
+
+    return all(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pooled ADO client against a fake ADO server.")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.calls) else 1)
@@ -0,0 +1,147 @@
+# Hundreds of agent runs in flight at once: a thread per run against coroutines on one event loop.
+# Each mode runs in its own process, so peak memory (ru_maxrss) and thread counts don't leak between them.
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "devops_tasks"))
+
+import chat_with_agent as chat
+import async_agents
+import automate_devops_tasks as devops
+import async_devops_tasks as async_devops
+from project_client_pool import ProjectClientPool, AsyncProjectClientPool, set_default_pool, set_default_async_pool
+from run_scheduler import RunScheduler, set_default_scheduler
+from fake_ado_server import FakeAdoServer
+from fake_project_client import FakeProjectClient, FakeAsyncProjectClient
+
+MODES = ["threads", "asyncio"]
+FIRST_WORK_ITEM_ID = 5001
+
+
+# Highest thread count seen while the runs are in flight
+class ThreadSampler:
+    def __init__(self):
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(0.01):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_details):
+        self._stop.set()
+        self._thread.join()
+
+
+def install_fakes(run_latency):
+    set_default_scheduler(RunScheduler(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+    set_default_pool(ProjectClientPool(
+        client_factory=lambda credential, conn_str: FakeProjectClient(run_latency=run_latency),
+        credential_factory=lambda: None,
+    ))
+    set_default_async_pool(AsyncProjectClientPool(
+        client_factory=lambda credential, conn_str: FakeAsyncProjectClient(run_latency=run_latency),
+        credential_factory=lambda: None,
+    ))
+
+
+# The sync chat only prints its reply, so a run counts as done when it returns without raising
+def chat_runs(mode, runs):
+    if mode == "threads":
+        with ThreadPoolExecutor(max_workers=runs) as executor:
+            return len(list(executor.map(lambda _: chat.chat_with_agent("asst", stream=False), range(runs))))
+
+    async def main():
+        return len(await asyncio.gather(*(async_agents.chat_with_agent("asst", stream=False) for _ in range(runs))))
+
+    return asyncio.run(main())
+
+
+def work_items(mode, runs, ado_latency):
+    work_dir = tempfile.mkdtemp(prefix="bench_async_")
+    devops.RESULT_CACHE.cache_dir = os.path.join(work_dir, "results")
+    devops.CHECKPOINTS.path = os.path.join(work_dir, "checkpoints.db")
+    devops.ADO_PAT, devops.ADO_REPO, devops.AGENT_ID = "pat", "repo", "asst"
+    os.chdir(work_dir)  # Generated scripts land in the scratch directory
+
+    with FakeAdoServer(latency=ado_latency) as server:
+        devops.ADO_BASE_URL = server.base_url
+        work_item_ids = list(range(FIRST_WORK_ITEM_ID, FIRST_WORK_ITEM_ID + runs))
+        for work_item_id in work_item_ids:
+            server.state.add_work_item(work_item_id, f"Ticket {work_item_id}", "Parse a CSV file and print totals")
+
+        if mode == "threads":
+            outcomes = devops.process_work_items(work_item_ids, max_workers=runs)
+        else:
+            async def main():
+                try:
+                    return await async_devops.process_work_items(work_item_ids, max_in_flight=runs)
+                finally:
+                    await async_devops.close_clients()
+            outcomes = asyncio.run(main())
+    return sum(1 for outcome in outcomes if outcome["status"] == "succeeded")
+
+
+# Runs in the child process and prints one JSON line
+def measure(workload, mode, runs, run_latency, ado_latency):
+    install_fakes(run_latency)
+    baseline_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    with ThreadSampler() as sampler, redirect_stdout(io.StringIO()):
+        if workload == "chat":
+            succeeded = chat_runs(mode, runs)
+        else:
+            succeeded = work_items(mode, runs, ado_latency)
+    print(json.dumps({
+        "seconds": round(time.perf_counter() - started, 2),
+        "succeeded": succeeded,
+        "peak_threads": sampler.peak,
+        "peak_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "added_rss_mib": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kib) / 1024, 1),
+    }))
+
+
+def run(workloads, runs, run_latency, ado_latency):
+    print(f"{'Workload':<11} {'mode':<8} {'runs':>5} {'ok':>5} {'seconds':>8} {'threads':>8} "
+          f"{'peak RSS MiB':>13} {'added MiB':>10}")
+    for workload in workloads:
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", workload, mode, "--runs", str(runs),
+                 "--run-latency", str(run_latency), "--ado-latency", str(ado_latency)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{workload:<11} {mode:<8} {runs:>5} {result['succeeded']:>5} {result['seconds']:>8.2f} "
+                  f"{result['peak_threads']:>8} {result['peak_rss_mib']:>13.1f} {result['added_rss_mib']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare threads and asyncio with many agent runs in flight.")
+    parser.add_argument("--runs", type=int, default=300, help="Runs in flight at the same time")
+    parser.add_argument("--run-latency", type=float, default=2.0, help="Seconds the fake agent takes per run")
+    parser.add_argument("--ado-latency", type=float, default=0.05, help="Round trip of the fake ADO server")
+    parser.add_argument("--workloads", nargs="+", choices=["chat", "work_items"], default=["chat", "work_items"])
+    parser.add_argument("--child", nargs=2, metavar=("WORKLOAD", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure(*args.child, args.runs, args.run_latency, args.ado_latency)
+    else:
+        run(args.workloads, args.runs, args.run_latency, args.ado_latency)
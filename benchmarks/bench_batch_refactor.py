@@ -0,0 +1,59 @@
+# Compare the serial refactor loop against batch mode using the local fake client
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+import chat_with_agent_refactor
+from chat_with_agent_refactor import batch_refactor
+from fake_project_client import FakeProjectClient
+from upload_registry import UploadRegistry
+from run_scheduler import RunScheduler, set_default_scheduler
+
+SOURCE_SCRIPT = "broken-scripts/py-nonstandard-script.py"
+
+
+def make_corpus(root, count):
+    for index in range(count):
+        package_dir = os.path.join(root, f"pkg_{index % 10}")
+        os.makedirs(package_dir, exist_ok=True)
+        shutil.copy(SOURCE_SCRIPT, os.path.join(package_dir, f"script_{index}.py"))
+
+
+def run(files, workers, run_latency):
+    # The fake deployment has no quota, so the scheduler must not be what gets measured
+    set_default_scheduler(RunScheduler(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+    work_dir = tempfile.mkdtemp(prefix="bench_batch_refactor_")
+    try:
+        corpus_dir = os.path.join(work_dir, "corpus")
+        make_corpus(corpus_dir, files)
+
+        # Keep the benchmark's fake uploads out of the real registry
+        chat_with_agent_refactor.UPLOAD_REGISTRY = UploadRegistry(os.path.join(work_dir, "uploads.json"))
+
+        serial = batch_refactor(
+            "fake-agent", corpus_dir, "fake-vector-store", output_dir=os.path.join(work_dir, "serial"),
+            max_workers=1, project_client=FakeProjectClient(run_latency=run_latency), cache=None,
+        )
+        concurrent = batch_refactor(
+            "fake-agent", corpus_dir, "fake-vector-store", output_dir=os.path.join(work_dir, "concurrent"),
+            max_workers=workers, project_client=FakeProjectClient(run_latency=run_latency), cache=None,
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"Serial:     {serial['files_per_minute']} files/min")
+    print(f"Concurrent: {concurrent['files_per_minute']} files/min ({workers} workers)")
+    print(f"Speedup:    {concurrent['files_per_minute'] / serial['files_per_minute']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batch refactoring against a fake client.")
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--run-latency", type=float, default=0.2, help="Simulated seconds per agent run")
+    args = parser.parse_args()
+    run(args.files, args.workers, args.run_latency)
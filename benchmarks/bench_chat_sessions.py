@@ -0,0 +1,120 @@
+# Multi-turn chat: a new thread per question that resends the conversation so far, against pooled session threads.
+# Also checks that idle sessions are expired and their threads deleted in the background.
+import os
+import io
+import sys
+import time
+import argparse
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+import chat_with_agent as chat
+from chat_sessions import ChatSessionPool, set_default_session_pool, close_session_pools
+from project_client_pool import ProjectClientPool, get_project_client, set_default_pool
+from run_scheduler import RunScheduler, set_default_scheduler
+from fake_project_client import FakeProjectClient
+
+REPLY = "Use snake_case for functions and variables, and type hints on public functions. " * 6
+
+
+def install_fakes(run_latency, request_latency):
+    set_default_scheduler(RunScheduler(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+    set_default_pool(ProjectClientPool(
+        client_factory=lambda credential, conn_str: FakeProjectClient(
+            run_latency=run_latency, request_latency=request_latency, reply=REPLY),
+        credential_factory=lambda: None,
+    ))
+    return get_project_client(chat.PROJECT_CONNECTION_STRING).agents
+
+
+def question(user, turn):
+    return f"User {user}, question {turn}: how should the function in my last snippet be named?"
+
+
+# Follow-ups without a kept thread: every question goes to a new thread with the transcript pasted in
+def one_shot_conversation(user, turns):
+    transcript, latencies = "", []
+    for turn in range(1, turns + 1):
+        chat.QUESTION = f"{transcript}\n{question(user, turn)}".strip()
+        started = time.perf_counter()
+        chat.chat_with_agent("asst", stream=False)
+        latencies.append(time.perf_counter() - started)
+        transcript = f"{chat.QUESTION}\n{REPLY}"
+    return latencies
+
+
+def pooled_conversation(user, turns):
+    latencies = []
+    for turn in range(1, turns + 1):
+        started = time.perf_counter()
+        chat.ask(f"user-{user}", question(user, turn), agent_id="asst")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def measure(mode, agents, users, turns):
+    calls_before = dict(agents.calls)
+    runs_before = len(agents.prompt_tokens)
+    conversation = one_shot_conversation if mode == "new thread" else pooled_conversation
+
+    with redirect_stdout(io.StringIO()):
+        if mode == "new thread":
+            # chat_with_agent reads the question from a module constant, so these conversations run one at a time
+            latencies = [latency for user in range(users) for latency in conversation(user, turns)]
+        else:
+            with ThreadPoolExecutor(max_workers=users) as executor:
+                latencies = [latency for conversation_latencies in
+                             executor.map(lambda user: conversation(user, turns), range(users))
+                             for latency in conversation_latencies]
+
+    questions = users * turns
+    calls = sum(agents.calls.values()) - sum(calls_before.values())
+    prompt_tokens = agents.prompt_tokens[runs_before:]
+    return {
+        "questions": questions,
+        "calls_per_question": calls / questions,
+        "threads_created": agents.calls.get("create_thread", 0) - calls_before.get("create_thread", 0),
+        "mean_latency": sum(latencies) / len(latencies),
+        "mean_prompt_tokens": sum(prompt_tokens) / len(prompt_tokens),
+        "last_turn_prompt_tokens": max(prompt_tokens[-users:]),
+    }
+
+
+def check_expiry(sessions, idle_seconds):
+    pool = ChatSessionPool(get_project_client(chat.PROJECT_CONNECTION_STRING), "asst", idle_seconds=idle_seconds,
+                           sweep_seconds=idle_seconds / 4)
+    for session in range(sessions):
+        pool.ask(f"idle-{session}", "One question, then the user walks away")
+    time.sleep(idle_seconds * 2)
+    stats = pool.stats()
+    pool.close()
+    print(f"\n{sessions} idle sessions after {idle_seconds * 2:.1f}s: {stats['sessions']} left, "
+          f"{stats['deleted_threads']} threads deleted in the background, {stats['warm_threads']} warm threads kept")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a thread per question with pooled chat sessions.")
+    parser.add_argument("--users", type=int, default=8, help="Concurrent conversations in pooled mode")
+    parser.add_argument("--turns", type=int, default=12, help="Questions per conversation")
+    parser.add_argument("--history", type=int, default=8, help="Messages a pooled run sees")
+    parser.add_argument("--run-latency", type=float, default=0.2, help="Seconds the fake agent takes per run")
+    parser.add_argument("--request-latency", type=float, default=0.03, help="Round trip of every other call")
+    args = parser.parse_args()
+
+    agents = install_fakes(args.run_latency, args.request_latency)
+
+    print(f"{'Mode':<11} {'questions':>9} {'calls/q':>8} {'threads':>8} {'mean s':>7} {'mean prompt':>12} "
+          f"{'last turn prompt':>17}")
+    for mode in ["new thread", "pooled"]:
+        if mode == "pooled":
+            set_default_session_pool(ChatSessionPool(get_project_client(chat.PROJECT_CONNECTION_STRING), "asst",
+                                                     history_messages=args.history))
+        result = measure(mode, agents, args.users, args.turns)
+        print(f"{mode:<11} {result['questions']:>9} {result['calls_per_question']:>8.2f} "
+              f"{result['threads_created']:>8} {result['mean_latency']:>7.3f} "
+              f"{result['mean_prompt_tokens']:>12.0f} {result['last_turn_prompt_tokens']:>17}")
+    close_session_pools()
+
+    check_expiry(sessions=20, idle_seconds=0.4)
@@ -0,0 +1,122 @@
+# Resuming a work item after its pull request failed, against the fake ADO server and fake agent:
+# the rerun must not call the model again, and two workers racing for one item must not both process it
+import os
+import sys
+import shutil
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "devops_tasks"))
+
+import automate_devops_tasks as devops
+from checkpoint_store import CheckpointStore
+from project_client_pool import ProjectClientPool, set_default_pool
+from run_scheduler import RunScheduler, set_default_scheduler
+from fake_ado_server import FakeAdoServer
+from fake_project_client import FakeProjectClient
+
+FIRST_WORK_ITEM_ID = 9101
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def run(run_latency, ado_latency):
+    work_dir = tempfile.mkdtemp(prefix="bench_checkpoints_")
+    cwd = os.getcwd()
+    os.chdir(work_dir)  # Generated scripts land in the scratch directory
+    try:
+        clients = []
+
+        def client_factory(conn_str, credential):
+            clients.append(FakeProjectClient(run_latency=run_latency))
+            return clients[-1]
+
+        set_default_pool(ProjectClientPool(client_factory=client_factory, credential_factory=lambda: None))
+        set_default_scheduler(RunScheduler(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+        devops.RESULT_CACHE.cache_dir = os.path.join(work_dir, "results")
+        devops.ADO_PAT, devops.ADO_REPO, devops.AGENT_ID = "pat", "repo", "asst"
+        checkpoints = CheckpointStore(os.path.join(work_dir, "checkpoints.db"))
+        create_pull_request = devops.create_pull_request
+        model_runs = lambda: sum(client.agents.calls.get("create_and_process_run", 0) for client in clients)
+
+        with FakeAdoServer(latency=ado_latency) as server:
+            devops.ADO_BASE_URL = server.base_url
+            work_item_ids = [FIRST_WORK_ITEM_ID, FIRST_WORK_ITEM_ID + 1]
+            for work_item_id in work_item_ids:
+                server.state.add_work_item(work_item_id, f"Ticket {work_item_id}", "Parse a CSV file and print totals")
+
+            # The PR service is down on the first attempt
+            devops.create_pull_request = lambda branch_name, work_item_id: None
+            first, first_seconds = timed(lambda: devops.process_work_item(work_item_ids[0], checkpoints=checkpoints))
+            runs_after_first = model_runs()
+            devops.create_pull_request = create_pull_request
+
+            rerun, rerun_seconds = timed(lambda: devops.process_work_item(work_item_ids[0], checkpoints=checkpoints))
+            runs_after_rerun = model_runs()
+            again, _ = timed(lambda: devops.process_work_item(work_item_ids[0], checkpoints=checkpoints))
+
+            # Without checkpoints the rerun starts over, and the branch left by the first attempt blocks it
+            devops.create_pull_request = lambda branch_name, work_item_id: None
+            devops.process_work_item(work_item_ids[1], checkpoints=None)
+            devops.create_pull_request = create_pull_request
+            runs_before_legacy = model_runs()
+            legacy, legacy_seconds = timed(lambda: devops.process_work_item(work_item_ids[1], checkpoints=None))
+            legacy_runs = model_runs() - runs_before_legacy
+
+            # The PR fails, then the ticket is edited: the rerun regenerates the script and pushes it onto the branch
+            # the first attempt already committed to
+            edited_id = FIRST_WORK_ITEM_ID + 3
+            server.state.add_work_item(edited_id, "Edited ticket", "Parse a CSV file")
+            devops.create_pull_request = lambda branch_name, work_item_id: None
+            devops.process_work_item(edited_id, checkpoints=checkpoints)
+            devops.create_pull_request = create_pull_request
+            server.state.update_work_item(edited_id, **{"System.Description": "Parse a CSV file and print the totals"})
+            for client in clients:
+                client.agents.reply = client.agents.reply.replace("len(numbers)", "max(len(numbers), 1)")
+            edited = devops.process_work_item(edited_id, checkpoints=checkpoints)
+            edited_pushes = sum(1 for push in server.state.pushes
+                                if push["refUpdates"][0]["name"] == f"refs/heads/{devops.branch_name_for(edited_id)}")
+
+            # Two workers start on the same new item at the same moment
+            server.state.add_work_item(FIRST_WORK_ITEM_ID + 2, "Raced ticket", "Parse a CSV file")
+            outcomes = []
+            racers = [
+                threading.Thread(target=lambda: outcomes.append(
+                    devops.process_work_item(FIRST_WORK_ITEM_ID + 2, checkpoints=checkpoints)
+                ))
+                for _ in range(2)
+            ]
+            for racer in racers:
+                racer.start()
+            for racer in racers:
+                racer.join()
+            pull_requests = len(server.state.pull_requests)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"First attempt:        {first['status']} at {first['stage']} in {first_seconds:.2f}s, "
+          f"{runs_after_first} model run(s)")
+    print(f"Resumed rerun:        {rerun['status']} in {rerun_seconds:.2f}s, "
+          f"{runs_after_rerun - runs_after_first} extra model run(s)")
+    print(f"Rerun after success:  {again['status']}, same PR: {'yes' if again['pr_url'] == rerun['pr_url'] else 'no'}")
+    print(f"Rerun, no checkpoint: {legacy['status']} at {legacy['stage']} in {legacy_seconds:.2f}s, "
+          f"{legacy_runs} extra model run(s)")
+    print(f"Rerun after an edit:  {edited['status']}, {edited_pushes} push(es) to its branch")
+    print(f"Two racing workers:   {', '.join(sorted(outcome['status'] for outcome in outcomes))}")
+    print(f"Pull requests created: {pull_requests}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark checkpointed work item reruns against fake services.")
+    parser.add_argument("--run-latency", type=float, default=2.0, help="Simulated seconds per agent run")
+    parser.add_argument("--ado-latency", type=float, default=0.02, help="Simulated seconds per ADO request")
+    args = parser.parse_args()
+    run(args.run_latency, args.ado_latency)
@@ -0,0 +1,74 @@
+# Compare refactoring a large module in one reply against the unit-by-unit chunked mode
+import os
+import sys
+import ast
+import time
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+from chunked_refactor import refactor_in_chunks, split_units
+from fake_project_client import FakeProjectClient
+from run_scheduler import RunScheduler, set_default_scheduler
+
+SOURCE_SCRIPT = "broken-scripts/py-nonstandard-script.py"
+
+
+def make_module(copies):
+    with open(SOURCE_SCRIPT, "r", encoding="utf-8") as f:
+        source = f.read()
+
+    # Keep one header and one __main__ block, repeat the definitions under distinct names
+    header, rest = source.split("\n\n", 1)
+    definitions, main_block = rest.split("if __name__", 1)
+    body = "".join(
+        definitions.replace("myclass", f"myclass{copy}").replace("calculateAverage", f"calculateAverage{copy}")
+        for copy in range(copies)
+    )
+    return f"{header}\n\n{body}if __name__{main_block.replace('myclass', 'myclass0').replace('calculateAverage', 'calculateAverage0')}"
+
+
+def run(copies, workers, run_latency, seconds_per_output_line):
+    # The fake deployment has no quota, so the scheduler must not be what gets measured
+    set_default_scheduler(RunScheduler(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+    source = make_module(copies)
+    lines = source.count("\n") + 1
+    print(f"Module: {lines} lines, {len(split_units(source))} top-level units")
+
+    # One run has to generate the whole module
+    whole_client = FakeProjectClient(
+        run_latency=run_latency, seconds_per_output_line=seconds_per_output_line, reply=f"```python\n{source}```\n"
+    )
+    started = time.perf_counter()
+    thread = whole_client.agents.create_thread()
+    whole_client.agents.create_message(thread_id=thread.id, role="user", content="Refactor the attached script.")
+    whole_client.agents.create_and_process_run(thread_id=thread.id, assistant_id="fake-agent")
+    whole_seconds = time.perf_counter() - started
+
+    chunked_client = FakeProjectClient(
+        run_latency=run_latency, seconds_per_output_line=seconds_per_output_line, echo_code=True
+    )
+    started = time.perf_counter()
+    refactored_code, stats = refactor_in_chunks(
+        chunked_client.agents, "fake-agent", source, "large_module.py", max_workers=workers
+    )
+    chunked_seconds = time.perf_counter() - started
+
+    # Only the blank lines between units may change, they are normalised to the standard's
+    assert ast.dump(ast.parse(refactored_code)) == ast.dump(ast.parse(source)), \
+        "echoed units must stitch back to the original module"
+
+    print(f"Whole file: {whole_seconds:.2f}s, largest reply {lines} lines")
+    print(f"Chunked:    {chunked_seconds:.2f}s, {stats['refactored_units']}/{stats['units']} units "
+          f"({workers} workers), {len(stats['renames'])} module-wide renames")
+    print(f"Speedup:    {whole_seconds / chunked_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark chunked refactoring against a fake client.")
+    parser.add_argument("--copies", type=int, default=100, help="Copies of the example definitions in the module")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--run-latency", type=float, default=0.2, help="Simulated fixed seconds per agent run")
+    parser.add_argument("--seconds-per-line", type=float, default=0.005, help="Simulated generation time per line")
+    args = parser.parse_args()
+    run(args.copies, args.workers, args.run_latency, args.seconds_per_line)
@@ -0,0 +1,111 @@
+# A full refactor sweep against the incremental one (--since) after a small commit, in a scratch git repository:
+# agent runs and prompt tokens should follow the size of the diff, not the size of the repository
+import os
+import io
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+import chat_with_agent_refactor
+from chat_with_agent_refactor import batch_refactor
+from fake_project_client import FakeProjectClient
+from upload_registry import UploadRegistry
+from run_scheduler import RunScheduler, set_default_scheduler
+from bench_chunked_refactor import SOURCE_SCRIPT, make_module
+
+NEW_FUNCTION = "\n\ndef addedHelper(x):\n    return x*2\n"
+
+
+def git(repo_dir, *args):
+    subprocess.run(["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+                   cwd=repo_dir, check=True, capture_output=True)
+
+
+def make_repo(repo_dir, files, large_files, copies):
+    with open(SOURCE_SCRIPT, "r", encoding="utf-8") as f:
+        small_source = f.read()
+    large_source = make_module(copies)
+
+    for index in range(files):
+        package_dir = os.path.join(repo_dir, f"pkg_{index % 10}")
+        os.makedirs(package_dir, exist_ok=True)
+        with open(os.path.join(package_dir, f"script_{index}.py"), "w", encoding="utf-8") as f:
+            f.write(small_source)
+    for index in range(large_files):
+        with open(os.path.join(repo_dir, f"large_{index}.py"), "w", encoding="utf-8") as f:
+            f.write(large_source)
+    with open(os.path.join(repo_dir, "Main.java"), "w", encoding="utf-8") as f:
+        f.write("public class Main {\n}\n")
+
+    git(repo_dir, "init", "-q", "-b", "main")
+    git(repo_dir, "add", ".")
+    git(repo_dir, "commit", "-q", "-m", "base")
+
+
+# The pull request: a new function in a few small scripts, one function body edited in a large module,
+# and a Java change the Python sweep reports as skipped
+def make_change(repo_dir, changed_files):
+    git(repo_dir, "checkout", "-q", "-b", "feature")
+    for index in range(changed_files):
+        with open(os.path.join(repo_dir, f"pkg_{index % 10}", f"script_{index}.py"), "a", encoding="utf-8") as f:
+            f.write(NEW_FUNCTION)
+
+    large_path = os.path.join(repo_dir, "large_0.py")
+    with open(large_path, "r", encoding="utf-8") as f:
+        large_source = f.read()
+    with open(large_path, "w", encoding="utf-8") as f:
+        f.write(large_source.replace("def calculateAverage3(", "def calculateAverage3(  ", 1))
+    with open(os.path.join(repo_dir, "Main.java"), "a", encoding="utf-8") as f:
+        f.write("// touched\n")
+    git(repo_dir, "commit", "-q", "-am", "change")
+
+
+def sweep(repo_dir, output_dir, base_ref, run_latency, workers):
+    project_client = FakeProjectClient(run_latency=run_latency, echo_code=True)
+    with redirect_stdout(io.StringIO()):
+        summary = batch_refactor("fake-agent", repo_dir, "fake-vector-store", output_dir=output_dir,
+                                 max_workers=workers, project_client=project_client, cache=None, base_ref=base_ref)
+    agents = project_client.agents
+    return summary, agents.calls.get("create_and_process_run", 0), sum(agents.prompt_tokens)
+
+
+def run(files, large_files, copies, changed_files, run_latency, workers):
+    set_default_scheduler(RunScheduler(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+    work_dir = tempfile.mkdtemp(prefix="bench_incremental_refactor_")
+    try:
+        repo_dir = os.path.join(work_dir, "repo")
+        os.makedirs(repo_dir)
+        make_repo(repo_dir, files, large_files, copies)
+        make_change(repo_dir, changed_files)
+        chat_with_agent_refactor.UPLOAD_REGISTRY = UploadRegistry(os.path.join(work_dir, "uploads.json"))
+
+        print(f"Repository: {files} small scripts, {large_files} modules of {make_module(copies).count(chr(10))} lines; "
+              f"the change touches {changed_files + 1} Python files and 1 Java file\n")
+        print(f"{'Sweep':<12} {'scripts':>8} {'agent runs':>11} {'prompt tokens':>14} {'seconds':>8}")
+        for name, base_ref in [("full", None), ("incremental", "main")]:
+            summary, runs, prompt_tokens = sweep(
+                repo_dir, os.path.join(work_dir, f"out_{name}"), base_ref, run_latency, workers
+            )
+            print(f"{name:<12} {summary['total']:>8} {runs:>11} {prompt_tokens:>14} {summary['elapsed_seconds']:>8.2f}")
+            if summary["failed"]:
+                print(f"⚠️ {summary['failed']} scripts failed")
+        print(f"\nIncremental sweep skipped: {', '.join(os.path.basename(path) for path in summary['skipped'])}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a full refactor sweep with a git diff driven one.")
+    parser.add_argument("--files", type=int, default=200, help="Small scripts in the repository")
+    parser.add_argument("--large-files", type=int, default=3, help="Modules big enough to be split into units")
+    parser.add_argument("--copies", type=int, default=40, help="Repeated definitions per large module")
+    parser.add_argument("--changed-files", type=int, default=3, help="Small scripts the change touches")
+    parser.add_argument("--run-latency", type=float, default=0.2, help="Seconds the fake agent takes per run")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    run(args.files, args.large_files, args.copies, args.changed_files, args.run_latency, args.workers)
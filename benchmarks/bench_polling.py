@@ -0,0 +1,107 @@
+# Ingest a multi-file standards corpus: blocking per-file calls with fixed one-second polling
+# (what the *_and_poll SDK helpers do) against the async adaptive poller, using the fake client
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+from polling import upload_files, create_vector_store, index_files
+from fake_project_client import FakeProjectClient
+
+SDK_POLL_INTERVAL_SECONDS = 1  # sleep_interval default of upload_file_and_poll and friends
+
+
+def make_corpus(root, files):
+    paths = []
+    for source_path in ("instructions/py-standard-instructions.py", "instructions/java-standard-instructions.java"):
+        with open(source_path, "r", encoding="utf-8") as f:
+            source = f.read()
+        for index in range(files // 2):
+            path = os.path.join(root, f"{index}_{os.path.basename(source_path)}")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"# Style guide part {index}\n{source}")
+            paths.append(path)
+    return paths
+
+
+def _wait_fixed(check, done):
+    while True:
+        result = check()
+        if result.status in done:
+            return result
+        time.sleep(SDK_POLL_INTERVAL_SECONDS)
+
+
+def blocking_ingest(agents_client, file_paths):
+    vector_store = agents_client.create_vector_store(file_ids=[], name="corpus")
+    for file_path in file_paths:
+        uploaded_file = agents_client.upload_file(file_path=file_path, purpose="assistants")
+        _wait_fixed(lambda: agents_client.get_file(uploaded_file.id), {"processed"})
+        batch = agents_client.create_vector_store_file_batch(vector_store_id=vector_store.id, file_ids=[uploaded_file.id])
+        _wait_fixed(
+            lambda: agents_client.get_vector_store_file_batch(vector_store_id=vector_store.id, batch_id=batch.id),
+            {"completed"},
+        )
+    return vector_store
+
+
+async def async_ingest(agents_client, file_paths):
+    uploaded_files = await upload_files(agents_client, file_paths, "assistants")
+    return await create_vector_store(agents_client, "corpus", [uploaded_files[path].id for path in file_paths])
+
+
+async def deadline_check(agents_client):
+    vector_store = await create_vector_store(agents_client, "deadline", [])
+    started = time.perf_counter()
+    try:
+        await index_files(agents_client, vector_store.id, ["file_x"], deadline_seconds=0.5)
+    except TimeoutError:
+        pass
+    elapsed = time.perf_counter() - started
+    cancelled = agents_client.calls.get("cancel_vector_store_file_batch", 0)
+    return elapsed, cancelled
+
+
+def run(files, request_latency, upload_latency, index_latency):
+    work_dir = tempfile.mkdtemp(prefix="bench_polling_")
+    try:
+        file_paths = make_corpus(work_dir, files)
+        options = {"request_latency": request_latency, "upload_latency": upload_latency, "index_latency": index_latency}
+
+        blocking_client = FakeProjectClient(**options)
+        started = time.perf_counter()
+        blocking_ingest(blocking_client.agents, file_paths)
+        blocking_seconds = time.perf_counter() - started
+
+        async_client = FakeProjectClient(**options)
+        started = time.perf_counter()
+        vector_store = asyncio.run(async_ingest(async_client.agents, file_paths))
+        async_seconds = time.perf_counter() - started
+        checks = sum(count for name, count in async_client.agents.calls.items() if name.startswith("get_"))
+
+        deadline_client = FakeProjectClient(request_latency=request_latency, index_latency=5.0)
+        deadline_seconds, cancelled = asyncio.run(deadline_check(deadline_client.agents))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"Corpus: {len(file_paths)} files")
+    print(f"Blocking, fixed 1s polling: {blocking_seconds:.2f}s")
+    print(f"Async adaptive polling:     {async_seconds:.2f}s ({len(vector_store.file_ids)} files indexed, "
+          f"{checks} status checks)")
+    print(f"Speedup:                    {blocking_seconds / async_seconds:.1f}x")
+    print(f"Deadline 0.5s on a 5s batch: gave up after {deadline_seconds:.2f}s, batches cancelled: {cancelled}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark corpus ingestion against a fake client.")
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--request-latency", type=float, default=0.05, help="Simulated seconds per API call")
+    parser.add_argument("--upload-latency", type=float, default=0.3, help="Simulated seconds to process an upload")
+    parser.add_argument("--index-latency", type=float, default=1.5, help="Simulated seconds to index files")
+    args = parser.parse_args()
+    run(args.files, args.request_latency, args.upload_latency, args.index_latency)
@@ -0,0 +1,114 @@
+# A mixed Python and Java repository refactored one language after the other against one routed pass, where each
+# language goes to its own agent in its own lane. Also checks every file reached the agent of its language and came
+# back from the matching code fence.
+import os
+import io
+import sys
+import shutil
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+import chat_with_agent_refactor
+from chat_with_agent_refactor import batch_refactor
+from fake_project_client import FakeProjectClient
+from upload_registry import UploadRegistry
+from run_scheduler import RunScheduler, set_default_scheduler
+
+SOURCE_SCRIPT = "broken-scripts/py-nonstandard-script.py"
+JAVA_SOURCE = (
+    "import java.util.*;\n\n"
+    "public class order_totals {\n"
+    "    public static int Total_Amount(List<Integer> amounts) {\n"
+    "        int t=0;\n"
+    "        for (int a : amounts) t+=a;\n"
+    "        return t;\n"
+    "    }\n"
+    "}\n"
+)
+AGENTS = {"python": "asst_python", "java": "asst_java"}
+
+
+def make_corpus(root, python_files, java_files):
+    with open(SOURCE_SCRIPT, "r", encoding="utf-8") as f:
+        python_source = f.read()
+    for index in range(python_files):
+        package_dir = os.path.join(root, "services", f"pkg_{index % 10}")
+        os.makedirs(package_dir, exist_ok=True)
+        with open(os.path.join(package_dir, f"script_{index}.py"), "w", encoding="utf-8") as f:
+            f.write(python_source)
+    for index in range(java_files):
+        package_dir = os.path.join(root, "jobs", f"pkg_{index % 10}")
+        os.makedirs(package_dir, exist_ok=True)
+        with open(os.path.join(package_dir, f"Job{index}.java"), "w", encoding="utf-8") as f:
+            f.write(JAVA_SOURCE.replace("order_totals", f"Job{index}"))
+    # Without an extension, the content tells the router it is Python
+    with open(os.path.join(root, "services", "manage"), "w", encoding="utf-8") as f:
+        f.write("#!/usr/bin/env python3\n" + python_source)
+
+
+def routes(python_workers, java_workers):
+    return {
+        "python": {"agent_id": AGENTS["python"], "vector_store_id": "vs_python", "max_workers": python_workers},
+        "java": {"agent_id": AGENTS["java"], "vector_store_id": "vs_java", "max_workers": java_workers},
+    }
+
+
+def sweep(target, output_dir, sweep_routes, run_latency):
+    project_client = FakeProjectClient(run_latency=run_latency, echo_code=True)
+    with redirect_stdout(io.StringIO()):
+        summary = batch_refactor(None, target, None, output_dir=output_dir, project_client=project_client,
+                                 cache=None, routes=sweep_routes)
+    return summary, project_client.agents.agent_runs
+
+
+def check_outputs(summary):
+    for result in summary["results"]:
+        with open(result["output"], "r", encoding="utf-8") as f:
+            code = f.read()
+        # The fence of the other language would have left the whole reply, fences included, in the file
+        assert "```" not in code, f"{result['output']} still contains a code fence"
+        assert ("public class" in code) == (result["language"] == "java"), f"{result['output']} has the wrong code"
+
+
+def run(python_files, java_files, python_workers, java_workers, run_latency):
+    set_default_scheduler(RunScheduler(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+    work_dir = tempfile.mkdtemp(prefix="bench_polyglot_refactor_")
+    try:
+        corpus_dir = os.path.join(work_dir, "corpus")
+        make_corpus(corpus_dir, python_files, java_files)
+        chat_with_agent_refactor.UPLOAD_REGISTRY = UploadRegistry(os.path.join(work_dir, "uploads.json"))
+        all_routes = routes(python_workers, java_workers)
+
+        # One sweep per language, the way two separate CI jobs would run them back to back
+        seconds = 0.0
+        for language in all_routes:
+            summary, _ = sweep(corpus_dir, os.path.join(work_dir, f"out_{language}"),
+                               {language: all_routes[language]}, run_latency)
+            seconds += summary["elapsed_seconds"]
+        print(f"One language at a time: {seconds:.2f}s")
+
+        summary, agent_runs = sweep(corpus_dir, os.path.join(work_dir, "out_routed"), all_routes, run_latency)
+        check_outputs(summary)
+        lanes = ", ".join(f"{language} {lane['scripts']} scripts / {lane['max_workers']} workers"
+                          for language, lane in summary["lanes"].items())
+        print(f"Routed in one pass:     {summary['elapsed_seconds']:.2f}s ({lanes}), {summary['failed']} failed")
+        print(f"Speedup:                {seconds / summary['elapsed_seconds']:.1f}x")
+        print(f"Agent runs: {dict(agent_runs)}")
+        languages = {result["script"]: result["language"] for result in summary["results"]}
+        print(f"Extension-less script routed to: {languages[os.path.join(corpus_dir, 'services', 'manage')]}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-language refactor sweeps with one routed pass.")
+    parser.add_argument("--python-files", type=int, default=60)
+    parser.add_argument("--java-files", type=int, default=40)
+    parser.add_argument("--python-workers", type=int, default=8)
+    parser.add_argument("--java-workers", type=int, default=4)
+    parser.add_argument("--run-latency", type=float, default=0.2, help="Seconds the fake agent takes per run")
+    args = parser.parse_args()
+    run(args.python_files, args.java_files, args.python_workers, args.java_workers, args.run_latency)
@@ -0,0 +1,69 @@
+# Prompt size of typical work item descriptions before and after compaction, and what compacting costs
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+from prompt_compaction import PROMPT_TOKEN_BUDGET, compact_prompt
+from run_scheduler import CHARS_PER_TOKEN
+
+SHORT = "<div>Read orders.csv and print the total amount per customer.</div>"
+SPEC = (
+    "<div><b>Background</b></div><div>Finance exports orders every night and needs totals per customer &amp; region."
+    "</div><div><br></div><div><b>Acceptance Criteria</b></div><ul>"
+    + "".join(f"<li>Column {name} is validated and malformed rows are logged with their line number</li>"
+              for name in ["id", "customer", "region", "amount", "currency", "date"])
+    + "</ul><div><br></div><div><b>Notes</b></div>"
+    + "".join(f"<p>Note {index}: the export format may change, keep parsing tolerant of extra columns.</p>"
+              for index in range(30))
+)
+LOGS = (
+    "<div>The nightly import job crashes, rewrite it so it retries.</div><div><br></div><div><b>Logs</b></div>"
+    + "".join(f"<div>2024-05-01 02:00:{second:02d},{second * 7:03d} ERROR [importer] Timeout connecting to "
+              f"db-01:5432 after {1000 + second}ms</div>" for second in range(60))
+    + "<div><br></div><div>java.lang.IllegalStateException: connection pool exhausted</div>"
+    + "".join(f"<div>&nbsp;&nbsp;&nbsp; at com.acme.importer.{module}.Step{index}.run(Step{index}.java:{40 + index})</div>"
+              for index, module in enumerate(["db", "pool", "retry", "jobs", "core", "io", "csv", "cli"] * 6))
+)
+# The same kind of log pasted as preformatted text, and as a plain-text description without any markup
+PASTED_LOG = (
+    "\n".join(f"2024-05-01 02:{second // 60:02d}:{second % 60:02d},{second * 7 % 1000:03d} ERROR [importer] Timeout "
+              f"connecting to db-01:5432 after {1000 + second}ms" for second in range(500))
+    + "\njava.lang.IllegalStateException: connection pool exhausted\n"
+    + "\n".join(f"    at com.acme.importer.{module}.Step{index}.run(Step{index}.java:{40 + index})"
+                for index, module in enumerate(["db", "pool", "retry", "jobs", "core", "io", "csv", "cli"] * 6))
+)
+PRE_LOG = f"<div>The nightly import job crashes, rewrite it so it retries.</div><pre>{PASTED_LOG}</pre>"
+PLAIN_LOG = f"The nightly import job crashes, rewrite it so it retries.\n\n{PASTED_LOG}"
+SCREENSHOT = (
+    "<div>Generate a script that reproduces the error on the screenshot below.</div>"
+    f'<div><img src="data:image/png;base64,{"iVBORw0KGgo" * 6000}" alt="Stack trace in the job console"></div>'
+)
+TICKETS = {"short": SHORT, "spec": SPEC, "logs": LOGS, "pre_log": PRE_LOG, "plain_log": PLAIN_LOG,
+           "screenshot": SCREENSHOT}
+
+
+def run(budget, iterations):
+    print(f"Prompt budget: {budget} tokens\n")
+    print(f"{'Ticket':<11} {'tokens before':>13} {'after':>6} {'trimmed':>7} {'est. chars/4 after':>18} {'ms':>6}")
+    for name, description in TICKETS.items():
+        text = f"Task: Ticket {name}\nDescription: {description}"
+        seconds = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            compacted = compact_prompt(text, budget)
+            seconds.append(time.perf_counter() - started)
+        print(f"{name:<11} {compacted['tokens_before']:>13} {compacted['tokens_after']:>6} "
+              f"{compacted['trimmed_sections']:>7} {len(compacted['text']) // CHARS_PER_TOKEN:>18} "
+              f"{statistics.median(seconds) * 1000:>6.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure work item prompt compaction.")
+    parser.add_argument("--budget", type=int, default=PROMPT_TOKEN_BUDGET, help="Token budget for the work item text")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    run(args.budget, args.iterations)
@@ -0,0 +1,97 @@
+# Cold deploy, no-op redeploy and standards change, measured against the fake client
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+from provisioning import provision_agents
+from upload_registry import UploadRegistry
+from fake_project_client import FakeProjectClient
+
+SPECS = [
+    {
+        "name": "python-coding-agent",
+        "model": "fake-model",
+        "instructions_file_path": "agents/python/agent-instructions.text",
+        "standards_file_path": "instructions/py-standard-instructions.py",
+        "vector_store_name": "Python-Coding-Standards-Vector-Store",
+    },
+    {
+        "name": "java-coding-agent",
+        "model": "fake-model",
+        "instructions_file_path": "agents/java/agent-instructions.text",
+        "standards_file_path": "instructions/java-standard-instructions.java",
+        "vector_store_name": "Java-Coding-Standards-Vector-Store",
+    },
+]
+
+
+# What the setup scripts used to do on every run: upload, create a store, create an agent, one after another
+def legacy_setup(agents_client, specs):
+    for spec in specs:
+        standards_file = agents_client.upload_file_and_poll(file_path=spec["standards_file_path"])
+        vector_store = agents_client.create_vector_store_and_poll(
+            file_ids=[standards_file.id], name=spec["vector_store_name"]
+        )
+        agents_client.create_agent(model=spec["model"], name=spec["name"], metadata={"vector_store_id": vector_store.id})
+
+
+def timed(label, func):
+    started = time.perf_counter()
+    results = func()
+    elapsed = time.perf_counter() - started
+    actions = ", ".join(f"{result['name']}: agent {result['agent']}, store {result['vector_store']}" for result in results or [])
+    print(f"{label:<22} {elapsed:6.2f}s  {actions}")
+    return elapsed
+
+
+def run(request_latency, upload_latency, index_latency):
+    work_dir = tempfile.mkdtemp(prefix="bench_provisioning_")
+    try:
+        # Work on copies, so the standards change below never touches the real files
+        specs = []
+        for spec in SPECS:
+            spec = dict(spec)
+            for key in ("instructions_file_path", "standards_file_path"):
+                copy_path = os.path.join(work_dir, spec["name"], os.path.basename(spec[key]))
+                os.makedirs(os.path.dirname(copy_path), exist_ok=True)
+                shutil.copy(spec[key], copy_path)
+                spec[key] = copy_path
+            specs.append(spec)
+
+        client = FakeProjectClient(
+            request_latency=request_latency, upload_latency=upload_latency, index_latency=index_latency
+        )
+        registry = UploadRegistry(os.path.join(work_dir, "uploads.json"), max_age_seconds=None)
+        state_path = os.path.join(work_dir, "provisioning.json")
+
+        # Two legacy runs leave a duplicate agent and vector store per language behind
+        timed("Legacy setup", lambda: legacy_setup(client.agents, specs))
+        timed("Legacy setup again", lambda: legacy_setup(client.agents, specs))
+        timed("Adopt and prune", lambda: provision_agents(client.agents, specs, registry, state_path, prune=True))
+        no_op = timed("No-op redeploy", lambda: provision_agents(client.agents, specs, registry, state_path))
+
+        os.remove(state_path)
+        timed("No-op, no local state", lambda: provision_agents(client.agents, specs, registry, state_path))
+
+        with open(specs[0]["standards_file_path"], "a", encoding="utf-8") as f:
+            f.write("\nNEW_RULE = \"A rule added after the first deploy.\"\n")
+        timed("Standards changed", lambda: provision_agents(client.agents, specs, registry, state_path))
+
+        print(f"\nAgents: {len(client.agents._agents)}, vector stores: {len(client.agents._vector_stores)}")
+        print(f"No-op redeploy under a second: {'yes' if no_op < 1 else 'no'}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark idempotent provisioning against a fake client.")
+    parser.add_argument("--request-latency", type=float, default=0.1, help="Simulated seconds per API call")
+    parser.add_argument("--upload-latency", type=float, default=0.5, help="Simulated seconds per file upload")
+    parser.add_argument("--index-latency", type=float, default=2.0, help="Simulated seconds to index one file")
+    args = parser.parse_args()
+    run(args.request_latency, args.upload_latency, args.index_latency)
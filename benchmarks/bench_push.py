@@ -0,0 +1,81 @@
+# Pushing generated files to a branch of the fake ADO server: one push per file with every file's full content
+# against one push with only the files whose blob SHA differs from the branch, for a first commit and for reruns
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "devops_tasks"))
+
+import automate_devops_tasks as devops
+from fake_ado_server import FakeAdoServer
+
+WORK_ITEM_ID = 7001
+
+
+# The previous flow: an existence check and a push per file, unchanged files included
+def legacy_commit(script_paths, branch_name, work_item_id):
+    client = devops.get_ado_client()
+    for script_path in script_paths:
+        with open(script_path, "r", encoding="utf-8") as f:
+            script_content = f.read()
+        file_exists = client.get(f"git/repositories/{devops.ADO_REPO}/items?path=/{script_path}"
+                                 f"&versionDescriptor.version={branch_name}&api-version=7.1").status_code == 200
+        commit_payload = {
+            "refUpdates": [{"name": f"refs/heads/{branch_name}", "oldObjectId": devops.get_latest_commit(branch_name)}],
+            "commits": [{
+                "comment": f"Generated script for Work Item {work_item_id} via AI Agent",
+                "changes": [{
+                    "changeType": "edit" if file_exists else "add",
+                    "item": {"path": f"/{script_path}"},
+                    "newContent": {"content": script_content, "contentType": "rawtext"},
+                }],
+            }],
+        }
+        response = client.post(f"git/repositories/{devops.ADO_REPO}/pushes?api-version=7.1", json=commit_payload)
+        assert response.status_code == 201, response.text
+
+
+def write_files(work_dir, files, file_size, generation):
+    paths = []
+    for index in range(files):
+        # Every regeneration changes the first file only
+        version = generation if index == 0 else 0
+        path = os.path.join(work_dir, f"script_{index}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# file {index} version {version}\n" + "x = 1\n" * (file_size // 6))
+        paths.append(os.path.relpath(path))
+    return paths
+
+
+def measure(label, server, branch_name, commit, files, file_size):
+    work_dir = tempfile.mkdtemp(prefix="bench_push_", dir=".")
+    devops.create_branch(branch_name)
+    rows = []
+    for run_label, generation in [("first commit", 1), ("one file changed", 2), ("nothing changed", 2)]:
+        paths = write_files(work_dir, files, file_size, generation)
+        pushes_before, requests_before = len(server.state.pushes), sum(server.state.requests.values())
+        commit(paths, branch_name, WORK_ITEM_ID)
+        pushes = server.state.pushes[pushes_before:]
+        payload = sum(len(json.dumps(push)) for push in pushes)
+        rows.append((run_label, len(pushes), payload, sum(server.state.requests.values()) - requests_before))
+    for path in paths:
+        os.remove(path)
+    os.rmdir(work_dir)
+
+    for run_label, pushes, payload, requests in rows:
+        print(f"{label:<10} {run_label:<17} {pushes:>3} push(es) {payload / 1024:>8.1f} KiB {requests:>4} ADO requests")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pushing generated files to a branch of the fake ADO server.")
+    parser.add_argument("--files", type=int, default=5, help="Generated files per push")
+    parser.add_argument("--file-size", type=int, default=20000, help="Approximate bytes per file")
+    args = parser.parse_args()
+    devops.ADO_PAT, devops.ADO_REPO = "pat", "repo"
+    with FakeAdoServer() as server:
+        devops.ADO_BASE_URL = server.base_url
+        measure("per file", server, "feature/bench-push-per-file", legacy_commit, args.files, args.file_size)
+        measure("blob SHA", server, "feature/bench-push-blob-sha", devops.commit_scripts, args.files, args.file_size)
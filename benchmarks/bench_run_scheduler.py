@@ -0,0 +1,128 @@
+# A refactor batch and work-item generation sharing one deployment quota, measured against the fake client:
+# straight calls (429s fail the scripts), the shared scheduler, and two schedulers that each think they own
+# the whole quota (429s absorbed with Retry-After). Also times a chat run that arrives while the queue is full.
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+from run_scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, RunScheduler, set_default_scheduler
+from message_retrieval import run_and_fetch_reply
+from fake_project_client import FakeProjectClient
+
+PROMPT_CHARS = 4000  # About 1,000 prompt tokens per run
+
+
+def make_prompt():
+    with open("instructions/py-standard-instructions.py", "r", encoding="utf-8") as f:
+        standards = f.read()
+    return ("Refactor this script using our standards:\n" + standards * 10)[:PROMPT_CHARS]
+
+
+def one_run(agents_client, prompt, run):
+    thread = agents_client.create_thread()
+    agents_client.create_message(thread_id=thread.id, role="user", content=prompt)
+    started = time.perf_counter()
+    try:
+        run(thread.id)
+        return time.perf_counter() - started, None
+    except Exception as e:
+        return time.perf_counter() - started, e
+
+
+# Both jobs at once: the refactor batch on `refactor_workers` threads, work items on two more
+def run_jobs(agents_client, prompt, runs, refactor_workers, run_for_job, interactive_at=None):
+    results = {"refactor": [], "work_items": []}
+    interactive = {}
+
+    def chat():
+        time.sleep(interactive_at)
+        interactive["seconds"], interactive["error"] = one_run(agents_client, prompt, run_for_job("chat"))
+
+    started = time.perf_counter()
+    chat_thread = threading.Thread(target=chat) if interactive_at is not None else None
+    if chat_thread is not None:
+        chat_thread.start()
+    with ThreadPoolExecutor(max_workers=refactor_workers + 2) as executor:
+        futures = {
+            job: [executor.submit(one_run, agents_client, prompt, run_for_job(job)) for _ in range(count)]
+            for job, count in (("refactor", runs * 2 // 3), ("work_items", runs - runs * 2 // 3))
+        }
+        for job, job_futures in futures.items():
+            results[job] = [future.result() for future in job_futures]
+    if chat_thread is not None:
+        chat_thread.join()
+    return time.perf_counter() - started, results, interactive
+
+
+def report(label, elapsed, results, agents_client):
+    outcomes = [outcome for job_results in results.values() for outcome in job_results]
+    failed = sum(1 for _, error in outcomes if error is not None)
+    succeeded = len(outcomes) - failed
+    print(f"{label:<34} {elapsed:6.2f}s  {succeeded:>3} ok, {failed:>3} failed, "
+          f"{agents_client.calls.get('rate_limited', 0):>3} 429s, {succeeded / elapsed * 60:6.1f} runs/min")
+
+
+def run(runs, workers, requests_per_minute, tokens_per_minute, run_latency):
+    prompt = make_prompt()
+    quota = {"requests_per_minute": requests_per_minute, "tokens_per_minute": tokens_per_minute}
+    tokens_per_run = (len(prompt) + 300) // 4
+    ceiling = min(requests_per_minute, tokens_per_minute / tokens_per_run)
+    print(f"Quota: {requests_per_minute} requests/min, {tokens_per_minute} tokens/min "
+          f"(~{ceiling:.0f} runs/min at ~{tokens_per_run} tokens per run)\n")
+
+    # Straight create_and_process_run calls, as every script made them before
+    client = FakeProjectClient(run_latency=run_latency, **quota)
+    agents_client = client.agents
+    elapsed, results, _ = run_jobs(
+        agents_client, prompt, runs, workers,
+        lambda job: lambda thread_id: agents_client.create_and_process_run(thread_id=thread_id, assistant_id="asst"),
+    )
+    report("Unscheduled", elapsed, results, agents_client)
+
+    # Everything in one process through the shared scheduler, the chat run arrives 3 seconds in
+    client = FakeProjectClient(run_latency=run_latency, **quota)
+    scheduler = RunScheduler(**quota)
+    previous = set_default_scheduler(scheduler)
+    try:
+        elapsed, results, interactive = run_jobs(
+            client.agents, prompt, runs, workers,
+            lambda job: lambda thread_id: run_and_fetch_reply(
+                client.agents, thread_id, "asst", prompt_text=prompt,
+                priority=PRIORITY_INTERACTIVE if job == "chat" else PRIORITY_BATCH,
+            ),
+            interactive_at=3.0,
+        )
+    finally:
+        set_default_scheduler(previous)
+    report("Shared scheduler", elapsed, results, client.agents)
+    batch_seconds = sorted(seconds for job_results in results.values() for seconds, _ in job_results)
+    print(f"{'':<34} chat run {interactive['seconds']:.2f}s, batch runs median "
+          f"{batch_seconds[len(batch_seconds) // 2]:.2f}s, slowest {batch_seconds[-1]:.2f}s")
+
+    # Two scripts in separate processes, each configured with the whole quota instead of half of it
+    client = FakeProjectClient(run_latency=run_latency, **quota)
+    schedulers = {"refactor": RunScheduler(**quota), "work_items": RunScheduler(**quota)}
+    elapsed, results, _ = run_jobs(
+        client.agents, prompt, runs, workers,
+        lambda job: lambda thread_id: schedulers[job].run(
+            lambda: client.agents.create_and_process_run(thread_id=thread_id, assistant_id="asst"),
+            len(prompt) // 4 + 1000,
+        ),
+    )
+    report("Two schedulers, quota not split", elapsed, results, client.agents)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the rate-limit-aware run scheduler against a fake client.")
+    parser.add_argument("--runs", type=int, default=60, help="Runs across both jobs")
+    parser.add_argument("--workers", type=int, default=6, help="Threads of the refactor batch")
+    parser.add_argument("--requests-per-minute", type=int, default=240)
+    parser.add_argument("--tokens-per-minute", type=int, default=180000)
+    parser.add_argument("--run-latency", type=float, default=0.5, help="Simulated seconds per run")
+    args = parser.parse_args()
+    run(args.runs, args.workers, args.requests_per_minute, args.tokens_per_minute, args.run_latency)
@@ -0,0 +1,87 @@
+# Per-call overhead of building a fresh client and credential vs. the shared client pool
+import os
+import sys
+import time
+import argparse
+from types import SimpleNamespace
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+from project_client_pool import ProjectClientPool
+
+
+class StubCredential:
+    def __init__(self, token_latency):
+        self.token_latency = token_latency
+        self.token_requests = 0
+
+    def get_token(self, *scopes, **kwargs):
+        self.token_requests += 1
+        time.sleep(self.token_latency)
+        return SimpleNamespace(token="stub-token", expires_on=time.time() + 3600)
+
+    def close(self):
+        pass
+
+
+# Mimics AIProjectClient: one bearer token per client and a connection that is cold on first use
+class StubProjectClient:
+    def __init__(self, credential, connect_latency, request_latency):
+        self._credential = credential
+        self._connect_latency = connect_latency
+        self._request_latency = request_latency
+        self._token = None
+        self._connected = False
+        self.agents = SimpleNamespace(create_thread=self._request)
+
+    def _request(self, **kwargs):
+        if self._token is None or self._token.expires_on < time.time():
+            self._token = self._credential.get_token("https://management.azure.com/.default")
+        if not self._connected:
+            time.sleep(self._connect_latency)
+            self._connected = True
+        time.sleep(self._request_latency)
+        return SimpleNamespace(id="thread_stub")
+
+    def close(self):
+        self._connected = False
+
+
+def measure(label, calls, get_client):
+    started = time.perf_counter()
+    for _ in range(calls):
+        get_client().agents.create_thread()
+    per_call_ms = (time.perf_counter() - started) / calls * 1000
+    print(f"{label:<8} {per_call_ms:8.2f} ms/call")
+    return per_call_ms
+
+
+def run(calls, token_latency, connect_latency, request_latency):
+    def make_client(credential, conn_str):
+        return StubProjectClient(credential, connect_latency, request_latency)
+
+    def make_credential():
+        return StubCredential(token_latency)
+
+    # Before: every call builds its own credential and client, like the original scripts
+    def fresh_client():
+        return make_client(make_credential(), "stub-connection-string")
+
+    # After: one lazily built client and cached credential for the whole process
+    pool = ProjectClientPool(client_factory=make_client, credential_factory=make_credential)
+
+    before = measure("before", calls, fresh_client)
+    after = measure("after", calls, lambda: pool.get_client("stub-connection-string"))
+    pool.close()
+
+    print(f"Overhead saved per call: {before - after:.2f} ms ({before / after:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-call client overhead against a local stub.")
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--token-latency", type=float, default=0.05, help="Simulated seconds per token acquisition")
+    parser.add_argument("--connect-latency", type=float, default=0.03, help="Simulated seconds per cold connection")
+    parser.add_argument("--request-latency", type=float, default=0.005, help="Simulated seconds per warm request")
+    args = parser.parse_args()
+    run(args.calls, args.token_latency, args.connect_latency, args.request_latency)
@@ -0,0 +1,49 @@
+# Throughput of the local standards checker on a large synthetic corpus built from the broken example script
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+from standards_checker import check_file
+
+SOURCE_SCRIPT = "broken-scripts/py-nonstandard-script.py"
+
+
+def make_corpus(root, files, scale):
+    with open(SOURCE_SCRIPT, "r", encoding="utf-8") as f:
+        source = f.read()
+
+    # Repeat the script `scale` times per file, renaming so every copy is a distinct definition
+    body = "\n\n".join(source.replace("myclass", f"myclass{copy}") for copy in range(scale))
+    for index in range(files):
+        with open(os.path.join(root, f"script_{index}.py"), "w", encoding="utf-8") as f:
+            f.write(body)
+
+
+def run(files, scale):
+    work_dir = tempfile.mkdtemp(prefix="bench_standards_checker_")
+    try:
+        make_corpus(work_dir, files, scale)
+        paths = [os.path.join(work_dir, name) for name in os.listdir(work_dir)]
+
+        started = time.perf_counter()
+        violations = sum(len(check_file(path)) for path in paths)
+        elapsed = time.perf_counter() - started
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    lines = files * scale * 35
+    print(f"Checked {files} files (~{lines} lines) in {elapsed:.2f}s: "
+          f"{files / elapsed:.0f} files/s, {lines / elapsed:.0f} lines/s, {violations} violations")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the local standards checker.")
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--scale", type=int, default=1, help="Copies of the example script per file")
+    args = parser.parse_args()
+    run(args.files, args.scale)
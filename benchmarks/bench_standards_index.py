@@ -0,0 +1,52 @@
+# Build, reload and query cost of the local standards index
+import os
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+
+import standards_index
+from standards_index import load_index
+
+STANDARDS_FILES = ["instructions/py-standard-instructions.py", "instructions/java-standard-instructions.java"]
+QUERIES = [
+    "bare except and comparisons to None",
+    "Read a CSV file, validate every row and log errors",
+    "class myclass: def MyFunction(self): from math import *",
+]
+
+
+def run(iterations=2000):
+    index_dir = tempfile.mkdtemp(prefix="bench_standards_index_")
+    try:
+        for standards_path in STANDARDS_FILES:
+            started = time.perf_counter()
+            index = load_index(standards_path, index_dir)
+            build_seconds = time.perf_counter() - started
+
+            # Drop the in-memory copy to measure loading the pickled index
+            standards_index._loaded.clear()
+            started = time.perf_counter()
+            load_index(standards_path, index_dir)
+            load_seconds = time.perf_counter() - started
+
+            latencies = []
+            for iteration in range(iterations):
+                query = QUERIES[iteration % len(QUERIES)]
+                started = time.perf_counter()
+                index.search(query)
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+
+            print(f"{standards_path}: {len(index.rules)} rules, build {build_seconds * 1000:.2f}ms, "
+                  f"pickled load {load_seconds * 1000:.2f}ms, query p50 {statistics.median(latencies) * 1e6:.1f}µs, "
+                  f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.1f}µs")
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,284 @@
+# Offline benchmark suite: drives chat, refactor, agent setup and the work item flow against the fake
+# AIProjectClient and the fake ADO server at a chosen concurrency, and reports latency percentiles and
+# throughput as JSON, so runs on different commits can be compared (--baseline).
+import os
+import io
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(REPO_ROOT, "agents"))
+sys.path.append(os.path.join(REPO_ROOT, "devops_tasks"))
+
+import chat_with_agent as chat
+import chat_with_agent_refactor as refactor
+import setup_agents as setup
+import automate_devops_tasks as devops
+from project_client_pool import ProjectClientPool, set_default_pool
+from run_scheduler import RunScheduler, set_default_scheduler
+from upload_registry import UploadRegistry
+from fake_ado_server import FakeAdoServer
+from fake_project_client import FakeProjectClient
+
+SCENARIOS = ["chat", "refactor", "setup", "devops"]
+PERCENTILES = [50, 95, 99]
+FIRST_WORK_ITEM_ID = 8001
+REFACTOR_INPUT = os.path.join(REPO_ROOT, "broken-scripts", "py-nonstandard-script.py")
+# Latency and throughput changes beyond this share are flagged in the comparison
+SIGNIFICANT_CHANGE = 0.10
+
+
+# Nearest-rank percentile
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(driven, concurrency, rate_limited, extra=None):
+    latencies, seconds = sorted(driven["latencies"]), driven["seconds"]
+    summary = {
+        "requests": len(latencies) + len(driven["errors"]),
+        "concurrency": concurrency,
+        "succeeded": len(latencies),
+        "failed": len(driven["errors"]),
+        "errors": sorted(set(driven["errors"]))[:5],  # A few distinct ones, enough to see what broke
+        "rate_limited": rate_limited,
+        "seconds": round(seconds, 3),
+        "throughput_per_second": round(len(latencies) / seconds, 3) if seconds else None,
+        "latency_seconds": {
+            **{f"p{percent}": round(percentile(latencies, percent), 4) if latencies else None for percent in PERCENTILES},
+            "mean": round(sum(latencies) / len(latencies), 4) if latencies else None,
+            "max": round(latencies[-1], 4) if latencies else None,
+        },
+    }
+    summary.update(extra or {})
+    return summary
+
+
+# Calls operation(index) for every index with `concurrency` at a time; a run that raises failed
+def drive(operation, indexes, concurrency):
+    def timed(index):
+        started = time.perf_counter()
+        try:
+            operation(index)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return error, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, indexes))
+    return {
+        "latencies": [latency for error, latency in results if error is None],
+        "errors": [error for error, _ in results if error is not None],
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def require(result, error):
+    if not result:
+        raise Exception(error)
+    return result
+
+
+def install_agent(agent_options, **overrides):
+    client = FakeProjectClient(**{**agent_options, **overrides})
+    set_default_pool(ProjectClientPool(client_factory=lambda credential, conn_str: client,
+                                       credential_factory=lambda: None))
+    return client
+
+
+def bench_chat(args, agent_options, work_dir):
+    client = install_agent(agent_options)
+    driven = drive(lambda _: chat.chat_with_agent("asst", stream=False), range(args.requests), args.concurrency)
+    return summarize(driven, args.concurrency, client.agents.calls.get("rate_limited", 0))
+
+
+def bench_refactor(args, agent_options, work_dir):
+    client = install_agent(agent_options, echo_code=True)
+    refactor.INSTRUCTIONS_FILE_PATH = os.path.join(REPO_ROOT, refactor.INSTRUCTIONS_FILE_PATH)
+    refactor.STANDARDS_FILE_PATH = os.path.join(REPO_ROOT, refactor.STANDARDS_FILE_PATH)
+    refactor.RESULT_CACHE.cache_dir = os.path.join(work_dir, "refactor_cache")
+    refactor.UPLOAD_REGISTRY = UploadRegistry(os.path.join(work_dir, "refactor_uploads.json"))
+
+    # A distinct copy per request, so none of them is answered from the result cache
+    with open(REFACTOR_INPUT, "r", encoding="utf-8") as f:
+        source = f.read()
+    os.makedirs("inputs", exist_ok=True)
+    for index in range(args.requests):
+        with open(f"inputs/script_{index}.py", "w", encoding="utf-8") as f:
+            f.write(f"# Copy {index}\n{source}")
+
+    driven = drive(
+        lambda index: require(refactor.chat_with_agent_refactor("asst", f"inputs/script_{index}.py",
+                                                                f"refactored/script_{index}.py", "vs"),
+                              "No refactored code returned"),
+        range(args.requests), args.concurrency,
+    )
+    return summarize(driven, args.concurrency, client.agents.calls.get("rate_limited", 0))
+
+
+# The first setup creates the agents and vector stores; the rest are redeploys that should find them unchanged
+def bench_setup(args, agent_options, work_dir):
+    client = install_agent(agent_options)
+    setup.UPLOAD_REGISTRY = UploadRegistry(os.path.join(work_dir, "standards_uploads.json"), max_age_seconds=None)
+    setup.AGENT_SPECS = [
+        {**spec, "instructions_file_path": os.path.join(REPO_ROOT, spec["instructions_file_path"]),
+         "standards_file_path": os.path.join(REPO_ROOT, spec["standards_file_path"]),
+         "model": spec["model"] or "fake-model"}
+        for spec in setup.AGENT_SPECS
+    ]
+
+    cold = drive(lambda _: setup.setup_agents(), [0], 1)
+    driven = drive(lambda _: setup.setup_agents(), range(1, args.requests), args.concurrency)
+    driven["errors"] += cold["errors"]
+    return summarize(driven, args.concurrency, client.agents.calls.get("rate_limited", 0),
+                     {"cold_seconds": round(cold["seconds"], 3)})
+
+
+def bench_devops(args, agent_options, work_dir):
+    client = install_agent(agent_options)
+    devops.INSTRUCTIONS_FILE_PATH = os.path.join(REPO_ROOT, devops.INSTRUCTIONS_FILE_PATH)
+    devops.STANDARDS_FILE_PATH = os.path.join(REPO_ROOT, devops.STANDARDS_FILE_PATH)
+    devops.RESULT_CACHE.cache_dir = os.path.join(work_dir, "devops_cache")
+    devops.CHECKPOINTS.path = os.path.join(work_dir, "checkpoints.db")
+    devops.ADO_PAT, devops.ADO_REPO, devops.AGENT_ID = "pat", "repo", "asst"
+
+    with FakeAdoServer(latency=args.ado_latency) as server:
+        devops.ADO_BASE_URL = server.base_url
+        work_item_ids = list(range(FIRST_WORK_ITEM_ID, FIRST_WORK_ITEM_ID + args.requests))
+        for work_item_id in work_item_ids:
+            server.state.add_work_item(work_item_id, f"Ticket {work_item_id}",
+                                       f"Parse orders_{work_item_id}.csv and print the total per customer")
+        if args.ado_429s:
+            server.inject_failures(args.ado_429s, status=429, retry_after=1)
+
+        def process(work_item_id):
+            outcome = devops.process_work_item(work_item_id)
+            require(outcome["status"] == "succeeded", f"{outcome['stage']}: {outcome['error']}")
+
+        driven = drive(process, work_item_ids, args.concurrency)
+        ado_requests = sum(server.state.requests.values())
+    return summarize(driven, args.concurrency, client.agents.calls.get("rate_limited", 0),
+                     {"ado_requests": ado_requests, "ado_retries": devops.get_ado_client().retries})
+
+
+BENCHMARKS = {"chat": bench_chat, "refactor": bench_refactor, "setup": bench_setup, "devops": bench_devops}
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def run(args):
+    agent_options = {
+        "run_latency": args.run_latency,
+        "request_latency": args.request_latency,
+        "upload_latency": args.request_latency,
+        "output_tokens_per_second": args.tokens_per_second,
+        "rate_limit_ratio": args.rate_limit_ratio,
+        "seed": args.seed,
+    }
+    # Only the fake's injected 429s slow runs down, the scheduler's own quota is out of the way
+    set_default_scheduler(RunScheduler(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+
+    commit, dirty = git_commit()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {name: value for name, value in vars(args).items() if name not in ("output", "baseline")},
+        "scenarios": {},
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="bench_suite_")
+    cwd = os.getcwd()
+    os.chdir(work_dir)  # Generated and refactored scripts, caches and checkpoints all land in the scratch directory
+    try:
+        for name in args.scenarios:
+            with redirect_stdout(io.StringIO()):
+                report["scenarios"][name] = BENCHMARKS[name](args, agent_options, work_dir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+
+def print_report(report):
+    print(f"Commit {report['commit'] or 'unknown'}{' (uncommitted changes)' if report['dirty'] else ''}\n")
+    print(f"{'Scenario':<9} {'ok':>5} {'failed':>6} {'429s':>5} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'per second':>11}")
+    for name, result in report["scenarios"].items():
+        latency = result["latency_seconds"]
+        print(f"{name:<9} {result['succeeded']:>5} {result['failed']:>6} {result['rate_limited']:>5} "
+              + " ".join(f"{latency[f'p{percent}'] or 0:>7.3f}" for percent in PERCENTILES)
+              + f" {result['throughput_per_second'] or 0:>11.2f}")
+
+
+# Baseline → current for the headline numbers of every scenario both reports have
+def print_comparison(report, baseline):
+    print(f"\nAgainst {baseline.get('commit') or 'baseline'}:")
+    for name, result in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        metrics = [(f"p{percent}", result["latency_seconds"][f"p{percent}"], previous["latency_seconds"][f"p{percent}"],
+                    False) for percent in PERCENTILES]
+        metrics.append(("per second", result["throughput_per_second"], previous["throughput_per_second"], True))
+        cells = []
+        for label, current, before, higher_is_better in metrics:
+            if not current or not before:
+                cells.append(f"{label} n/a")
+                continue
+            change = (current - before) / before
+            better = change > 0 if higher_is_better else change < 0
+            flag = ("✅" if better else "⚠️") if abs(change) >= SIGNIFICANT_CHANGE else "  "
+            cells.append(f"{label} {before:.3f} → {current:.3f} ({change:+.0%}) {flag}")
+        print(f"   {name:<9} " + ", ".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the agent scripts offline against fake Azure services.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=40, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at the same time")
+    parser.add_argument("--run-latency", type=float, default=0.3, help="Seconds the fake agent takes per run")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="Fake agent output speed, 0 = instant")
+    parser.add_argument("--request-latency", type=float, default=0.01, help="Round trip of every fake agent call")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="Share of runs answered with a 429")
+    parser.add_argument("--ado-latency", type=float, default=0.02, help="Round trip of the fake ADO server")
+    parser.add_argument("--ado-429s", type=int, default=0, help="ADO requests answered with a 429 before the rest")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the injected 429s")
+    parser.add_argument("--output", help="Write the JSON report here instead of printing it")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    print_report(report)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📝 Report saved to: {args.output}")
+    else:
+        print("\n" + json.dumps(report, indent=2))
@@ -0,0 +1,104 @@
+# Cost of tracing (off, and on with the JSON-lines exporter) on chats against an instant fake agent,
+# then a traced work item run with realistic latencies, summarized per span to show where the time goes
+import os
+import io
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from contextlib import redirect_stdout
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "devops_tasks"))
+
+import tracing
+import chat_with_agent as chat
+import automate_devops_tasks as devops
+from project_client_pool import ProjectClientPool, set_default_pool
+from run_scheduler import RunScheduler, set_default_scheduler
+from fake_ado_server import FakeAdoServer
+from fake_project_client import FakeProjectClient
+
+WORK_ITEM_ID = 6001
+
+
+# Clients are wrapped when the pool creates them, so the pool is rebuilt after the tracer changes
+def install_agent(**options):
+    set_default_pool(ProjectClientPool(client_factory=lambda credential, conn_str: FakeProjectClient(**options),
+                                       credential_factory=lambda: None))
+
+
+def chats_per_second(calls, rounds):
+    install_agent(run_latency=0.0, upload_latency=0.0)
+    rates = []
+    with redirect_stdout(io.StringIO()):
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(calls):
+                chat.chat_with_agent("asst", stream=False)
+            rates.append(calls / (time.perf_counter() - started))
+    return statistics.median(rates)
+
+
+def noop_span_seconds(iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with tracing.span("noop", size=1):
+            pass
+    return (time.perf_counter() - started) / iterations
+
+
+def measure_overhead(work_dir, calls, rounds):
+    tracing.set_default_tracer(None)
+    untraced = chats_per_second(calls, rounds)
+    noop_seconds = noop_span_seconds(100000)
+
+    trace_path = os.path.join(work_dir, "overhead.jsonl")
+    tracing.set_default_tracer(tracing.tracer_for(trace_path))
+    traced = chats_per_second(calls, rounds)
+    tracing.get_tracer().close()
+    tracing.set_default_tracer(None)
+    with open(trace_path, "r", encoding="utf-8") as f:
+        spans_per_chat = sum(1 for _ in f) / (calls * rounds)
+
+    print(f"Disabled span():             {noop_seconds * 1e9:8.0f} ns per span")
+    print(f"Chats, tracing off:          {untraced:8.0f} per second ({1e6 / untraced:.0f} µs each)")
+    print(f"Chats, JSON-lines trace:     {traced:8.0f} per second ({1e6 / traced:.0f} µs each, "
+          f"{spans_per_chat:.0f} spans per chat)")
+    print(f"Added per traced chat:       {1e6 / traced - 1e6 / untraced:8.0f} µs\n")
+
+
+def traced_work_item(work_dir, run_latency, ado_latency):
+    trace_path = os.path.join(work_dir, "work_item.jsonl")
+    tracing.set_default_tracer(tracing.tracer_for(trace_path))
+    install_agent(run_latency=run_latency, request_latency=0.02, output_tokens_per_second=100)
+    devops.RESULT_CACHE.cache_dir = os.path.join(work_dir, "results")
+    devops.CHECKPOINTS.path = os.path.join(work_dir, "checkpoints.db")
+    devops.ADO_PAT, devops.ADO_REPO, devops.AGENT_ID = "pat", "repo", "asst"
+
+    with FakeAdoServer(latency=ado_latency) as server:
+        devops.ADO_BASE_URL = server.base_url
+        server.state.add_work_item(WORK_ITEM_ID, "Customer totals", "Parse orders.csv and print the total per customer")
+        server.inject_failures(1, status=429, retry_after=0.2)  # One throttled request shows up as a retry
+        with redirect_stdout(io.StringIO()):
+            outcome = devops.process_work_item(WORK_ITEM_ID, script_path=f"{work_dir}/script_{WORK_ITEM_ID}.java")
+    tracing.get_tracer().close()
+    tracing.set_default_tracer(None)
+
+    print(f"Traced work item {WORK_ITEM_ID}: {outcome['status']} in {outcome['seconds']}s\n")
+    tracing.summarize(trace_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure tracing overhead and show a traced work item run.")
+    parser.add_argument("--calls", type=int, default=2000, help="Chats per round in the overhead test")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--run-latency", type=float, default=1.0, help="Fake agent run time for the work item")
+    parser.add_argument("--ado-latency", type=float, default=0.05, help="Fake ADO round trip for the work item")
+    args = parser.parse_args()
+
+    set_default_scheduler(RunScheduler(requests_per_minute=10 ** 9, tokens_per_minute=10 ** 12))
+    work_dir = tempfile.mkdtemp(prefix="bench_tracing_")
+    measure_overhead(work_dir, args.calls, args.rounds)
+    traced_work_item(work_dir, args.run_latency, args.ado_latency)
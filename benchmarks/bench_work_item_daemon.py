@@ -0,0 +1,119 @@
+# Ticket-to-PR latency of the work item daemon against the fake ADO server and fake agent:
+# tickets arrive while it runs, one fails its first pull request and is retried, one is updated afterwards
+# and goes to the same branch, and a restart must not redo anything
+import os
+import sys
+import shutil
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "devops_tasks"))
+
+import automate_devops_tasks as devops
+import work_item_daemon
+from project_client_pool import ProjectClientPool, set_default_pool
+from run_scheduler import RunScheduler, set_default_scheduler
+from work_item_daemon import WorkItemDaemon
+from fake_ado_server import FakeAdoServer
+from fake_project_client import FakeProjectClient
+
+FIRST_WORK_ITEM_ID = 9001
+WIQL = "SELECT [System.Id] FROM WorkItems WHERE [System.State] = 'New'"
+
+
+def wait_for(condition, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run(tickets, workers, poll_interval, arrival_seconds, run_latency, ado_latency):
+    work_dir = tempfile.mkdtemp(prefix="bench_work_item_daemon_")
+    cwd = os.getcwd()
+    os.chdir(work_dir)  # Generated scripts land in the scratch directory
+    try:
+        clients = []
+
+        def client_factory(conn_str, credential):
+            clients.append(FakeProjectClient(run_latency=run_latency))
+            return clients[-1]
+
+        set_default_pool(ProjectClientPool(client_factory=client_factory, credential_factory=lambda: None))
+        set_default_scheduler(RunScheduler(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+        devops.RESULT_CACHE.cache_dir = os.path.join(work_dir, "results")
+        devops.CHECKPOINTS.path = os.path.join(work_dir, "checkpoints.db")
+        devops.ADO_PAT, devops.ADO_REPO, devops.AGENT_ID = "pat", "repo", "asst"
+        work_item_daemon.RETRY_BACKOFF_SECONDS = poll_interval
+        work_item_ids = list(range(FIRST_WORK_ITEM_ID, FIRST_WORK_ITEM_ID + tickets))
+
+        # The PR service is down the first time the second ticket gets there
+        create_pull_request = devops.create_pull_request
+        flaky = {work_item_ids[1]}
+
+        def flaky_create_pull_request(branch_name, work_item_id):
+            if work_item_id in flaky:
+                flaky.discard(work_item_id)
+                return None
+            return create_pull_request(branch_name, work_item_id)
+
+        devops.create_pull_request = flaky_create_pull_request
+
+        with FakeAdoServer(latency=ado_latency) as server:
+            devops.ADO_BASE_URL = server.base_url
+            state_path = os.path.join(work_dir, "daemon.json")
+            daemon = WorkItemDaemon(WIQL, workers, poll_interval, state_path)
+            runner = threading.Thread(target=daemon.run)
+            runner.start()
+
+            for work_item_id in work_item_ids:
+                server.state.add_work_item(work_item_id, f"Ticket {work_item_id}", "Parse a CSV file and print totals")
+                time.sleep(arrival_seconds)
+            finished = wait_for(lambda: daemon.counters["succeeded"] >= tickets, 120)
+
+            # The agent writes different code for the new text, so the update is a second push to the same branch
+            for client in clients:
+                client.agents.reply = client.agents.reply.replace("len(numbers)", "max(len(numbers), 1)")
+            server.state.update_work_item(work_item_ids[0], **{"System.Description": "Also print the averages"})
+            updated = wait_for(lambda: daemon.counters["succeeded"] >= tickets + 1, 60)
+            metrics = daemon.metrics()
+            daemon.stop()
+            runner.join()
+
+            restarted = WorkItemDaemon(WIQL, workers, poll_interval, state_path)
+            redone = restarted.poll_once()
+            branches = sorted(ref for ref in server.state.refs if f"workitem-{work_item_ids[0]}" in ref)
+            pushes = sum(1 for push in server.state.pushes if push["refUpdates"][0]["name"] in branches)
+            pull_requests = sum(1 for pull_request in server.state.pull_requests
+                                if pull_request["sourceRefName"] in branches)
+        devops.create_pull_request = create_pull_request
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n{tickets} tickets, one every {arrival_seconds}s, {workers} workers, polling every {poll_interval}s")
+    print(f"Processed: {metrics['counters']['succeeded']} succeeded, {metrics['counters']['failed']} failed, "
+          f"{metrics['counters']['retried']} retried ({metrics['counters']['polls']} polls)")
+    print(f"{'Stage':<14} {'count':>5} {'p50':>7} {'p95':>7} {'max':>7}")
+    for stage, latency in metrics["stage_latency"].items():
+        print(f"{stage:<14} {latency['count']:>5} {latency['p50']:>6.2f}s {latency['p95']:>6.2f}s {latency['max']:>6.2f}s")
+    print(f"All tickets done: {'yes' if finished else 'no'}, update picked up: {'yes' if updated else 'no'} "
+          f"(branches {', '.join(branches)}: {pushes} pushes, {pull_requests} pull request)")
+    print(f"Work items redone after a restart: {redone}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the work item daemon against fake ADO and agent services.")
+    parser.add_argument("--tickets", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--arrival-seconds", type=float, default=0.2, help="Time between two new tickets")
+    parser.add_argument("--run-latency", type=float, default=1.0, help="Simulated seconds per agent run")
+    parser.add_argument("--ado-latency", type=float, default=0.02, help="Simulated seconds per ADO request")
+    args = parser.parse_args()
+    run(args.tickets, args.workers, args.poll_interval, args.arrival_seconds, args.run_latency, args.ado_latency)
@@ -0,0 +1,226 @@
+# Local stand-in for the Azure DevOps REST API, so the DevOps flow can be exercised offline
+import re
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ORG = "fake-org"
+PROJECT = "fake-project"
+INITIAL_COMMIT_ID = "1" * 40
+CHANGED_SINCE_PATTERN = re.compile(r"\[System\.ChangedDate\]\s*>=\s*'([^']+)'", re.IGNORECASE)
+
+
+def changed_date_now():
+    now = time.time()
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(now)) + f".{int(now % 1 * 1000):03d}Z"
+
+
+class FakeAdoState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.work_items = {}
+        self.refs = {"refs/heads/main": INITIAL_COMMIT_ID}
+        self.items = {}  # (branch, path) -> content
+        self.pushes = []
+        self.pull_requests = []
+        self.requests = {}  # endpoint -> count
+        self.connections = 0
+        self.failures = []  # queued (status, retry_after) responses to inject
+
+    def add_work_item(self, work_item_id, title, description=""):
+        with self.lock:
+            self.work_items[int(work_item_id)] = {
+                "id": int(work_item_id),
+                "rev": 1,
+                "fields": {
+                    "System.Id": int(work_item_id),
+                    "System.Rev": 1,
+                    "System.Title": title,
+                    "System.Description": description,
+                    "System.ChangedDate": changed_date_now(),
+                },
+            }
+
+    def update_work_item(self, work_item_id, **fields):
+        with self.lock:
+            work_item = self.work_items[int(work_item_id)]
+            work_item["rev"] += 1
+            work_item["fields"].update(fields)
+            work_item["fields"]["System.Rev"] = work_item["rev"]
+            work_item["fields"]["System.ChangedDate"] = changed_date_now()
+
+
+class FakeAdoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real service
+    disable_nagle_algorithm = True  # Avoid delayed-ACK stalls on reused connections
+
+    def setup(self):
+        super().setup()
+        with self.server.state.lock:
+            self.server.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        payload = json.dumps(body if body is not None else {}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def _handle(self, method):
+        state = self.server.state
+        url = urlparse(self.path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        body = self._read_json() if method == "POST" else None
+        path = url.path.split("/_apis/", 1)[-1]
+        endpoint = re.sub(r"/\d+$", "/{id}", re.sub(r"repositories/[^/]+", "repositories/{repo}", path))
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        with state.lock:
+            state.requests[f"{method} {endpoint}"] = state.requests.get(f"{method} {endpoint}", 0) + 1
+            failure = state.failures.pop(0) if state.failures else None
+        if failure is not None:
+            status, retry_after = failure
+            headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+            return self._send(status, {"message": "Injected failure"}, headers)
+
+        route = getattr(self, f"_{method.lower()}_{endpoint.replace('/', '_').replace('{', '').replace('}', '')}", None)
+        if route is None:
+            return self._send(404, {"message": f"No fake route for {method} {path}"})
+        return route(path, query, body)
+
+    # GET wit/workitems/{id}
+    def _get_wit_workitems_id(self, path, query, body):
+        work_item = self.server.state.work_items.get(int(path.rsplit("/", 1)[1]))
+        if work_item is None:
+            return self._send(404, {"message": "Work item not found"})
+        return self._send(200, work_item)
+
+    # POST wit/wiql, only the ChangedDate condition is understood, every other condition matches
+    def _post_wit_wiql(self, path, query, body):
+        changed_since = CHANGED_SINCE_PATTERN.search(body["query"])
+        with self.server.state.lock:
+            ids = sorted(
+                work_item_id for work_item_id, work_item in self.server.state.work_items.items()
+                if changed_since is None or work_item["fields"]["System.ChangedDate"] >= changed_since.group(1)
+            )
+        return self._send(200, {"workItems": [{"id": work_item_id} for work_item_id in ids]})
+
+    # POST wit/workitemsbatch
+    def _post_wit_workitemsbatch(self, path, query, body):
+        if len(body["ids"]) > 200:
+            return self._send(400, {"message": "At most 200 IDs per batch"})
+        with self.server.state.lock:
+            work_items = [self.server.state.work_items.get(work_item_id) for work_item_id in body["ids"]]
+        return self._send(200, {"count": len(work_items), "value": work_items})
+
+    # GET git/repositories/{repo}/commits
+    def _get_git_repositories_repo_commits(self, path, query, body):
+        branch = query.get("searchCriteria.itemVersion.version", "main")
+        commit_id = self.server.state.refs.get(f"refs/heads/{branch}")
+        return self._send(200, {"count": int(commit_id is not None), "value": [{"commitId": commit_id}] if commit_id else []})
+
+    # POST git/repositories/{repo}/refs
+    def _post_git_repositories_repo_refs(self, path, query, body):
+        state = self.server.state
+        results = []
+        with state.lock:
+            for update in body:
+                current = state.refs.get(update["name"], "0" * 40)
+                success = current == update["oldObjectId"]
+                if success:
+                    state.refs[update["name"]] = update["newObjectId"]
+                results.append({"name": update["name"], "success": success})
+        if not all(result["success"] for result in results):
+            return self._send(409, {"value": results, "message": "Ref update conflict"})
+        return self._send(200, {"value": results})
+
+    # GET git/repositories/{repo}/items
+    def _get_git_repositories_repo_items(self, path, query, body):
+        branch = query.get("versionDescriptor.version", "main")
+        with self.server.state.lock:
+            content = self.server.state.items.get((branch, query.get("path")))
+        if content is None:
+            return self._send(404, {"message": "Item not found"})
+        data = content.encode("utf-8")
+        object_id = hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+        return self._send(200, {"path": query.get("path"), "objectId": object_id, "gitObjectType": "blob"})
+
+    # POST git/repositories/{repo}/pushes
+    def _post_git_repositories_repo_pushes(self, path, query, body):
+        state = self.server.state
+        with state.lock:
+            ref_update = body["refUpdates"][0]
+            branch = ref_update["name"].replace("refs/heads/", "")
+            if state.refs.get(ref_update["name"]) != ref_update["oldObjectId"]:
+                return self._send(409, {"message": "Stale oldObjectId"})
+            for commit in body["commits"]:
+                for change in commit["changes"]:
+                    exists = (branch, change["item"]["path"]) in state.items
+                    if exists != (change["changeType"] == "edit"):
+                        return self._send(400, {"message": f"Bad changeType for {change['item']['path']}"})
+                    state.items[(branch, change["item"]["path"])] = change["newContent"]["content"]
+            commit_id = hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+            state.refs[ref_update["name"]] = commit_id
+            state.pushes.append(body)
+            push_id = len(state.pushes)
+        return self._send(201, {"pushId": push_id, "commits": [{"commitId": commit_id}]})
+
+    # POST git/repositories/{repo}/pullrequests
+    def _post_git_repositories_repo_pullrequests(self, path, query, body):
+        state = self.server.state
+        with state.lock:
+            state.pull_requests.append(body)
+            pr_id = len(state.pull_requests)
+        return self._send(201, {"pullRequestId": pr_id, "url": f"{self.server.base_url}/git/pullrequests/{pr_id}"})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class FakeAdoServer:
+    def __init__(self, latency=0.0):
+        self.state = FakeAdoState()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeAdoHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self.httpd.latency = latency
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}/{ORG}/{PROJECT}/_apis"
+        self.httpd.base_url = self.base_url
+        self._thread = None
+
+    def inject_failures(self, count, status=429, retry_after=None):
+        with self.state.lock:
+            self.state.failures.extend([(status, retry_after)] * count)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_details):
+        self.stop()
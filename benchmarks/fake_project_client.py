@@ -0,0 +1,443 @@
+# Local stand-in for AIProjectClient so agent scripts can be measured without Azure
+import re
+import math
+import time
+import random
+import asyncio
+import collections
+import itertools
+import threading
+from types import SimpleNamespace
+
+FAKE_REPLY = (
+    "Here is the refactored script:\n\n"
+    "```python\n"
+    "def calculate_average(numbers: list) -> float:\n"
+    "    \"\"\"Returns the average of a list of numbers.\"\"\"\n"
+    "    return sum(numbers) / len(numbers)\n"
+    "```\n"
+)
+
+# IDs are unique across fake clients, like the service's, so per-thread state kept by the scripts never mixes up runs
+_IDS = itertools.count(1)
+
+
+# Seconds a run takes to produce `reply`
+def generation_seconds(reply, run_latency, seconds_per_output_line=0.0, output_tokens_per_second=None):
+    seconds = run_latency + seconds_per_output_line * reply.count("\n")
+    if output_tokens_per_second:
+        seconds += len(reply) / 4 / output_tokens_per_second
+    return seconds
+
+
+class FakeRateLimitError(Exception):
+    # Shaped like azure.core HttpResponseError for a 429
+    def __init__(self, retry_after):
+        super().__init__(f"(429) Rate limit is exceeded. Try again in {retry_after} seconds.")
+        self.status_code = 429
+        self.response = SimpleNamespace(headers={"Retry-After": str(retry_after)})
+
+
+class FakeAgentsOperations:
+    def __init__(self, run_latency=0.5, upload_latency=0.1, reply=FAKE_REPLY, echo_code=False,
+                 seconds_per_output_line=0.0, request_latency=0.0, index_latency=0.0,
+                 requests_per_minute=None, tokens_per_minute=None, rate_limit_window=10.0,
+                 output_tokens_per_second=None, rate_limit_ratio=0.0, retry_after=1, seed=None):
+        self.run_latency = run_latency
+        self.upload_latency = upload_latency
+        self.request_latency = request_latency  # Round trip added to every call
+        self.index_latency = index_latency  # Time to index a file into a vector store
+        self.reply = reply
+        self.echo_code = echo_code  # Reply with the last code block of the prompt instead of `reply`
+        self.seconds_per_output_line = seconds_per_output_line  # Generation time grows with the reply
+        # Deployment quota, enforced like the service: its share per sliding window, 429 with Retry-After beyond
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.rate_limit_window = rate_limit_window
+        self.output_tokens_per_second = output_tokens_per_second  # Generation speed, None = instant replies
+        # Injected 429s on top of the quota: a share of all runs, plus a fixed number queued with inject_rate_limits
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._injected_rate_limits = 0
+        self._recent_runs = collections.deque()  # (time, tokens) of the runs inside the window
+        self.calls = {}
+        self.prompt_tokens = []  # Prompt tokens of every run, in order
+        self.agent_runs = collections.Counter()  # Runs per assistant ID
+        self._lock = threading.Lock()
+        self._threads = {}
+        self._files = {}
+        self._agents = {}
+        self._vector_stores = {}
+        self._batches = {}
+
+    def _next_id(self, prefix):
+        with self._lock:
+            return f"{prefix}_{next(_IDS)}"
+
+    def _record(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.request_latency:
+            time.sleep(self.request_latency)
+
+    def inject_rate_limits(self, count):
+        with self._lock:
+            self._injected_rate_limits += count
+
+    def _check_quota(self, tokens):
+        with self._lock:
+            injected = self._injected_rate_limits > 0 or (
+                self.rate_limit_ratio and self._random.random() < self.rate_limit_ratio
+            )
+            if injected:
+                self._injected_rate_limits = max(0, self._injected_rate_limits - 1)
+                self.calls["rate_limited"] = self.calls.get("rate_limited", 0) + 1
+        if injected:
+            raise FakeRateLimitError(self.retry_after)
+        if self.requests_per_minute is None and self.tokens_per_minute is None:
+            return
+        share = self.rate_limit_window / 60.0
+        with self._lock:
+            now = time.time()
+            while self._recent_runs and self._recent_runs[0][0] <= now - self.rate_limit_window:
+                self._recent_runs.popleft()
+            over_requests = (
+                self.requests_per_minute is not None and len(self._recent_runs) + 1 > self.requests_per_minute * share
+            )
+            over_tokens = (
+                self.tokens_per_minute is not None
+                and sum(used for _, used in self._recent_runs) + tokens > self.tokens_per_minute * share
+            )
+            if over_requests or over_tokens:
+                self.calls["rate_limited"] = self.calls.get("rate_limited", 0) + 1
+                oldest = self._recent_runs[0][0] if self._recent_runs else now
+                raise FakeRateLimitError(max(1, math.ceil(oldest + self.rate_limit_window - now)))
+            self._recent_runs.append((now, tokens))
+
+    def _get(self, resources, resource_id):
+        with self._lock:
+            if resource_id not in resources:
+                raise LookupError(f"No such resource: {resource_id}")
+            return resources[resource_id]
+
+    def _page(self, resources, limit=20, order="desc", after=None):
+        with self._lock:
+            data = [{"id": resource.id, "name": resource.name} for resource in resources.values()]
+        if order == "desc":
+            data.reverse()
+        if after is not None:
+            ids = [item["id"] for item in data]
+            data = data[ids.index(after) + 1:] if after in ids else data
+        return {"data": data[:limit], "has_more": len(data) > limit}
+
+    def create_agent(self, model, name=None, instructions=None, tools=None, tool_resources=None, metadata=None,
+                     **kwargs):
+        self._record("create_agent")
+        agent = SimpleNamespace(
+            id=self._next_id("asst"), model=model, name=name, instructions=instructions, tools=tools,
+            tool_resources=tool_resources, metadata=dict(metadata or {}),
+        )
+        with self._lock:
+            self._agents[agent.id] = agent
+        return agent
+
+    def get_agent(self, assistant_id, **kwargs):
+        self._record("get_agent")
+        return self._get(self._agents, assistant_id)
+
+    def update_agent(self, assistant_id, **kwargs):
+        self._record("update_agent")
+        agent = self._get(self._agents, assistant_id)
+        with self._lock:
+            for key, value in kwargs.items():
+                setattr(agent, key, dict(value) if key == "metadata" else value)
+        return agent
+
+    def delete_agent(self, assistant_id, **kwargs):
+        self._record("delete_agent")
+        with self._lock:
+            self._agents.pop(assistant_id, None)
+
+    def list_agents(self, **kwargs):
+        self._record("list_agents")
+        return self._page(self._agents, **kwargs)
+
+    def create_vector_store_and_poll(self, file_ids=None, name=None, metadata=None, **kwargs):
+        self._record("create_vector_store_and_poll")
+        time.sleep(self.index_latency * len(file_ids or []))
+        vector_store = SimpleNamespace(
+            id=self._next_id("vs"), name=name, metadata=dict(metadata or {}), file_ids=list(file_ids or [])
+        )
+        with self._lock:
+            self._vector_stores[vector_store.id] = vector_store
+        return vector_store
+
+    def create_vector_store(self, file_ids=None, name=None, metadata=None, **kwargs):
+        self._record("create_vector_store")
+        # Files are indexed in parallel in the background, so ingestion takes one index_latency
+        vector_store = SimpleNamespace(
+            id=self._next_id("vs"), name=name, metadata=dict(metadata or {}), file_ids=list(file_ids or []),
+            status="in_progress", ready_at=time.time() + (self.index_latency if file_ids else 0),
+        )
+        with self._lock:
+            self._vector_stores[vector_store.id] = vector_store
+        return vector_store
+
+    def get_vector_store(self, vector_store_id, **kwargs):
+        self._record("get_vector_store")
+        vector_store = self._get(self._vector_stores, vector_store_id)
+        with self._lock:
+            if getattr(vector_store, "status", "completed") == "in_progress" and time.time() >= vector_store.ready_at:
+                vector_store.status = "completed"
+        return vector_store
+
+    def create_vector_store_file_batch(self, vector_store_id, file_ids=None, **kwargs):
+        self._record("create_vector_store_file_batch")
+        self._get(self._vector_stores, vector_store_id)  # Raises for an unknown vector store, like the service
+        batch = SimpleNamespace(
+            id=self._next_id("vsfb"), vector_store_id=vector_store_id, file_ids=list(file_ids or []),
+            status="in_progress", ready_at=time.time() + self.index_latency,
+        )
+        with self._lock:
+            self._batches[batch.id] = batch
+        return batch
+
+    def get_vector_store_file_batch(self, vector_store_id, batch_id, **kwargs):
+        self._record("get_vector_store_file_batch")
+        vector_store = self._get(self._vector_stores, vector_store_id)
+        with self._lock:
+            batch = self._batches[batch_id]
+            if batch.status == "in_progress" and time.time() >= batch.ready_at:
+                batch.status = "completed"
+                vector_store.file_ids.extend(batch.file_ids)
+            return batch
+
+    def cancel_vector_store_file_batch(self, vector_store_id, batch_id, **kwargs):
+        self._record("cancel_vector_store_file_batch")
+        with self._lock:
+            batch = self._batches[batch_id]
+            if batch.status == "in_progress":
+                batch.status = "cancelled"
+            return batch
+
+    def modify_vector_store(self, vector_store_id, metadata=None, **kwargs):
+        self._record("modify_vector_store")
+        vector_store = self._get(self._vector_stores, vector_store_id)
+        with self._lock:
+            if metadata is not None:
+                vector_store.metadata = dict(metadata)
+        return vector_store
+
+    def delete_vector_store(self, vector_store_id, **kwargs):
+        self._record("delete_vector_store")
+        with self._lock:
+            self._vector_stores.pop(vector_store_id, None)
+
+    def list_vector_stores(self, **kwargs):
+        self._record("list_vector_stores")
+        return self._page(self._vector_stores, **kwargs)
+
+    def list_vector_store_files(self, vector_store_id, limit=20, after=None, **kwargs):
+        self._record("list_vector_store_files")
+        vector_store = self._get(self._vector_stores, vector_store_id)
+        with self._lock:
+            data = [{"id": file_id} for file_id in vector_store.file_ids]
+        if after is not None:
+            ids = [item["id"] for item in data]
+            data = data[ids.index(after) + 1:] if after in ids else data
+        return {"data": data[:limit], "has_more": len(data) > limit}
+
+    def create_vector_store_file_and_poll(self, vector_store_id, file_id=None, **kwargs):
+        self._record("create_vector_store_file_and_poll")
+        time.sleep(self.index_latency)
+        vector_store = self._get(self._vector_stores, vector_store_id)
+        with self._lock:
+            vector_store.file_ids.append(file_id)
+        return SimpleNamespace(id=file_id, vector_store_id=vector_store_id, status="completed")
+
+    def delete_vector_store_file(self, vector_store_id, file_id, **kwargs):
+        self._record("delete_vector_store_file")
+        vector_store = self._get(self._vector_stores, vector_store_id)
+        with self._lock:
+            if file_id in vector_store.file_ids:
+                vector_store.file_ids.remove(file_id)
+
+    def create_thread(self, **kwargs):
+        self._record("create_thread")
+        thread = SimpleNamespace(id=self._next_id("thread"))
+        with self._lock:
+            self._threads[thread.id] = []
+        return thread
+
+    def delete_thread(self, thread_id, **kwargs):
+        self._record("delete_thread")
+        with self._lock:
+            if self._threads.pop(thread_id, None) is None:
+                raise LookupError(f"No such thread: {thread_id}")
+        return SimpleNamespace(id=thread_id, deleted=True)
+
+    def upload_file_and_poll(self, file_path, purpose=None, **kwargs):
+        self._record("upload_file_and_poll")
+        time.sleep(self.upload_latency)
+        uploaded_file = SimpleNamespace(id=self._next_id("file"), filename=file_path, status="processed")
+        with self._lock:
+            self._files[uploaded_file.id] = uploaded_file
+        return uploaded_file
+
+    def upload_file(self, file_path=None, purpose=None, **kwargs):
+        self._record("upload_file")
+        # Returns at once, the file is processed in the background for upload_latency seconds
+        uploaded_file = SimpleNamespace(
+            id=self._next_id("file"), filename=file_path, status="uploaded", ready_at=time.time() + self.upload_latency
+        )
+        with self._lock:
+            self._files[uploaded_file.id] = uploaded_file
+        return uploaded_file
+
+    def get_file(self, file_id, **kwargs):
+        self._record("get_file")
+        with self._lock:
+            if file_id not in self._files:
+                raise LookupError(f"No such file: {file_id}")
+            uploaded_file = self._files[file_id]
+            if uploaded_file.status == "uploaded" and time.time() >= uploaded_file.ready_at:
+                uploaded_file.status = "processed"
+            return uploaded_file
+
+    def delete_file(self, file_id, **kwargs):
+        self._record("delete_file")
+        with self._lock:
+            self._files.pop(file_id, None)
+
+    def create_message(self, thread_id, role, content, attachments=None, **kwargs):
+        self._record("create_message")
+        message = {
+            "id": self._next_id("msg"),
+            "role": role,
+            "thread_id": thread_id,
+            "assistant_id": None,
+            "run_id": None,
+            "created_at": int(time.time()),
+            "content": [{"type": "text", "text": {"value": content, "annotations": []}}],
+        }
+        with self._lock:
+            self._threads[thread_id].append(message)
+        return SimpleNamespace(id=message["id"])
+
+    def create_and_process_run(self, thread_id, assistant_id, **kwargs):
+        self._record("create_and_process_run")
+        run_id = self._next_id("run")
+        reply = self.reply
+        # Like the service, the run reads the whole thread unless a truncation strategy keeps only the latest messages
+        last_messages = getattr(kwargs.get("truncation_strategy"), "last_messages", None)
+        with self._lock:
+            history = self._threads[thread_id][-last_messages:] if last_messages else list(self._threads[thread_id])
+        prompt = history[-1]["content"][0]["text"]["value"]
+        if self.echo_code:
+            code_blocks = re.findall(r"```(\w+)\n(.*?)```", prompt, re.DOTALL)
+            fence, code = code_blocks[-1] if code_blocks else ("python", "")
+            reply = f"```{fence}\n{code}```\n"
+        prompt_tokens = sum(len(message["content"][0]["text"]["value"]) for message in history) // 4
+        completion_tokens = len(reply) // 4
+        total_tokens = prompt_tokens + completion_tokens
+        self._check_quota(total_tokens)
+        time.sleep(generation_seconds(reply, self.run_latency, self.seconds_per_output_line,
+                                      self.output_tokens_per_second))
+        message = {
+            "id": self._next_id("msg"),
+            "role": "assistant",
+            "thread_id": thread_id,
+            "assistant_id": assistant_id,
+            "run_id": run_id,
+            "created_at": int(time.time()),
+            "content": [{"type": "text", "text": {"value": reply, "annotations": []}}],
+        }
+        with self._lock:
+            self._threads[thread_id].append(message)
+            self.prompt_tokens.append(prompt_tokens)
+            self.agent_runs[assistant_id] += 1
+        return SimpleNamespace(
+            id=run_id, status="completed", thread_id=thread_id,
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=total_tokens),
+        )
+
+    def list_messages(self, thread_id, run_id=None, order="desc", limit=20, after=None, **kwargs):
+        self._record("list_messages")
+        with self._lock:
+            data = list(self._threads.get(thread_id, []))
+        if run_id is not None:
+            data = [message for message in data if message["run_id"] == run_id]
+        # Newest first, like the service default
+        if order == "desc":
+            data.reverse()
+        if after is not None:
+            ids = [message["id"] for message in data]
+            data = data[ids.index(after) + 1:] if after in ids else data
+        return {"data": data[:limit], "has_more": len(data) > limit}
+
+
+class FakeProjectClient:
+    def __init__(self, **kwargs):
+        self.agents = FakeAgentsOperations(**kwargs)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_details):
+        self.close()
+
+
+# The same service for the azure.ai.projects.aio client: every call is a coroutine and latencies are awaited,
+# so thousands of runs can wait at once on one thread
+class FakeAsyncAgentsOperations:
+    def __init__(self, run_latency=0.5, request_latency=0.0, seconds_per_output_line=0.0, output_tokens_per_second=None,
+                 **kwargs):
+        self.run_latency = run_latency
+        self.request_latency = request_latency
+        self.seconds_per_output_line = seconds_per_output_line
+        self.output_tokens_per_second = output_tokens_per_second
+        # State and replies come from the sync fake, with its blocking sleeps turned off
+        self._operations = FakeAgentsOperations(run_latency=0.0, request_latency=0.0, **kwargs)
+
+    @property
+    def calls(self):
+        return self._operations.calls
+
+    def inject_rate_limits(self, count):
+        self._operations.inject_rate_limits(count)
+
+    def __getattr__(self, name):
+        method = getattr(self._operations, name)
+
+        async def call(*args, **kwargs):
+            if self.request_latency:
+                await asyncio.sleep(self.request_latency)
+            result = method(*args, **kwargs)
+            if name == "create_and_process_run":
+                reply = self._operations._threads[result.thread_id][-1]["content"][0]["text"]["value"]
+                await asyncio.sleep(generation_seconds(reply, self.run_latency, self.seconds_per_output_line,
+                                                       self.output_tokens_per_second))
+            return result
+
+        return call
+
+
+class FakeAsyncProjectClient:
+    def __init__(self, **kwargs):
+        self.agents = FakeAsyncAgentsOperations(**kwargs)
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_details):
+        await self.close()
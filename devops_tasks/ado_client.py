@@ -0,0 +1,124 @@
+# ✅ Azure DevOps REST client: one pooled keep-alive session, timeouts and retries with backoff
+import os
+import re
+import sys
+import time
+import random
+import logging
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+from tracing import span
+
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) timeout in seconds
+MAX_RETRIES = 4  # Retries after the first attempt
+BACKOFF_BASE_SECONDS = 0.5  # First backoff delay, doubled on each retry
+BACKOFF_MAX_SECONDS = 30  # Upper bound for a single backoff or Retry-After delay
+POOL_SIZE = 16  # Keep-alive connections kept open per host
+
+# 429 and 503 mean the request was not processed, so they are safe to retry for any method
+THROTTLED_STATUS_CODES = {429, 503}
+# Other transient server errors are only retried when repeating the request is harmless
+TRANSIENT_STATUS_CODES = {500, 502, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+# Span name for a request: the API path without the query, with IDs and the repository name folded,
+# so every push (or work item read) adds up under one name
+def endpoint_name(method, path):
+    path = path.split("?", 1)[0].split("/_apis/", 1)[-1].strip("/")
+    path = re.sub(r"/\d+(?=/|$)", "/{id}", re.sub(r"repositories/[^/]+", "repositories/{repo}", path))
+    return f"ado.{method.upper()} {path}"
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdoClient:
+    def __init__(self, base_url, pat, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES,
+                 backoff_base_seconds=BACKOFF_BASE_SECONDS, pool_size=POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.retries = 0  # Total retries performed, handy when measuring
+
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth("", pat or "")
+        # Retries are handled below, so the adapter only pools connections
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt):
+        # Full jitter keeps parallel workers from retrying in lockstep
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, self.backoff_base_seconds * (2 ** attempt)))
+
+    def request(self, method, path, **kwargs):
+        with span(endpoint_name(method, path), method=method.upper()) as request_span:
+            response = self._request(method, path, request_span, **kwargs)
+            request_span.set(status_code=response.status_code, response_bytes=len(response.content))
+            return response
+
+    def _request(self, method, path, request_span, **kwargs):
+        url = path if path.startswith("http") else f"{self.base_url}/{path.lstrip('/')}"
+        kwargs.setdefault("timeout", self.timeout)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            request_span.set(retries=attempt)
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # A read timeout on a POST may have been applied already, so only retry safe cases
+                retryable = idempotent or isinstance(e, requests.ConnectTimeout)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logging.warning(f"⚠️ {method} {url} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                request_span.set(request_bytes=len(response.request.body or b""))
+                retryable = response.status_code in THROTTLED_STATUS_CODES or (
+                    idempotent and response.status_code in TRANSIENT_STATUS_CODES
+                )
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                delay = parse_retry_after(response.headers.get("Retry-After"))
+                if delay is None:
+                    delay = self._backoff(attempt)
+                delay = min(delay, BACKOFF_MAX_SECONDS)
+                logging.warning(f"⚠️ {method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+
+            time.sleep(delay)
+            attempt += 1
+            self.retries += 1
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_details):
+        self.close()
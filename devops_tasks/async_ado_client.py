@@ -0,0 +1,110 @@
+# ✅ asyncio flavour of ado_client.AdoClient: one aiohttp connection pool, the same timeouts, retries and backoff
+import json
+import base64
+import random
+import asyncio
+import logging
+
+import aiohttp
+
+from ado_client import (
+    DEFAULT_TIMEOUT, MAX_RETRIES, BACKOFF_BASE_SECONDS, BACKOFF_MAX_SECONDS, POOL_SIZE,
+    THROTTLED_STATUS_CODES, TRANSIENT_STATUS_CODES, IDEMPOTENT_METHODS, endpoint_name, parse_retry_after,
+)
+from tracing import span
+
+
+# The body is read before the connection goes back to the pool, so callers use it like a requests response
+class AdoResponse:
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class AsyncAdoClient:
+    def __init__(self, base_url, pat, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES,
+                 backoff_base_seconds=BACKOFF_BASE_SECONDS, pool_size=POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.pool_size = pool_size
+        self.retries = 0  # Total retries performed, handy when measuring
+        # The same Basic header requests builds for the sync client, set once on the session
+        self._headers = {"Authorization": "Basic " + base64.b64encode(f":{pat or ''}".encode()).decode()}
+        self._session = None
+
+    # The session binds to the running event loop, so it is only created once there is one
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connect_timeout, read_timeout = self.timeout
+            self._session = aiohttp.ClientSession(
+                headers=self._headers,
+                connector=aiohttp.TCPConnector(limit_per_host=self.pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+            )
+        return self._session
+
+    def _backoff(self, attempt):
+        # Full jitter keeps parallel workers from retrying in lockstep
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, self.backoff_base_seconds * (2 ** attempt)))
+
+    async def request(self, method, path, **kwargs):
+        with span(endpoint_name(method, path), method=method.upper()) as request_span:
+            response = await self._request(method, path, request_span, **kwargs)
+            request_span.set(status_code=response.status_code, response_bytes=len(response.text))
+            return response
+
+    async def _request(self, method, path, request_span, **kwargs):
+        url = path if path.startswith("http") else f"{self.base_url}/{path.lstrip('/')}"
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            request_span.set(retries=attempt)
+            try:
+                async with self._get_session().request(method, url, **kwargs) as response:
+                    response = AdoResponse(response.status, response.headers, await response.text())
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                # A read timeout on a POST may have been applied already, so only retry safe cases
+                retryable = idempotent or isinstance(e, aiohttp.ClientConnectorError)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logging.warning(f"⚠️ {method} {url} failed ({e!r}), retrying in {delay:.1f}s")
+            else:
+                retryable = response.status_code in THROTTLED_STATUS_CODES or (
+                    idempotent and response.status_code in TRANSIENT_STATUS_CODES
+                )
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                delay = parse_retry_after(response.headers.get("Retry-After"))
+                if delay is None:
+                    delay = self._backoff(attempt)
+                delay = min(delay, BACKOFF_MAX_SECONDS)
+                logging.warning(f"⚠️ {method} {url} returned {response.status_code}, retrying in {delay:.1f}s")
+
+            await asyncio.sleep(delay)
+            attempt += 1
+            self.retries += 1
+
+    async def get(self, path, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_details):
+        await self.close()
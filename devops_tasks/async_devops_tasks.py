@@ -0,0 +1,345 @@
+# Async work item flow: the same stages as automate_devops_tasks.py on one event loop, with an aiohttp client for
+# Azure DevOps and the azure.ai.projects.aio client for the agent. Settings, prompts, payloads and checkpoints
+# come from automate_devops_tasks.py, so both flows produce the same branches, commits and pull requests.
+import os
+import sys
+import asyncio
+import logging
+import argparse
+import automate_devops_tasks as devops
+from async_ado_client import AsyncAdoClient
+from pipeline import Stage, run_stages_async, print_timings
+from checkpoint_store import worker_id
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+from code_blocks import extract_code_block
+from message_retrieval import message_text, run_and_fetch_reply_async
+from project_client_pool import get_async_project_client, get_async_pool
+from tracing import span
+from language_router import LANGUAGES, language_spec
+
+MAX_IN_FLIGHT = 32  # Work items processed at the same time in bulk mode
+
+# ✅ Shared async Azure DevOps client (one aiohttp connection pool), created on first use
+_ado_client = None
+
+def get_ado_client():
+    global _ado_client
+    if _ado_client is None:
+        _ado_client = AsyncAdoClient(devops.ADO_BASE_URL, devops.ADO_PAT)
+    return _ado_client
+
+# ✅ Function to Close the Shared Clients before the Event Loop Goes Away
+async def close_clients():
+    global _ado_client
+    if _ado_client is not None:
+        await _ado_client.close()
+        _ado_client = None
+    await get_async_pool().close()
+
+# ✅ Function to Fetch Work Item Details
+async def get_work_item(work_item_id):
+    if not devops.ADO_PAT:
+        raise Exception("❌ Error: Azure DevOps PAT is missing. Set the ADO_PAT environment variable!")
+
+    response = await get_ado_client().get(f"wit/workitems/{work_item_id}?api-version=6.0")
+
+    if response.status_code == 200:
+        return devops.format_work_item(response.json())
+
+    elif response.status_code == 401:
+        raise Exception("❌ Authentication failed! Check your Azure DevOps PAT permissions.")
+
+    else:
+        raise Exception(f"❌ Failed to fetch work item. Status: {response.status_code}, Response: {response.text}")
+
+# ✅ Function to Find Work Item IDs with a WIQL Query
+async def query_work_item_ids(wiql, time_precision=False):
+    if not devops.ADO_PAT:
+        raise Exception("❌ Error: Azure DevOps PAT is missing. Set the ADO_PAT environment variable!")
+
+    options = "timePrecision=true&" if time_precision else ""
+    response = await get_ado_client().post(f"wit/wiql?{options}api-version=7.1", json={"query": wiql})
+
+    if response.status_code == 200:
+        return [work_item["id"] for work_item in response.json().get("workItems", [])]
+    else:
+        raise Exception(f"❌ WIQL query failed. Status: {response.status_code}, Response: {response.text}")
+
+# ✅ Function to Load Many Work Items, All Batches Requested at Once
+async def get_work_items_batch(work_item_ids, fields=devops.WORK_ITEM_FIELDS):
+    if not devops.ADO_PAT:
+        raise Exception("❌ Error: Azure DevOps PAT is missing. Set the ADO_PAT environment variable!")
+
+    batches = [
+        [int(work_item_id) for work_item_id in work_item_ids[start:start + devops.WORK_ITEMS_BATCH_SIZE]]
+        for start in range(0, len(work_item_ids), devops.WORK_ITEMS_BATCH_SIZE)
+    ]
+    responses = await asyncio.gather(*(
+        get_ado_client().post("wit/workitemsbatch?api-version=7.1",
+                              json={"ids": batch_ids, "fields": fields, "errorPolicy": "omit"})
+        for batch_ids in batches
+    ))
+
+    work_items = []
+    for response in responses:
+        if response.status_code == 200:
+            # Items that don't exist come back as null with errorPolicy "omit"
+            work_items.extend(work_item for work_item in response.json()["value"] if work_item)
+        else:
+            raise Exception(f"❌ Failed to fetch work items. Status: {response.status_code}, Response: {response.text}")
+
+    print(f"✅ Loaded {len(work_items)} work items in {len(batches)} request(s)\n")
+    return work_items
+
+# ✅ Function to Generate a Script using AI Foundry Agent
+async def generate_script(agent_id, output_file, work_item_details, cache=devops.RESULT_CACHE):
+    language = devops.script_language(output_file)
+
+    # ✅ Reuse the stored script when the work item, agent and standards are unchanged
+    cache_key = None
+    if cache is not None:
+        cache_key = devops.generate_cache_key(agent_id, work_item_details, language)
+        cached_code = cache.get(cache_key)
+        if cached_code is not None:
+            devops.save_script(output_file, cached_code)
+            print(f"\n♻️ Cache hit, script saved at: {output_file}\n")
+            return cached_code
+
+    project_client = get_async_project_client(devops.PROJECT_CONNECTION_STRING)
+
+    thread = await project_client.agents.create_thread()
+    print(f"📌 Created thread, ID: {thread.id}")
+
+    message_content, run_options = devops.build_generate_prompt(work_item_details, language)
+    message = await project_client.agents.create_message(thread_id=thread.id, role="user", content=message_content)
+    print(f"📩 Sent task to AI agent, message ID: {message.id}")
+
+    run, reply = await run_and_fetch_reply_async(
+        project_client.agents, thread.id, agent_id, prompt_text=message_content, **run_options
+    )
+    print(f"🔄 Processing AI request, ID: {run.id}")
+
+    if reply is None:
+        return None
+
+    script_code = extract_code_block(message_text(reply), language_spec(language)["fence"])
+    devops.save_script(output_file, script_code)
+
+    if cache is not None:
+        cache.put(cache_key, script_code)
+
+    print(f"\n✅ New script generated and saved at: {output_file}\n")
+    return script_code
+
+# ✅ Function to Fetch the Latest Commit ID of a Branch (main by default)
+async def get_latest_commit(branch=devops.TARGET_BRANCH):
+    response = await get_ado_client().get(
+        f"git/repositories/{devops.ADO_REPO}/commits?searchCriteria.itemVersion.version={branch}&api-version=7.1"
+    )
+
+    if response.status_code == 200:
+        commit_data = response.json()
+        if commit_data.get("value"):
+            latest_commit_id = commit_data["value"][0]["commitId"]
+            logging.info(f"✅ Latest commit ID of {branch}: {latest_commit_id}")
+            return latest_commit_id
+        logging.error(f"❌ No commits found in branch '{branch}'. Please check if the branch exists and has at least one commit.")
+        raise Exception(f"No commits found in branch '{branch}'.")
+
+    logging.error(f"❌ Failed to fetch latest commit ID. Response: {response.text}")
+    raise Exception(f"Failed to fetch latest commit ID. Status Code: {response.status_code}")
+
+# ✅ Function to Create a New Branch from Main
+async def create_branch(branch_name, latest_commit_id=None):
+    if latest_commit_id is None:
+        latest_commit_id = await get_latest_commit()
+
+    response = await get_ado_client().post(
+        f"git/repositories/{devops.ADO_REPO}/refs?api-version=7.1",
+        json=devops.branch_payload(branch_name, latest_commit_id),
+    )
+
+    if response.status_code in [200, 201]:
+        logging.info(f"✅ Created new branch: {branch_name}")
+        return True
+    logging.error(f"❌ Branch creation failed. Response: {response.text}")
+    return False
+
+# ✅ Function to Look Up a File's Blob SHA on a Branch; None If the File Doesn't Exist There
+async def get_item_object_id(file_path, branch_name=devops.TARGET_BRANCH):
+    response = await get_ado_client().get(
+        f"git/repositories/{devops.ADO_REPO}/items?path={file_path}&versionDescriptor.version={branch_name}"
+        f"&versionDescriptor.versionType=branch&$format=json&api-version=7.1"
+    )
+
+    if response.status_code == 200:
+        return response.json()["objectId"]
+    elif response.status_code == 404:
+        return None
+    logging.error(f"❌ Failed to check file existence. Response: {response.text}")
+    raise Exception("Failed to check file existence in repo.")
+
+# ✅ Function to Commit and Push Generated Files to Azure DevOps in a Single Push
+# Unknown blob SHAs are looked up at the same time; files that match the branch are left out
+async def commit_scripts(script_paths, branch_name, work_item_id, head_commit_id=None, remote_object_ids=None):
+    remote_object_ids = dict(remote_object_ids or {})
+    unknown = [f"/{script_path}" for script_path in script_paths if f"/{script_path}" not in remote_object_ids]
+    object_ids = await asyncio.gather(*(get_item_object_id(repo_path, branch_name) for repo_path in unknown))
+    remote_object_ids.update(zip(unknown, object_ids))
+
+    changes = devops.script_changes(script_paths, branch_name, remote_object_ids)
+    if not changes:
+        print(f"⏭️ Nothing changed on branch {branch_name}, skipping the push")
+        return True
+
+    if head_commit_id is None:
+        head_commit_id = await get_latest_commit(branch_name)
+
+    response = await get_ado_client().post(
+        f"git/repositories/{devops.ADO_REPO}/pushes?api-version=7.1",
+        json=devops.push_payload(branch_name, head_commit_id, work_item_id, changes),
+    )
+
+    if response.status_code == 201:
+        logging.info(f"✅ {len(changes)} file(s) committed successfully to branch: {branch_name}")
+        return True
+    logging.error(f"❌ Commit failed. Response: {response.text}")
+    return False
+
+# ✅ Function to Commit and Push One Script to Azure DevOps
+async def commit_script(script_path, branch_name, work_item_id, head_commit_id=None, remote_object_id=False):
+    # False means unknown: the blob SHA is looked up on the branch
+    remote_object_ids = {} if remote_object_id is False else {f"/{script_path}": remote_object_id}
+    return await commit_scripts([script_path], branch_name, work_item_id, head_commit_id, remote_object_ids)
+
+# ✅ Function to Create a Pull Request in Azure DevOps
+async def create_pull_request(branch_name, work_item_id):
+    response = await get_ado_client().post(
+        f"git/repositories/{devops.ADO_REPO}/pullrequests?api-version=6.0",
+        json=devops.pull_request_payload(branch_name, work_item_id),
+    )
+
+    if response.status_code == 201:
+        pr_url = response.json()["url"]
+        print(f"✅ Pull request created: {pr_url}")
+        return pr_url
+    print(f"❌ PR creation failed. Response: {response.text}")
+    return None
+
+# ✅ Function to Describe the Work Item Flow as a Dependency Graph (same graph as the sync flow)
+def build_work_item_stages(work_item_id, script_path, branch_name, work_item=None, latest_commit_id=None):
+    async def require(awaitable, error):
+        result = await awaitable
+        if not result:
+            raise Exception(error)
+        return result
+
+    async def fetch(_):
+        return devops.format_work_item(work_item) if work_item else await get_work_item(work_item_id)
+
+    async def latest_commit(_):
+        return latest_commit_id or await get_latest_commit()
+
+    return [
+        Stage("fetch", fetch),
+        Stage("compact", lambda r: devops.compact_work_item(r["fetch"]), deps=["fetch"]),
+        Stage("latest_commit", latest_commit),
+        Stage("branch", lambda r: require(create_branch(branch_name, r["latest_commit"]), "Branch creation failed"),
+              deps=["latest_commit"]),
+        Stage("remote_blob", lambda _: get_item_object_id(f"/{script_path}", branch_name), deps=["branch"]),
+        Stage("generate", lambda r: require(generate_script(devops.agent_id_for(script_path), script_path, r["compact"]["text"]),
+                                            "Script generation returned no code"),
+              deps=["fetch", "compact"]),
+        Stage("commit", lambda r: require(commit_script(script_path, branch_name, work_item_id,
+                                                        devops.push_base_commit(r["latest_commit"], r["remote_blob"]),
+                                                        r["remote_blob"]), "Commit failed"),
+              deps=["generate", "branch", "latest_commit", "remote_blob"]),
+        Stage("pull_request", lambda r: require(create_pull_request(branch_name, work_item_id), "PR creation failed"),
+              deps=["commit"]),
+    ]
+
+# ✅ Function to Run One Work Item through Generation → Branch → Commit → PR, Resuming from Checkpoints
+async def process_work_item(work_item_id, work_item=None, latest_commit_id=None, script_path=None,
+                            show_timings=False, branch_name=None, checkpoints=devops.CHECKPOINTS, reopen=False):
+    branch_name = branch_name or devops.branch_name_for(work_item_id)
+    script_path = script_path or devops.script_path_for(work_item_id)
+
+    run_key = f"{work_item_id}:{branch_name}"
+    owner = worker_id()
+    if checkpoints is not None:
+        outcome, script_path = devops.claim_work_item(checkpoints, run_key, work_item_id, branch_name,
+                                                      script_path, owner, reopen)
+        if outcome is not None:
+            return outcome
+
+    stages = build_work_item_stages(work_item_id, script_path, branch_name, work_item, latest_commit_id)
+    if checkpoints is not None:
+        stages = devops.resumable_stages(stages, checkpoints, run_key, owner, script_path)
+
+    try:
+        with span("work_item", work_item_id=work_item_id, branch=branch_name):
+            pipeline = await run_stages_async(stages)
+    except Exception as e:
+        if checkpoints is not None:
+            checkpoints.release(run_key, owner, "failed", error=str(e))
+        raise
+    if show_timings:
+        print_timings(pipeline)
+
+    outcome = devops.pipeline_outcome(work_item_id, pipeline)
+    if checkpoints is not None:
+        checkpoints.release(run_key, owner, outcome["status"], outcome["pr_url"], outcome["error"])
+    return outcome
+
+# ✅ Function to Process Many Work Items: One Batched Read, then up to max_in_flight Items at Once
+async def process_work_items(work_item_ids=None, wiql=None, max_in_flight=MAX_IN_FLIGHT):
+    if wiql:
+        work_item_ids = await query_work_item_ids(wiql)
+    if not work_item_ids:
+        print("ℹ️ No work items to process.")
+        return []
+
+    work_items, latest_commit_id = await asyncio.gather(get_work_items_batch(work_item_ids), get_latest_commit())
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def process(work_item):
+        async with semaphore:
+            # One item that raises must not lose the outcomes of the others
+            try:
+                return await process_work_item(work_item["id"], work_item, latest_commit_id)
+            except Exception as e:
+                return devops.failed_outcome(work_item["id"], e)
+
+    outcomes = await asyncio.gather(*(process(work_item) for work_item in work_items))
+    devops.print_outcomes(outcomes)
+    return outcomes
+
+# Returns the exit code: 0 when every work item succeeded
+async def _main(args):
+    try:
+        if args.ids or args.wiql:
+            outcomes = await process_work_items(args.ids, args.wiql, args.in_flight)
+            return 0 if all(outcome["status"] == "succeeded" for outcome in outcomes) else 1
+
+        print("\n🚀 Starting Work Item Processing...\n")
+        outcome = await process_work_item(devops.WORK_ITEM_ID, show_timings=True)
+        if outcome["status"] == "succeeded":
+            print(f"\n✅ Work Item Processing Completed Successfully! PR: {outcome['pr_url']}\n")
+            return 0
+        print(f"\n❌ Work Item Processing Failed at '{outcome['stage']}': {outcome['error']}\n")
+        return 1
+    finally:
+        await close_clients()
+
+# ✅ Run the script
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate scripts and pull requests from work items on one event loop.")
+    parser.add_argument("--ids", nargs="+", type=int, help="Process these work item IDs in one run")
+    parser.add_argument("--wiql", help="Process every work item returned by this WIQL query")
+    parser.add_argument("--in-flight", type=int, default=MAX_IN_FLIGHT, help="Work items processed at the same time")
+    parser.add_argument("--language", choices=list(LANGUAGES), default=devops.SCRIPT_LANGUAGE,
+                        help="Language of the generated scripts")
+    args = parser.parse_args()
+    devops.use_script_language(args.language)
+    sys.exit(asyncio.run(_main(args)))
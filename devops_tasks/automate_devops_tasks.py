@@ -1,12 +1,26 @@
 import os
+import sys
 import json
-import requests
+import hashlib
+import inspect
 import logging
-from requests.auth import HTTPBasicAuth
-from azure.ai.projects import AIProjectClient
-from azure.ai.projects.models import MessageAttachment, FileSearchTool, FilePurpose
-from azure.identity import DefaultAzureCredential
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from azure.ai.projects.models import MessageAttachment, FileSearchTool, FilePurpose, AgentsApiToolChoiceOptionMode
 from datetime import datetime
+from ado_client import AdoClient
+from pipeline import Stage, run_stages, print_timings
+from checkpoint_store import CheckpointStore, worker_id
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+from code_blocks import extract_code_block
+from message_retrieval import message_text, run_and_fetch_reply
+from project_client_pool import get_project_client
+from prompt_compaction import PROMPT_TOKEN_BUDGET, compact_prompt
+from result_cache import ResultCache, hash_file, hash_text, make_cache_key
+from standards_index import load_index
+from language_router import LANGUAGES, detect_language, language_spec, resolve_route
+from tracing import span
 
 # ✅ Azure DevOps Configuration
 ADO_ORG = ""  # Azure DevOps Organization
@@ -14,39 +28,111 @@ ADO_PROJECT = ""  # Azure DevOps Project
 ADO_REPO = ""  # Azure DevOps Repository
 ADO_PAT = os.getenv("ADO_PAT")  # Azure DevOps Personal Access Token (set as environment variable)
 ADO_BASE_URL = f"https://dev.azure.com/{ADO_ORG}/{ADO_PROJECT}/_apis"
-WORK_ITEM_ID = ""  # Work Item ID
-BRANCH_NAME = f"feature/workitem-{WORK_ITEM_ID}"  # Create a feature branch per task
+WORK_ITEM_ID = ""  # Work Item processed when neither --ids nor --wiql is given
 TARGET_BRANCH = "main"  # Target branch for the pull request
+WORK_ITEM_FIELDS = ["System.Id", "System.Title", "System.Description"]  # Fields loaded in bulk mode
+WORK_ITEMS_BATCH_SIZE = 200  # Maximum IDs per workitemsbatch request
+MAX_WORKERS = 4  # Work items processed at the same time in bulk mode
 
 # ✅ Azure AI Foundry Configuration
 PROJECT_CONNECTION_STRING = os.getenv("PROJECT_CONNECTION_STRING")  # Project connection string (set as environment variable)
-AGENT_ID = os.getenv("AGENT_ID")  # AI Agent ID (set as environment variable)
+AGENT_ID = os.getenv("AGENT_ID")  # AI Agent ID for SCRIPT_LANGUAGE, unset = the agent setup_agents.py provisioned
 VECTOR_STORE_ID = os.getenv("VECTOR_STORE_ID")  # Vector Store ID (set as environment variable)
-Language = "Java"
-
-# ✅ File Paths
-
-timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-GENERATED_SCRIPT_PATH = f"generated_scripts/script_{WORK_ITEM_ID}_{timestamp}.java"
+SCRIPT_LANGUAGE = os.getenv("SCRIPT_LANGUAGE", "java")  # Language of the generated scripts, "java" or "python"
+INSTRUCTIONS_FILE_PATH = language_spec(SCRIPT_LANGUAGE)["instructions_file_path"]  # Instructions the agent was created with
+STANDARDS_FILE_PATH = language_spec(SCRIPT_LANGUAGE)["standards_file_path"]  # Standards file in the vector store
+STANDARDS_SOURCE = "local"  # "local" inlines matching rules from STANDARDS_FILE_PATH, "vector_store" uses File Search
+
+# ✅ Result cache: an unchanged work item reuses the previously generated script
+RESULT_CACHE = ResultCache()
+GENERATE_PROMPT_TEMPLATE = (
+    "Please generate a {Language} script based on the following task requirements:\n\n"
+    "{work_item_details}\n\n"
+    "Ensure that the script follows the company standards and best practices, is well-documented with comments, "
+    "and includes error handling. Return the script in a single ```{fence} block."
+)
+STANDARDS_PROMPT_TEMPLATE = (
+    "\n\nThe relevant company coding standards are listed below, so there is no need to search the knowledge base:\n"
+    "{standards}"
+)
+
+# ✅ Checkpoints: a rerun resumes after the last completed stage instead of regenerating the script
+CHECKPOINTS = CheckpointStore()
+# Stages whose results are stored; the other ones are cheap lookups that simply run again
+CHECKPOINTED_STAGES = ["latest_commit", "branch", "generate", "commit", "pull_request"]
+
+# ✅ Shared Azure DevOps client (pooled session with retries), created on first use
+_ado_client = None
+
+def get_ado_client():
+    global _ado_client
+    if _ado_client is None:
+        _ado_client = AdoClient(ADO_BASE_URL, ADO_PAT)
+    return _ado_client
+
+# ✅ Per-work-item names, computed when the item is processed so a long-running worker gets fresh ones
+def branch_name_for(work_item_id):
+    return f"feature/workitem-{work_item_id}"
+
+def script_path_for(work_item_id, language=None):
+    extension = language_spec(language or SCRIPT_LANGUAGE)["extensions"][0]
+    return f"generated_scripts/script_{work_item_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}{extension}"
+
+# ✅ Generated scripts are written in the language of their file name, so a resumed run keeps its language
+def script_language(script_path):
+    return detect_language(script_path, content="") or SCRIPT_LANGUAGE
+
+# ✅ Switch the language of generated scripts, together with its instructions and standards files
+def use_script_language(language):
+    global SCRIPT_LANGUAGE, INSTRUCTIONS_FILE_PATH, STANDARDS_FILE_PATH
+    spec = language_spec(language)
+    SCRIPT_LANGUAGE = language
+    INSTRUCTIONS_FILE_PATH = spec["instructions_file_path"]
+    STANDARDS_FILE_PATH = spec["standards_file_path"]
+
+# The instructions and standards files for a language; SCRIPT_LANGUAGE uses the settings above
+def language_files(language):
+    if language == SCRIPT_LANGUAGE:
+        return INSTRUCTIONS_FILE_PATH, STANDARDS_FILE_PATH
+    spec = language_spec(language)
+    return spec["instructions_file_path"], spec["standards_file_path"]
+
+# ✅ Function to Pick the Agent for a Script: AGENT_ID for SCRIPT_LANGUAGE, else the provisioned agent of its language
+def agent_id_for(script_path):
+    language = script_language(script_path)
+    if AGENT_ID and language == SCRIPT_LANGUAGE:
+        return AGENT_ID
+    return resolve_route(language)["agent_id"]
+
+# ✅ Function to Turn a Work Item into the Prompt Text for the AI Agent
+def format_work_item(work_item):
+    title = work_item["fields"].get("System.Title", "No Title")
+    description = work_item["fields"].get("System.Description", "No Description")
+    print(f"✅ Retrieved Work Item: {title}\n")
+
+    work_item_text = f"Task: {title}\nDescription: {description}"
+    print(f"📌 Work Item Details:\n{work_item_text}\n")
+
+    return work_item_text  # 🔥 Pass this to AI Agent
+
+# ✅ Function to Shrink the Work Item Text to the Prompt Token Budget
+# HTML, pasted logs, stack traces and screenshots in the description would otherwise all go into the prompt
+def compact_work_item(work_item_text, token_budget=PROMPT_TOKEN_BUDGET):
+    compacted = compact_prompt(work_item_text, token_budget)
+    if compacted["tokens_after"] < compacted["tokens_before"]:
+        print(f"✂️ Work item details compacted from {compacted['tokens_before']} to {compacted['tokens_after']} tokens"
+              + (f", {compacted['trimmed_sections']} section(s) trimmed" if compacted["trimmed_sections"] else ""))
+    return compacted
 
 # ✅ Function to Fetch Work Item Details
 def get_work_item(work_item_id):
     if not ADO_PAT:
         raise Exception("❌ Error: Azure DevOps PAT is missing. Set the ADO_PAT environment variable!")
 
-    url = f"{ADO_BASE_URL}/wit/workitems/{work_item_id}?api-version=6.0"
-    response = requests.get(url, auth=HTTPBasicAuth("", ADO_PAT))
+    response = get_ado_client().get(f"wit/workitems/{work_item_id}?api-version=6.0")
 
     if response.status_code == 200:
-        work_item = response.json()
-        title = work_item["fields"].get("System.Title", "No Title")
-        description = work_item["fields"].get("System.Description", "No Description")
-        print(f"✅ Retrieved Work Item: {title}\n")
-
-        work_item_text = f"Task: {title}\nDescription: {description}"
-        print(f"📌 Work Item Details:\n{work_item_text}\n")
-
-        return work_item_text  # 🔥 Pass this to AI Agent
+        return format_work_item(response.json())
 
     elif response.status_code == 401:
         raise Exception("❌ Authentication failed! Check your Azure DevOps PAT permissions.")
@@ -54,63 +140,137 @@ def get_work_item(work_item_id):
     else:
         raise Exception(f"❌ Failed to fetch work item. Status: {response.status_code}, Response: {response.text}")
 
-# ✅ Function to Generate a Script using AI Foundry Agent
-def generate_script(agent_id, output_file, work_item_details):
-    project_client = AIProjectClient.from_connection_string(
-        credential=DefaultAzureCredential(), conn_str=PROJECT_CONNECTION_STRING
-    )
+# ✅ Function to Find Work Item IDs with a WIQL Query
+# time_precision compares date fields to the millisecond instead of by day
+def query_work_item_ids(wiql, time_precision=False):
+    if not ADO_PAT:
+        raise Exception("❌ Error: Azure DevOps PAT is missing. Set the ADO_PAT environment variable!")
 
-    with project_client:
-        # Create a new chat thread
-        thread = project_client.agents.create_thread()
-        print(f"📌 Created thread, ID: {thread.id}")
-
-        # ✅ Ask AI to generate a script based on the work item
-        message_content = (
-            "Please generate a {Language} script based on the following task requirements:\n\n"
-            f"{work_item_details}\n\n"
-            "Ensure that the script follows the company standards and best practices, is well-documented with comments, "
-            "and includes error handling."
-        )
+    options = "timePrecision=true&" if time_precision else ""
+    response = get_ado_client().post(f"wit/wiql?{options}api-version=7.1", json={"query": wiql})
+
+    if response.status_code == 200:
+        return [work_item["id"] for work_item in response.json().get("workItems", [])]
+    else:
+        raise Exception(f"❌ WIQL query failed. Status: {response.status_code}, Response: {response.text}")
+
+# ✅ Function to Load Many Work Items with as Few Requests as Possible
+def get_work_items_batch(work_item_ids, fields=WORK_ITEM_FIELDS):
+    if not ADO_PAT:
+        raise Exception("❌ Error: Azure DevOps PAT is missing. Set the ADO_PAT environment variable!")
 
-        message = project_client.agents.create_message(
-            thread_id=thread.id, role="user", content=message_content
+    work_items = []
+    for start in range(0, len(work_item_ids), WORK_ITEMS_BATCH_SIZE):
+        batch_ids = [int(work_item_id) for work_item_id in work_item_ids[start:start + WORK_ITEMS_BATCH_SIZE]]
+        response = get_ado_client().post(
+            "wit/workitemsbatch?api-version=7.1",
+            json={"ids": batch_ids, "fields": fields, "errorPolicy": "omit"},
         )
-        print(f"📩 Sent task to AI agent, message ID: {message.id}")
 
-        # Process the request
-        run = project_client.agents.create_and_process_run(thread_id=thread.id, assistant_id=agent_id)
-        print(f"🔄 Processing AI request, ID: {run.id}")
+        if response.status_code == 200:
+            # Items that don't exist come back as null with errorPolicy "omit"
+            work_items.extend(work_item for work_item in response.json()["value"] if work_item)
+        else:
+            raise Exception(f"❌ Failed to fetch work items. Status: {response.status_code}, Response: {response.text}")
+
+    print(f"✅ Loaded {len(work_items)} work items in {-(-len(work_item_ids) // WORK_ITEMS_BATCH_SIZE)} request(s)\n")
+    return work_items
+
+# ✅ Function to Build the Cache Key for a Generated Script
+def generate_cache_key(agent_id, work_item_details, language=None):
+    language = language or SCRIPT_LANGUAGE
+    instructions_file_path, standards_file_path = language_files(language)
+    instructions_text = ""
+    if os.path.exists(instructions_file_path):
+        with open(instructions_file_path, "r", encoding="utf-8") as f:
+            instructions_text = f.read()
+    standards_hash = hash_file(standards_file_path) if os.path.exists(standards_file_path) else ""
+    prompt_template = GENERATE_PROMPT_TEMPLATE
+    if STANDARDS_SOURCE == "local":
+        prompt_template += STANDARDS_PROMPT_TEMPLATE
+    return make_cache_key(work_item_details, agent_id, instructions_text, standards_hash, prompt_template)
+
+# ✅ Function to Save a Generated Script
+def save_script(output_file, script_code):
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(script_code)
+
+# ✅ Function to Build the Generation Prompt and the Run Options That Go with It
+def build_generate_prompt(work_item_details, language=None):
+    language = language or SCRIPT_LANGUAGE
+    spec = language_spec(language)
+    message_content = GENERATE_PROMPT_TEMPLATE.format(
+        Language=spec["display_name"], fence=spec["fence"], work_item_details=work_item_details
+    )
+
+    # ✅ Inline the standards that match the task from the local index, instead of a File Search step
+    run_options = {}
+    standards_index = load_index(language_files(language)[1]) if STANDARDS_SOURCE == "local" else None
+    rules = standards_index.relevant_rules(work_item_details) if standards_index is not None else None
+    if rules:
+        message_content += STANDARDS_PROMPT_TEMPLATE.format(standards=standards_index.format_rules(rules))
+        run_options["tool_choice"] = AgentsApiToolChoiceOptionMode.NONE
+    return message_content, run_options
+
+# ✅ Function to Generate a Script using AI Foundry Agent
+def generate_script(agent_id, output_file, work_item_details, cache=RESULT_CACHE):
+    language = script_language(output_file)
+
+    # ✅ Reuse the stored script when the work item, agent and standards are unchanged
+    cache_key = None
+    if cache is not None:
+        cache_key = generate_cache_key(agent_id, work_item_details, language)
+        cached_code = cache.get(cache_key)
+        if cached_code is not None:
+            save_script(output_file, cached_code)
+            print(f"\n♻️ Cache hit, script saved at: {output_file}\n")
+            return cached_code
+
+    # ✅ Reuse the shared client, so the token and connection survive across calls
+    project_client = get_project_client(PROJECT_CONNECTION_STRING)
+
+    # Create a new chat thread
+    thread = project_client.agents.create_thread()
+    print(f"📌 Created thread, ID: {thread.id}")
+
+    # ✅ Ask AI to generate a script based on the work item
+    message_content, run_options = build_generate_prompt(work_item_details, language)
+
+    message = project_client.agents.create_message(
+        thread_id=thread.id, role="user", content=message_content
+    )
+    print(f"📩 Sent task to AI agent, message ID: {message.id}")
 
-        # Fetch responses
-        messages = project_client.agents.list_messages(thread_id=thread.id)
+    # Process the request and fetch only this run's reply
+    run, reply = run_and_fetch_reply(
+        project_client.agents, thread.id, agent_id, prompt_text=message_content, **run_options
+    )
+    print(f"🔄 Processing AI request, ID: {run.id}")
 
-        # Extract AI-generated script
-        for message in messages["data"]:
-            if message["role"] == "assistant":
-                response_content = message["content"][0]["text"]["value"]
+    if reply is None:
+        return None
 
-                # Extract Python script from response
-                if "```python" in response_content:
-                    script_code = response_content.split("```python")[1].split("```")[0].strip()
-                else:
-                    script_code = response_content
+    # Extract AI-generated script
+    response_content = message_text(reply)
 
-                # Save the script to a file
-                os.makedirs(os.path.dirname(output_file), exist_ok=True)
-                with open(output_file, "w", encoding="utf-8") as f:
-                    f.write(script_code)
+    # Extract the script from the fence of its language
+    script_code = extract_code_block(response_content, language_spec(language)["fence"])
 
-                print(f"\n✅ New script generated and saved at: {output_file}\n")
-                return script_code
+    # Save the script to a file
+    save_script(output_file, script_code)
 
-    return None
+    if cache is not None:
+        cache.put(cache_key, script_code)
 
-# ✅ Function to Fetch the Latest Commit ID from Main Branch
-def get_latest_commit():
-    url = f"https://dev.azure.com/{ADO_ORG}/{ADO_PROJECT}/_apis/git/repositories/{ADO_REPO}/commits?searchCriteria.itemVersion.version={TARGET_BRANCH}&api-version=7.1"
-    
-    response = requests.get(url, auth=HTTPBasicAuth("", ADO_PAT))
+    print(f"\n✅ New script generated and saved at: {output_file}\n")
+    return script_code
+
+# ✅ Function to Fetch the Latest Commit ID of a Branch (main by default)
+def get_latest_commit(branch=TARGET_BRANCH):
+    response = get_ado_client().get(
+        f"git/repositories/{ADO_REPO}/commits?searchCriteria.itemVersion.version={branch}&api-version=7.1"
+    )
 
     if response.status_code == 200:
         commit_data = response.json()
@@ -118,149 +278,371 @@ def get_latest_commit():
         # ✅ Handle missing or empty branches
         if "value" in commit_data and len(commit_data["value"]) > 0:
             latest_commit_id = commit_data["value"][0]["commitId"]
-            logging.info(f"✅ Latest commit ID of {TARGET_BRANCH}: {latest_commit_id}")
+            logging.info(f"✅ Latest commit ID of {branch}: {latest_commit_id}")
             return latest_commit_id
         else:
-            logging.error(f"❌ No commits found in branch '{TARGET_BRANCH}'. Please check if the branch exists and has at least one commit.")
-            raise Exception(f"No commits found in branch '{TARGET_BRANCH}'.")
+            logging.error(f"❌ No commits found in branch '{branch}'. Please check if the branch exists and has at least one commit.")
+            raise Exception(f"No commits found in branch '{branch}'.")
 
     else:
         logging.error(f"❌ Failed to fetch latest commit ID. Response: {response.text}")
         raise Exception(f"Failed to fetch latest commit ID. Status Code: {response.status_code}")
 
-# ✅ Function to Create a New Branch from Main
-def create_branch():
-    latest_commit_id = get_latest_commit()  # ✅ Get the latest commit ID from main
-
-    url = f"{ADO_BASE_URL}/git/repositories/{ADO_REPO}/refs?api-version=7.1"
-
-    branch_payload = [
+# ✅ Function to Build the Ref Update That Creates a Branch at a Commit
+def branch_payload(branch_name, latest_commit_id):
+    return [
         {
-            "name": f"refs/heads/{BRANCH_NAME}",
+            "name": f"refs/heads/{branch_name}",
             "oldObjectId": "0000000000000000000000000000000000000000",  # New branch
             "newObjectId": latest_commit_id,  # ✅ Dynamically use the latest commit ID
         }
     ]
 
-    response = requests.post(url, auth=HTTPBasicAuth("", ADO_PAT), json=branch_payload)
+# ✅ Function to Create a New Branch from Main
+def create_branch(branch_name, latest_commit_id=None):
+    if latest_commit_id is None:
+        latest_commit_id = get_latest_commit()  # ✅ Get the latest commit ID from main
+
+    response = get_ado_client().post(
+        f"git/repositories/{ADO_REPO}/refs?api-version=7.1", json=branch_payload(branch_name, latest_commit_id)
+    )
 
     if response.status_code in [200, 201]:
-        logging.info(f"✅ Created new branch: {BRANCH_NAME}")
+        logging.info(f"✅ Created new branch: {branch_name}")
         return True
     else:
         logging.error(f"❌ Branch creation failed. Response: {response.text}")
         return False
 
+# ✅ Function to Compute the Git Blob SHA of a File's Content, the Same objectId Azure Repos Reports
+def git_blob_sha(content):
+    data = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
 
-# ✅ Run the Script
-if __name__ == "__main__":
-    logging.info("\n🚀 Starting Branch Creation Process...\n")
-    
-    if create_branch():
-        logging.info("\n✅ Branch Creation Completed Successfully!\n")
-    else:
-        logging.error("\n❌ Branch Creation Failed.\n")
-
-# ✅ Function to Check If a File Exists in the Repo
-def check_file_exists(file_path):
-    url = f"{ADO_BASE_URL}/git/repositories/{ADO_REPO}/items?path={file_path}&api-version=7.1"
-    response = requests.get(url, auth=HTTPBasicAuth("", ADO_PAT))
+# ✅ Function to Look Up a File's Blob SHA on a Branch; None If the File Doesn't Exist There
+def get_item_object_id(file_path, branch_name=TARGET_BRANCH):
+    response = get_ado_client().get(
+        f"git/repositories/{ADO_REPO}/items?path={file_path}&versionDescriptor.version={branch_name}"
+        f"&versionDescriptor.versionType=branch&$format=json&api-version=7.1"
+    )
 
     if response.status_code == 200:
-        logging.info(f"📂 File {file_path} exists in the repository. Updating it...")
-        return True  # File exists, so we must use "edit"
+        return response.json()["objectId"]
     elif response.status_code == 404:
-        logging.info(f"🆕 File {file_path} does not exist in the repository. Adding it...")
-        return False  # File doesn't exist, so we must use "add"
+        return None
     else:
         logging.error(f"❌ Failed to check file existence. Response: {response.text}")
         raise Exception("Failed to check file existence in repo.")
 
-# ✅ Function to Commit and Push Script to Azure DevOps
-def commit_script():
-    latest_commit_id = get_latest_commit()  # Get latest commit ID
-
-    url = f"{ADO_BASE_URL}/git/repositories/{ADO_REPO}/pushes?api-version=7.1"
-
-    with open(GENERATED_SCRIPT_PATH, "r") as f:
-        script_content = f.read()
-
-    file_exists = check_file_exists(f"/{GENERATED_SCRIPT_PATH}")  # Check if the file already exists
-
-    commit_payload = {
+# ✅ Function to Turn Generated Files into Push Changes, Leaving Out Files the Branch Already Has
+# remote_object_ids maps every repo path to its blob SHA on the branch (None = doesn't exist there)
+def script_changes(script_paths, branch_name, remote_object_ids):
+    changes = []
+    for script_path in script_paths:
+        with open(script_path, "r", encoding="utf-8") as f:
+            script_content = f.read()
+
+        repo_path = f"/{script_path}"
+        remote_object_id = remote_object_ids[repo_path]
+        if remote_object_id == git_blob_sha(script_content):
+            logging.info(f"⏭️ {repo_path} is unchanged on {branch_name}, skipping it")
+            continue
+        changes.append({
+            "changeType": "edit" if remote_object_id else "add",  # ✅ Use "edit" if the file exists
+            "item": {"path": repo_path},
+            "newContent": {"content": script_content, "contentType": "rawtext"},
+        })
+    return changes
+
+# ✅ Function to Build a Single Push with All Changed Files
+def push_payload(branch_name, head_commit_id, work_item_id, changes):
+    return {
         "refUpdates": [
             {
-                "name": f"refs/heads/{BRANCH_NAME}",
-                "oldObjectId": latest_commit_id,
+                "name": f"refs/heads/{branch_name}",
+                "oldObjectId": head_commit_id,
             }
         ],
         "commits": [
             {
-                "comment": f"Generated script for Work Item {WORK_ITEM_ID} via AI Agent",
-                "changes": [
-                    {
-                        "changeType": "edit" if file_exists else "add",  # ✅ Use "edit" if the file exists
-                        "item": {"path": f"/{GENERATED_SCRIPT_PATH}"},
-                        "newContent": {"content": script_content, "contentType": "rawtext"},
-                    }
-                ],
+                "comment": f"Generated script for Work Item {work_item_id} via AI Agent",
+                "changes": changes,
             }
         ],
     }
 
-    response = requests.post(url, auth=HTTPBasicAuth("", ADO_PAT), json=commit_payload)
+# ✅ Function to Commit and Push Generated Files to Azure DevOps in a Single Push
+# Files whose content matches the blob already on the branch are left out; if none changed, nothing is pushed.
+# remote_object_ids maps a repo path to its known blob SHA (None = doesn't exist), the rest are looked up.
+def commit_scripts(script_paths, branch_name, work_item_id, head_commit_id=None, remote_object_ids=None):
+    remote_object_ids = dict(remote_object_ids or {})
+    for script_path in script_paths:
+        if f"/{script_path}" not in remote_object_ids:
+            remote_object_ids[f"/{script_path}"] = get_item_object_id(f"/{script_path}", branch_name)
+
+    changes = script_changes(script_paths, branch_name, remote_object_ids)
+    if not changes:
+        print(f"⏭️ Nothing changed on branch {branch_name}, skipping the push")
+        return True
+
+    if head_commit_id is None:
+        head_commit_id = get_latest_commit(branch_name)  # Get the branch's current commit ID
+
+    response = get_ado_client().post(
+        f"git/repositories/{ADO_REPO}/pushes?api-version=7.1",
+        json=push_payload(branch_name, head_commit_id, work_item_id, changes),
+    )
 
     if response.status_code == 201:
-        logging.info(f"✅ Script committed successfully to branch: {BRANCH_NAME}")
+        logging.info(f"✅ {len(changes)} file(s) committed successfully to branch: {branch_name}")
         return True
     else:
         logging.error(f"❌ Commit failed. Response: {response.text}")
         return False
 
-
-# ✅ Function to Create a Pull Request in Azure DevOps
-def create_pull_request():
-    url = f"{ADO_BASE_URL}/git/repositories/{ADO_REPO}/pullrequests?api-version=6.0"
-
-    pr_payload = {
-        "sourceRefName": f"refs/heads/{BRANCH_NAME}",
+# ✅ Function to Commit and Push One Script to Azure DevOps
+def commit_script(script_path, branch_name, work_item_id, head_commit_id=None, remote_object_id=False):
+    # False means unknown: the blob SHA is looked up on the branch
+    remote_object_ids = {} if remote_object_id is False else {f"/{script_path}": remote_object_id}
+    return commit_scripts([script_path], branch_name, work_item_id, head_commit_id, remote_object_ids)
+
+# ✅ Function to Pick the oldObjectId for a Work Item Push
+# A branch without the script still points at the commit it was created from; once the script is on it, earlier
+# pushes have moved it past that commit, so None makes commit_scripts look the branch head up
+def push_base_commit(latest_commit_id, remote_object_id):
+    return latest_commit_id if remote_object_id is None else None
+
+# ✅ Function to Build the Pull Request from a Work Item Branch into the Target Branch
+def pull_request_payload(branch_name, work_item_id):
+    return {
+        "sourceRefName": f"refs/heads/{branch_name}",
         "targetRefName": f"refs/heads/{TARGET_BRANCH}",
-        "title": f"AI Generated Script for Work Item {WORK_ITEM_ID}",
+        "title": f"AI Generated Script for Work Item {work_item_id}",
         "description": "This pull request was automatically generated by the AI Agent.",
     }
 
-    response = requests.post(url, auth=HTTPBasicAuth("", ADO_PAT), json=pr_payload)
+# ✅ Function to Create a Pull Request in Azure DevOps
+def create_pull_request(branch_name, work_item_id):
+    response = get_ado_client().post(
+        f"git/repositories/{ADO_REPO}/pullrequests?api-version=6.0", json=pull_request_payload(branch_name, work_item_id)
+    )
 
     if response.status_code == 201:
         pr_data = response.json()
         pr_url = pr_data["url"]
         print(f"✅ Pull request created: {pr_url}")
+        return pr_url
     else:
         print(f"❌ PR creation failed. Response: {response.text}")
+        return None
+
+# ✅ Function to Describe the Work Item Flow as a Dependency Graph
+# Fetching the work item, looking up the latest commit, creating the branch and generating
+# the script don't depend on each other, so they run at the same time; the commit ID is looked up once.
+def build_work_item_stages(work_item_id, script_path, branch_name, work_item=None, latest_commit_id=None):
+    def require(result, error):
+        if not result:
+            raise Exception(error)
+        return result
+
+    return [
+        Stage("fetch", lambda _: format_work_item(work_item) if work_item else get_work_item(work_item_id)),
+        Stage("compact", lambda r: compact_work_item(r["fetch"]), deps=["fetch"]),
+        Stage("latest_commit", lambda _: latest_commit_id or get_latest_commit()),
+        Stage("branch", lambda r: require(create_branch(branch_name, r["latest_commit"]), "Branch creation failed"),
+              deps=["latest_commit"]),
+        # The blob already on the branch, looked up while the script is still being generated
+        Stage("remote_blob", lambda _: get_item_object_id(f"/{script_path}", branch_name), deps=["branch"]),
+        Stage("generate", lambda r: require(generate_script(agent_id_for(script_path), script_path, r["compact"]["text"]),
+                                            "Script generation returned no code"),
+              deps=["fetch", "compact"]),
+        Stage("commit", lambda r: require(commit_script(script_path, branch_name, work_item_id,
+                                                        push_base_commit(r["latest_commit"], r["remote_blob"]),
+                                                        r["remote_blob"]), "Commit failed"),
+              deps=["generate", "branch", "latest_commit", "remote_blob"]),
+        Stage("pull_request", lambda r: require(create_pull_request(branch_name, work_item_id), "PR creation failed"),
+              deps=["commit"]),
+    ]
+
+# ✅ Function to Wrap the Stages so Finished Ones Are Recorded, and Restored instead of Run Again
+def resumable_stages(stages, checkpoints, run_key, owner, script_path):
+    completed = checkpoints.completed_stages(run_key)
+
+    def wrap(stage):
+        def run(results):
+            # The generated script is the expensive artifact: it is stored with the work item text it was made from
+            # and written back to disk on resume; if the work item changed since, it is regenerated and committed again
+            if stage.name == "generate" and "generate" in completed:
+                if completed["generate"]["work_item_hash"] == hash_text(results["fetch"]):
+                    if not os.path.exists(script_path):
+                        save_script(script_path, completed["generate"]["code"])
+                    return completed["generate"]["code"]
+                # A pull request that was already opened tracks the branch, so it shows the new push as it is
+                checkpoints.discard(run_key, ["generate", "commit"])
+                completed.pop("commit", None)
+            elif stage.name == "latest_commit" and "branch" in completed:
+                # The branch comes from an earlier attempt and pushes may have moved it since, so the commit it was
+                # created from says nothing about its head: None makes the commit stage look the head up
+                return None
+            elif stage.name in completed:
+                return completed[stage.name]
+
+            def record(result):
+                if stage.name == "generate":
+                    artifact = {"work_item_hash": hash_text(results["fetch"]), "code": result}
+                    checkpoints.record(run_key, stage.name, artifact, owner)
+                else:
+                    checkpoints.record(run_key, stage.name, result, owner)
+                return result
+
+            result = stage.func(results)
+            if inspect.isawaitable(result):
+                # Async stages (see async_devops_tasks.py) are recorded once they finish
+                async def record_when_done():
+                    return record(await result)
+                return record_when_done()
+            return record(result)
+
+        return Stage(stage.name, run, stage.deps) if stage.name in CHECKPOINTED_STAGES else stage
+
+    if completed:
+        print(f"♻️ Resuming {run_key} after: {', '.join(stage for stage in CHECKPOINTED_STAGES if stage in completed)}")
+    return [wrap(stage) for stage in stages]
+
+# ✅ Function to Claim a Work Item Run in the Checkpoint Store
+# Returns an outcome when there is nothing to do (claimed elsewhere or already done), and the script path to use;
+# reopen runs an item that already succeeded again, so an updated work item reaches its branch
+def claim_work_item(checkpoints, run_key, work_item_id, branch_name, script_path, owner, reopen=False):
+    run = checkpoints.claim(run_key, work_item_id, branch_name, script_path, owner, reopen)
+    if run is None:
+        return {"work_item_id": work_item_id, "status": "skipped", "stage": "claim", "pr_url": None,
+                "error": "being processed by another worker", "seconds": 0.0, "timings": {}, "prompt_tokens": None}, script_path
+    if run["status"] == "succeeded" and not reopen:
+        return {"work_item_id": work_item_id, "status": "succeeded", "stage": "pull_request",
+                "pr_url": run["pr_url"], "error": None, "seconds": 0.0, "timings": {}, "prompt_tokens": None}, script_path
+    # Keep the first attempt's file name, so the commit updates the same path
+    return None, run["script_path"]
+
+# ✅ Function to Report a Work Item whose Run Raised Outside the Stage Runner (e.g. a checkpoint or ADO error)
+def failed_outcome(work_item_id, error):
+    return {"work_item_id": work_item_id, "status": "failed", "stage": "worker", "pr_url": None, "error": str(error),
+            "seconds": 0.0, "timings": {}, "prompt_tokens": None}
+
+# ✅ Function to Summarize a Finished Stage Run as a Work Item Outcome
+def pipeline_outcome(work_item_id, pipeline):
+    failed = [name for name in pipeline["order"] if pipeline["status"].get(name) == "failed"]
+    return {
+        "work_item_id": work_item_id,
+        "status": "failed" if failed else "succeeded",
+        "stage": failed[0] if failed else "pull_request",
+        "pr_url": pipeline["results"].get("pull_request"),
+        "error": "; ".join(f"{name}: {pipeline['errors'][name]}" for name in failed) or None,
+        "seconds": round(pipeline["wall_clock"], 3),
+        "timings": {name: round(end - start, 3) for name, (start, end) in pipeline["timings"].items()},
+        "prompt_tokens": {
+            "before": pipeline["results"]["compact"]["tokens_before"],
+            "after": pipeline["results"]["compact"]["tokens_after"],
+        } if "compact" in pipeline["results"] else None,
+    }
+
+# ✅ Function to Run One Work Item through Generation → Branch → Commit → PR
+# With checkpoints, a rerun picks up after the last completed stage and an item claimed by another worker is skipped
+def process_work_item(work_item_id, work_item=None, latest_commit_id=None, script_path=None, show_timings=False,
+                      branch_name=None, checkpoints=CHECKPOINTS, reopen=False):
+    branch_name = branch_name or branch_name_for(work_item_id)
+    script_path = script_path or script_path_for(work_item_id)
+
+    run_key = f"{work_item_id}:{branch_name}"
+    owner = worker_id()
+    if checkpoints is not None:
+        outcome, script_path = claim_work_item(checkpoints, run_key, work_item_id, branch_name, script_path, owner,
+                                               reopen)
+        if outcome is not None:
+            return outcome
+
+    stages = build_work_item_stages(work_item_id, script_path, branch_name, work_item, latest_commit_id)
+    if checkpoints is not None:
+        stages = resumable_stages(stages, checkpoints, run_key, owner, script_path)
+
+    try:
+        with span("work_item", work_item_id=work_item_id, branch=branch_name):
+            pipeline = run_stages(stages)
+    except Exception as e:
+        if checkpoints is not None:
+            checkpoints.release(run_key, owner, "failed", error=str(e))
+        raise
+    if show_timings:
+        print_timings(pipeline)
+
+    outcome = pipeline_outcome(work_item_id, pipeline)
+    if checkpoints is not None:
+        checkpoints.release(run_key, owner, outcome["status"], outcome["pr_url"], outcome["error"])
+    return outcome
+
+# ✅ Function to Process Many Work Items: One Batched Read, then a Bounded Worker Pool
+def process_work_items(work_item_ids=None, wiql=None, max_workers=MAX_WORKERS):
+    if wiql:
+        work_item_ids = query_work_item_ids(wiql)
+    if not work_item_ids:
+        print("ℹ️ No work items to process.")
+        return []
+
+    work_items = get_work_items_batch(work_item_ids)
+    # Every branch starts from the same main commit, so look it up once for the whole batch
+    latest_commit_id = get_latest_commit()
+
+    outcomes = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(process_work_item, work_item["id"], work_item, latest_commit_id): work_item["id"]
+            for work_item in work_items
+        }
+        for future in as_completed(futures):
+            # One item that raises must not lose the outcomes of the others
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(failed_outcome(futures[future], e))
+
+    print_outcomes(outcomes)
+    return outcomes
+
+# ✅ Function to Print the Per-Item Report of a Bulk Run
+def print_outcomes(outcomes):
+    print("\n📊 Work Item Outcomes:")
+    for outcome in sorted(outcomes, key=lambda outcome: outcome["work_item_id"]):
+        icon = "✅" if outcome["status"] == "succeeded" else "❌"
+        detail = outcome["pr_url"] if outcome["status"] == "succeeded" else outcome["error"]
+        print(f"{icon} {outcome['work_item_id']} ({outcome['seconds']}s) {detail}")
+
+    succeeded = sum(1 for outcome in outcomes if outcome["status"] == "succeeded")
+    print(f"\n✅ {succeeded}/{len(outcomes)} work items processed successfully\n")
 
 # ✅ Run the script
 if __name__ == "__main__":
-    print("\n🚀 Starting Work Item Processing...\n")
-
-    # Step 1: Fetch Work Item
-    work_item_details = get_work_item(WORK_ITEM_ID)
+    parser = argparse.ArgumentParser(
+        description="Generate scripts and pull requests from Azure DevOps work items.",
+        epilog="To keep picking up new and updated work items, run devops_tasks/work_item_daemon.py instead.",
+    )
+    parser.add_argument("--ids", nargs="+", type=int, help="Process these work item IDs in one run")
+    parser.add_argument("--wiql", help="Process every work item returned by this WIQL query")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Work items processed at the same time")
+    parser.add_argument("--language", choices=list(LANGUAGES), default=SCRIPT_LANGUAGE,
+                        help="Language of the generated scripts")
+    args = parser.parse_args()
+    use_script_language(args.language)
+
+    if args.ids or args.wiql:
+        outcomes = process_work_items(args.ids, args.wiql, args.workers)
+        sys.exit(0 if all(outcome["status"] == "succeeded" for outcome in outcomes) else 1)
 
-    # Step 2: Generate the script using AI Agent
-    print("\n🛠️ Generating Script Based on Work Item Details...\n")
-    generated_code = generate_script(AGENT_ID, GENERATED_SCRIPT_PATH, work_item_details)
+    print("\n🚀 Starting Work Item Processing...\n")
 
-    if generated_code:
-        print("\n✅ Script Generation Completed Successfully!\n")
+    # Fetch, generate, branch, commit and PR run as a dependency graph, independent steps overlap
+    outcome = process_work_item(WORK_ITEM_ID, show_timings=True)
 
-        # Step 3: Create Branch in Azure DevOps
-        if create_branch():
-            # Step 4: Commit and Push the Script
-            if commit_script():
-                # Step 5: Create Pull Request
-                create_pull_request()
-            else:
-                print("\n❌ Commit failed. Skipping PR creation.\n")
-        else:
-            print("\n❌ Branch creation failed. Skipping commit & PR.\n")
+    if outcome["status"] == "succeeded":
+        print(f"\n✅ Work Item Processing Completed Successfully! PR: {outcome['pr_url']}\n")
     else:
-        print("\n❌ Script Generation Failed.\n")
\ No newline at end of file
+        print(f"\n❌ Work Item Processing Failed at '{outcome['stage']}': {outcome['error']}\n")
+        sys.exit(1)
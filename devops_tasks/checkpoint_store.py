@@ -0,0 +1,159 @@
+# ✅ SQLite checkpoint store for the work item pipeline: every finished stage is recorded with its result,
+# so a rerun resumes after the last completed stage, and a lease keeps two workers off the same item
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+
+CHECKPOINT_DB_PATH = ".agent_cache/checkpoints.db"  # Shared by every process on this machine
+LEASE_SECONDS = 30 * 60  # A claim that isn't renewed for this long belongs to a crashed worker and can be taken over
+BUSY_TIMEOUT_SECONDS = 30  # How long a writer waits for another process's transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_key TEXT PRIMARY KEY,
+    work_item_id TEXT NOT NULL,
+    branch_name TEXT NOT NULL,
+    script_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    pr_url TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stages (
+    run_key TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    result TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (run_key, stage)
+);
+"""
+
+
+# Identifies one worker thread across all the processes sharing the database file
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class CheckpointStore:
+    def __init__(self, path=CHECKPOINT_DB_PATH, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    # sqlite3 connections can't be shared between threads, and opening one is cheap
+    def _connect(self):
+        with self._init_lock:
+            # The database is created on first use, not when the module is imported
+            if not self._initialized:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+                try:
+                    # WAL lets readers keep going while another worker writes a checkpoint
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(SCHEMA)
+                finally:
+                    conn.close()
+                self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ✅ Take the run for `owner`; returns None while another worker holds a live lease on it.
+    # A run that already succeeded is returned as is, so the caller can report it without redoing anything,
+    # unless reopen asks to take it again (e.g. for a newer revision of the work item); its stages are kept.
+    def claim(self, run_key, work_item_id, branch_name, script_path, owner, reopen=False):
+        now = time.time()
+        conn = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front, so two workers can't both see the run as free
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM runs WHERE run_key = ?", (run_key,)).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO runs (run_key, work_item_id, branch_name, script_path, status, owner, lease_expires, "
+                    "attempts, updated_at) VALUES (?, ?, ?, ?, 'running', ?, ?, 1, ?)",
+                    (run_key, str(work_item_id), branch_name, script_path, owner, now + self.lease_seconds, now),
+                )
+            elif row["status"] == "succeeded" and not reopen:
+                conn.execute("COMMIT")
+                return dict(row)
+            elif row["status"] == "running" and row["owner"] != owner and row["lease_expires"] > now:
+                conn.execute("ROLLBACK")
+                return None
+            else:
+                conn.execute(
+                    "UPDATE runs SET status = 'running', owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "error = NULL, updated_at = ? WHERE run_key = ?",
+                    (owner, now + self.lease_seconds, now, run_key),
+                )
+            conn.execute("COMMIT")
+            return dict(conn.execute("SELECT * FROM runs WHERE run_key = ?", (run_key,)).fetchone())
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def completed_stages(self, run_key):
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT stage, result FROM stages WHERE run_key = ?", (run_key,)).fetchall()
+        finally:
+            conn.close()
+        return {row["stage"]: json.loads(row["result"]) for row in rows}
+
+    # Record a finished stage and renew the lease, a stage finishing proves the worker is alive
+    def record(self, run_key, stage, result, owner):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO stages (run_key, stage, result, completed_at) VALUES (?, ?, ?, ?)",
+                (run_key, stage, json.dumps(result), now),
+            )
+            conn.execute(
+                "UPDATE runs SET lease_expires = ?, updated_at = ? WHERE run_key = ? AND owner = ?",
+                (now + self.lease_seconds, now, run_key, owner),
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def discard(self, run_key, stages):
+        conn = self._connect()
+        try:
+            conn.executemany("DELETE FROM stages WHERE run_key = ? AND stage = ?", [(run_key, stage) for stage in stages])
+        finally:
+            conn.close()
+
+    # Give the run up with its final status, a failed run is resumed by the next claim
+    def release(self, run_key, owner, status, pr_url=None, error=None):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE runs SET status = ?, owner = NULL, lease_expires = NULL, pr_url = ?, error = ?, updated_at = ? "
+                "WHERE run_key = ? AND owner = ?",
+                (status, pr_url, error, time.time(), run_key, owner),
+            )
+        finally:
+            conn.close()
+
+    def runs(self, status=None):
+        conn = self._connect()
+        try:
+            if status is None:
+                rows = conn.execute("SELECT * FROM runs ORDER BY updated_at").fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM runs WHERE status = ? ORDER BY updated_at", (status,)).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
@@ -0,0 +1,157 @@
+# ✅ Tiny dependency-graph runner: every stage starts as soon as the stages it needs have finished
+import os
+import sys
+import time
+import asyncio
+import inspect
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agents"))
+from tracing import span
+
+
+class Stage:
+    def __init__(self, name, func, deps=()):
+        self.name = name
+        self.func = func  # Called with a dict of {dependency name: result}
+        self.deps = tuple(deps)
+
+
+def run_stages(stages, max_workers=None):
+    stages = {stage.name: stage for stage in stages}
+    for stage in stages.values():
+        missing = [dep for dep in stage.deps if dep not in stages]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stage(s): {', '.join(missing)}")
+
+    results, status, errors, timings = {}, {}, {}, {}
+    pending = dict(stages)
+    running = {}
+    started = time.perf_counter()
+
+    def run(stage):
+        stage_started = time.perf_counter()
+        try:
+            with span(f"stage.{stage.name}"):
+                return stage.func({dep: results[dep] for dep in stage.deps})
+        finally:
+            timings[stage.name] = (stage_started - started, time.perf_counter() - started)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1) as executor:
+        while pending or running:
+            changed = True
+            while changed:
+                changed = False
+                for name, stage in list(pending.items()):
+                    dep_status = [status.get(dep) for dep in stage.deps]
+                    if any(state in ("failed", "skipped") for state in dep_status):
+                        # An upstream stage failed, so this one can never run
+                        status[name] = "skipped"
+                        del pending[name]
+                        changed = True
+                    elif all(state == "succeeded" for state in dep_status):
+                        # Copy the caller's context, so stage spans nest under the caller's span
+                        running[executor.submit(contextvars.copy_context().run, run, stage)] = name
+                        del pending[name]
+
+            if not running:
+                if pending:
+                    raise ValueError(f"Dependency cycle between stages: {', '.join(pending)}")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                    status[name] = "succeeded"
+                except Exception as e:
+                    status[name] = "failed"
+                    errors[name] = str(e)
+
+    return {
+        "results": results,
+        "status": status,
+        "errors": errors,
+        "timings": timings,
+        "wall_clock": time.perf_counter() - started,
+        "order": list(stages),
+    }
+
+
+# The same runner on an event loop: stages may return awaitables, which are awaited instead of holding a thread
+async def run_stages_async(stages):
+    stages = {stage.name: stage for stage in stages}
+    for stage in stages.values():
+        missing = [dep for dep in stage.deps if dep not in stages]
+        if missing:
+            raise ValueError(f"Stage {stage.name} depends on unknown stage(s): {', '.join(missing)}")
+    ordered, visiting = set(), set()
+
+    def check_cycle(name):
+        if name in ordered:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle between stages: {', '.join(sorted(visiting))}")
+        visiting.add(name)
+        for dep in stages[name].deps:
+            check_cycle(dep)
+        visiting.discard(name)
+        ordered.add(name)
+
+    for name in stages:
+        check_cycle(name)
+
+    results, status, errors, timings = {}, {}, {}, {}
+    tasks = {}
+    started = time.perf_counter()
+
+    async def run(stage):
+        await asyncio.gather(*(tasks[dep] for dep in stage.deps))
+        if any(status[dep] != "succeeded" for dep in stage.deps):
+            # An upstream stage failed, so this one can never run
+            status[stage.name] = "skipped"
+            return
+        stage_started = time.perf_counter()
+        try:
+            with span(f"stage.{stage.name}"):
+                result = stage.func({dep: results[dep] for dep in stage.deps})
+                if inspect.isawaitable(result):
+                    result = await result
+            results[stage.name] = result
+            status[stage.name] = "succeeded"
+        except Exception as e:
+            status[stage.name] = "failed"
+            errors[stage.name] = str(e)
+        finally:
+            timings[stage.name] = (stage_started - started, time.perf_counter() - started)
+
+    for stage in stages.values():
+        tasks[stage.name] = asyncio.ensure_future(run(stage))
+    await asyncio.gather(*tasks.values())
+
+    return {
+        "results": results,
+        "status": status,
+        "errors": errors,
+        "timings": timings,
+        "wall_clock": time.perf_counter() - started,
+        "order": list(stages),
+    }
+
+
+# Per-stage timing table, with the time the same stages would take one after another
+def print_timings(pipeline):
+    print("\n⏱️ Stage timings:")
+    for name in pipeline["order"]:
+        state = pipeline["status"].get(name, "skipped")
+        if name in pipeline["timings"]:
+            start, end = pipeline["timings"][name]
+            print(f"   {name:<14} {state:<10} {start:6.2f}s → {end:6.2f}s ({end - start:.2f}s)")
+        else:
+            print(f"   {name:<14} {state:<10}")
+
+    serial = sum(end - start for start, end in pipeline["timings"].values())
+    wall_clock = pipeline["wall_clock"]
+    print(f"   Wall clock: {wall_clock:.2f}s, sequential: {serial:.2f}s, saved: {serial - wall_clock:.2f}s\n")
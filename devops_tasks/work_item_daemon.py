@@ -0,0 +1,344 @@
+# ✅ Long-running work item worker: polls a WIQL query for items changed since the last watermark and hands
+# them to a worker pool, so a new ticket gets its pull request within seconds instead of on the next manual run
+import os
+import re
+import json
+import time
+import queue
+import signal
+import logging
+import argparse
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import automate_devops_tasks as devops
+
+# ✅ Daemon Configuration
+WIQL = (
+    "SELECT [System.Id] FROM WorkItems "
+    "WHERE [System.TeamProject] = @project AND [System.WorkItemType] = 'Task' AND [System.State] = 'New'"
+)  # Work items that should get a generated script
+POLL_INTERVAL_SECONDS = 10  # Time between two WIQL queries
+WORKERS = devops.MAX_WORKERS  # Work items processed at the same time
+STATE_PATH = ".agent_cache/work_item_daemon.json"  # Watermark and handled revisions, kept across restarts
+RETRY_LIMIT = 3  # Attempts per revision; after that it waits for the next update to the item
+RETRY_BACKOFF_SECONDS = 30  # Wait before the first retry of a failed revision, doubled for every further one
+METRICS_HOST = "127.0.0.1"  # Interface the metrics endpoint listens on
+STAGE_SAMPLES = 500  # Latest latencies kept per stage for the percentiles
+DAEMON_FIELDS = devops.WORK_ITEM_FIELDS + ["System.Rev", "System.ChangedDate"]
+
+
+def utc_now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def parse_changed_date(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+# ✅ Function to Restrict a WIQL Query to Items Changed at or after the Watermark
+# Items changed in the same millisecond as the watermark come back again and are skipped by revision
+def with_changed_since(wiql, watermark):
+    condition = f"[System.ChangedDate] >= '{watermark}'"
+    order_by = re.search(r"\bORDER\s+BY\b", wiql, re.IGNORECASE)
+    body, order = (wiql[:order_by.start()], wiql[order_by.start():]) if order_by else (wiql, "")
+    where = re.search(r"\bWHERE\b", body, re.IGNORECASE)
+    if where:
+        body = f"{body[:where.end()]} {condition} AND ({body[where.end():].strip()}) "
+    else:
+        body = f"{body.rstrip()} WHERE {condition} "
+    return body + (order or "ORDER BY [System.ChangedDate]")
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[int(round(fraction * (len(sorted_values) - 1)))]
+
+
+class WorkItemDaemon:
+    def __init__(self, wiql=WIQL, workers=WORKERS, poll_interval=POLL_INTERVAL_SECONDS, state_path=STATE_PATH,
+                 since=None):
+        self.wiql = wiql
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.state_path = state_path
+
+        state = self._load_state()
+        # Without a saved watermark only changes from now on are picked up, --since backfills
+        self.watermark = since or state.get("watermark") or utc_now()
+        # work item ID -> (revision, its ChangedDate); older state files only kept the revision
+        self.handled = {
+            int(work_item_id): tuple(handled) if isinstance(handled, list) else (handled, self.watermark)
+            for work_item_id, handled in state.get("handled", {}).items()
+        }
+
+        self.counters = {"polls": 0, "poll_errors": 0, "enqueued": 0, "succeeded": 0, "failed": 0, "skipped": 0,
+                         "retried": 0, "prompt_tokens_before": 0, "prompt_tokens_after": 0}
+        self.last_poll = None
+        self._queue = queue.Queue()  # Work item IDs, the latest revision of each is in _pending
+        self._pending = {}  # work item ID -> (work item, enqueued at)
+        self._in_flight = {}  # work item ID -> work item
+        self._retries = {}  # work item ID -> (failed work item, attempts so far, time.time() of the next attempt)
+        self._stage_seconds = {}  # stage -> latest durations
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # Only everything older than the oldest queued, running or retried item is done, so that is what a restart
+    # resumes from
+    def _committed_watermark(self):
+        open_dates = [
+            work_item["fields"]["System.ChangedDate"]
+            for work_item in [work_item for work_item, _ in self._pending.values()] + list(self._in_flight.values())
+            + [work_item for work_item, _, _ in self._retries.values()]
+        ]
+        return min(open_dates, key=parse_changed_date) if open_dates else self.watermark
+
+    def _save_state(self):
+        with self._lock:
+            watermark = self._committed_watermark()
+            # Queries only return items changed at or after the watermark, so older handled revisions can't come back
+            self.handled = {
+                work_item_id: (rev, changed_date) for work_item_id, (rev, changed_date) in self.handled.items()
+                if parse_changed_date(changed_date) >= parse_changed_date(watermark)
+            }
+            state = {"watermark": watermark, "handled": self.handled}
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=4)
+            os.replace(temp_path, self.state_path)
+
+    def _record(self, stage, seconds):
+        self._stage_seconds.setdefault(stage, deque(maxlen=STAGE_SAMPLES)).append(seconds)
+
+    def _enqueue(self, work_item):
+        work_item_id = work_item["id"]
+        # A newer revision of a queued item replaces it; a running item is queued again once it finishes
+        waiting = work_item_id in self._pending or work_item_id in self._in_flight
+        enqueued_at = self._pending[work_item_id][1] if work_item_id in self._pending else time.perf_counter()
+        self._pending[work_item_id] = (work_item, enqueued_at)
+        if not waiting:
+            self._queue.put(work_item_id)
+        self.counters["enqueued"] += 1
+
+    # Failed revisions whose backoff has passed go back into the queue
+    def _enqueue_due_retries(self):
+        now = time.time()
+        with self._lock:
+            due = [
+                work_item for work_item_id, (work_item, _, retry_at) in self._retries.items()
+                if retry_at <= now and work_item_id not in self._pending and work_item_id not in self._in_flight
+            ]
+            for work_item in due:
+                self._enqueue(work_item)
+        return len(due)
+
+    # ✅ Query once for changed work items and queue every revision that wasn't handled yet, plus due retries
+    def poll_once(self):
+        enqueued = self._enqueue_due_retries()
+        work_item_ids = devops.query_work_item_ids(with_changed_since(self.wiql, self.watermark), time_precision=True)
+        self.last_poll = utc_now()
+        self.counters["polls"] += 1
+        if not work_item_ids:
+            if enqueued:
+                self._save_state()
+            return enqueued
+
+        for work_item in devops.get_work_items_batch(work_item_ids, DAEMON_FIELDS):
+            work_item_id, fields = work_item["id"], work_item["fields"]
+            if parse_changed_date(fields["System.ChangedDate"]) > parse_changed_date(self.watermark):
+                self.watermark = fields["System.ChangedDate"]
+
+            with self._lock:
+                known_revs = [self.handled.get(work_item_id, (0, None))[0]]
+                if work_item_id in self._pending:
+                    known_revs.append(self._pending[work_item_id][0]["fields"]["System.Rev"])
+                if work_item_id in self._in_flight:
+                    known_revs.append(self._in_flight[work_item_id]["fields"]["System.Rev"])
+                if work_item_id in self._retries:
+                    known_revs.append(self._retries[work_item_id][0]["fields"]["System.Rev"])
+                if fields["System.Rev"] <= max(known_revs):
+                    continue
+
+                # A newer revision starts over, it no longer waits for the failed one's backoff
+                self._retries.pop(work_item_id, None)
+                self._enqueue(work_item)
+                enqueued += 1
+
+        self._save_state()
+        return enqueued
+
+    def _process(self, work_item_id, work_item, enqueued_at):
+        started = time.perf_counter()
+        try:
+            # Every revision goes to the item's one branch and run: an update resumes from its checkpoints, redoes
+            # what the new text changes and pushes onto the branch the open pull request already tracks
+            outcome = devops.process_work_item(work_item_id, work_item, reopen=True)
+        except Exception as e:
+            outcome = devops.failed_outcome(work_item_id, e)
+        finished = time.perf_counter()
+
+        rev = work_item["fields"]["System.Rev"]
+        retry_in = None
+        with self._lock:
+            del self._in_flight[work_item_id]
+            attempts = self._retries.pop(work_item_id, (None, 0, None))[1] + 1
+            if outcome["status"] == "failed" and attempts < RETRY_LIMIT and work_item_id not in self._pending:
+                # Retried from the checkpoints after a backoff, unless a newer revision is already queued
+                retry_in = RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+                self._retries[work_item_id] = (work_item, attempts, time.time() + retry_in)
+                self.counters["retried"] += 1
+            else:
+                self.handled[work_item_id] = (rev, work_item["fields"]["System.ChangedDate"])
+            self.counters[outcome["status"]] += 1
+            self._record("queued", started - enqueued_at)
+            for stage, seconds in outcome["timings"].items():
+                self._record(stage, seconds)
+            self._record("total", finished - enqueued_at)
+            if outcome["prompt_tokens"]:
+                self.counters["prompt_tokens_before"] += outcome["prompt_tokens"]["before"]
+                self.counters["prompt_tokens_after"] += outcome["prompt_tokens"]["after"]
+            if outcome["status"] == "succeeded":
+                changed_at = parse_changed_date(work_item["fields"]["System.ChangedDate"])
+                self._record("ticket_to_pr", (datetime.now(timezone.utc) - changed_at).total_seconds())
+            if work_item_id in self._pending:
+                self._queue.put(work_item_id)
+
+        icon = "✅" if outcome["status"] == "succeeded" else "❌"
+        detail = outcome.get("pr_url") if outcome["status"] == "succeeded" else f"{outcome['stage']}: {outcome['error']}"
+        print(f"{icon} Work item {work_item_id} rev {rev} ({finished - enqueued_at:.2f}s) {detail}")
+        if retry_in is not None:
+            print(f"🔁 Retrying work item {work_item_id} rev {rev} in {retry_in}s (attempt {attempts + 1}/{RETRY_LIMIT})")
+        self._save_state()
+
+    def _work(self):
+        while True:
+            work_item_id = self._queue.get()
+            if work_item_id is None:
+                return
+            with self._lock:
+                work_item, enqueued_at = self._pending.pop(work_item_id)
+                self._in_flight[work_item_id] = work_item
+            self._process(work_item_id, work_item, enqueued_at)
+
+    # ✅ Queue depth, in-flight count, counters and per-stage latency percentiles
+    def metrics(self):
+        with self._lock:
+            stage_latency = {}
+            for stage, samples in self._stage_seconds.items():
+                values = sorted(samples)
+                stage_latency[stage] = {
+                    "count": len(values),
+                    "p50": round(_percentile(values, 0.5), 3),
+                    "p95": round(_percentile(values, 0.95), 3),
+                    "max": round(values[-1], 3),
+                }
+            return {
+                "queue_depth": len(self._pending),
+                "in_flight": len(self._in_flight),
+                "retrying": len(self._retries),
+                "watermark": self.watermark,
+                "last_poll": self.last_poll,
+                "counters": dict(self.counters),
+                "stage_latency": stage_latency,
+            }
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._work, name=f"work-item-worker-{index}")
+                         for index in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # ✅ Poll until stopped, then let running items finish; queued ones are picked up again on the next start
+    def run(self):
+        self.start()
+        print(f"🚀 Watching for work items changed since {self.watermark}, {self.workers} workers, "
+              f"polling every {self.poll_interval}s")
+        try:
+            while not self._stop.is_set():
+                try:
+                    if self.poll_once():
+                        snapshot = self.metrics()
+                        print(f"📥 Queue depth {snapshot['queue_depth']}, in flight {snapshot['in_flight']}")
+                except Exception as e:
+                    self.counters["poll_errors"] += 1
+                    logging.error(f"❌ Polling work items failed: {e}")
+                self._stop.wait(self.poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self._stop.set()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._save_state()
+        print(f"🛑 Stopped, {len(self._pending)} queued work item(s) will be picked up on the next start")
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        payload = json.dumps(self.server.work_item_daemon.metrics(), indent=2).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+# ✅ Serve daemon.metrics() as JSON on GET /metrics from a background thread
+def serve_metrics(daemon, port, host=METRICS_HOST):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.work_item_daemon = daemon
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📊 Metrics at http://{host}:{server.server_port}/metrics")
+    return server
+
+
+# ✅ Run the daemon
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep generating scripts and pull requests for new and updated work items.")
+    parser.add_argument("--wiql", default=WIQL, help="Work items to watch")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Work items processed at the same time")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL_SECONDS, help="Seconds between polls")
+    parser.add_argument("--retry-backoff", type=float, default=RETRY_BACKOFF_SECONDS,
+                        help="Seconds before a failed revision is retried, doubled for every further attempt")
+    parser.add_argument("--since", help="Also process items changed after this UTC time, e.g. 2024-05-01T00:00:00.000Z")
+    parser.add_argument("--metrics-port", type=int, help="Serve queue and latency metrics as JSON on this port")
+    args = parser.parse_args()
+    RETRY_BACKOFF_SECONDS = args.retry_backoff
+
+    daemon = WorkItemDaemon(args.wiql, args.workers, args.poll_interval, since=args.since)
+    if args.metrics_port is not None:
+        serve_metrics(daemon, args.metrics_port)
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    daemon.run()
@@ -0,0 +1,87 @@
+# Shared fixtures: the agent and DevOps scripts run against the fake ADO server and fake agent clients
+# from benchmarks/, in a scratch directory, so no test needs Azure or writes into the repository
+import os
+import sys
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for directory in ("agents", "devops_tasks", "benchmarks"):
+    sys.path.append(os.path.join(ROOT, directory))
+
+import automate_devops_tasks as devops
+import async_devops_tasks
+import project_client_pool
+from checkpoint_store import CheckpointStore
+from project_client_pool import ProjectClientPool, AsyncProjectClientPool
+from run_scheduler import RunScheduler, set_default_scheduler
+from fake_ado_server import FakeAdoServer
+from fake_project_client import FakeProjectClient, FakeAsyncProjectClient
+
+
+class FakeAgents:
+    def __init__(self):
+        self.clients = []
+
+    def sync_client(self, conn_str, credential):
+        self.clients.append(FakeProjectClient(run_latency=0.0, upload_latency=0.0))
+        return self.clients[-1]
+
+    def async_client(self, conn_str, credential):
+        self.clients.append(FakeAsyncProjectClient(run_latency=0.0, upload_latency=0.0))
+        return self.clients[-1]
+
+    def _operations(self):
+        return [getattr(client.agents, "_operations", client.agents) for client in self.clients]
+
+    # The fake agent always sends the same reply, so an edited ticket needs a different one to change the script
+    def change_reply(self, old, new):
+        for operations in self._operations():
+            operations.reply = operations.reply.replace(old, new)
+
+    def model_runs(self):
+        return sum(operations.calls.get("create_and_process_run", 0) for operations in self._operations())
+
+
+@pytest.fixture
+def fake_agents():
+    agents = FakeAgents()
+    previous_pool = project_client_pool.set_default_pool(
+        ProjectClientPool(client_factory=agents.sync_client, credential_factory=lambda: None)
+    )
+    previous_async_pool = project_client_pool.set_default_async_pool(
+        AsyncProjectClientPool(client_factory=agents.async_client, credential_factory=lambda: None)
+    )
+    set_default_scheduler(RunScheduler(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+    yield agents
+    project_client_pool.set_default_pool(previous_pool)
+    project_client_pool.set_default_async_pool(previous_async_pool)
+
+
+@pytest.fixture
+def ado_server(tmp_path, monkeypatch, fake_agents):
+    # Generated scripts are committed under their relative path, so they land in the scratch directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(devops.RESULT_CACHE, "cache_dir", str(tmp_path / "results"))
+    # process_work_item's default store is bound at import, so point that object at a fresh database
+    monkeypatch.setattr(devops.CHECKPOINTS, "path", str(tmp_path / "checkpoints.db"))
+    monkeypatch.setattr(devops.CHECKPOINTS, "_initialized", False)
+    monkeypatch.setattr(devops, "ADO_PAT", "pat")
+    monkeypatch.setattr(devops, "ADO_REPO", "repo")
+    monkeypatch.setattr(devops, "AGENT_ID", "asst")
+    monkeypatch.setattr(devops, "_ado_client", None)
+    monkeypatch.setattr(async_devops_tasks, "_ado_client", None)
+
+    with FakeAdoServer() as server:
+        monkeypatch.setattr(devops, "ADO_BASE_URL", server.base_url)
+        yield server
+        if devops._ado_client is not None:
+            devops._ado_client.close()
+
+
+@pytest.fixture
+def checkpoints(tmp_path):
+    return CheckpointStore(str(tmp_path / "run_checkpoints.db"))
+
+
+def branch_pushes(server, branch_name):
+    return [push for push in server.state.pushes if push["refUpdates"][0]["name"] == f"refs/heads/{branch_name}"]
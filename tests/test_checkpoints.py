@@ -0,0 +1,84 @@
+# Resuming work items from their checkpoints, in the thread and asyncio flows
+import asyncio
+import automate_devops_tasks as devops
+import async_devops_tasks
+from conftest import branch_pushes
+
+WORK_ITEM_ID = 9001
+
+
+def no_pull_request(branch_name, work_item_id):
+    return None
+
+
+async def no_pull_request_async(branch_name, work_item_id):
+    return None
+
+
+def test_rerun_resumes_after_the_pull_request_failed(ado_server, fake_agents, checkpoints, monkeypatch):
+    ado_server.state.add_work_item(WORK_ITEM_ID, "Ticket", "Parse a CSV file and print totals")
+    create_pull_request = devops.create_pull_request
+
+    monkeypatch.setattr(devops, "create_pull_request", no_pull_request)
+    first = devops.process_work_item(WORK_ITEM_ID, checkpoints=checkpoints)
+    runs_after_first = fake_agents.model_runs()
+    monkeypatch.setattr(devops, "create_pull_request", create_pull_request)
+    rerun = devops.process_work_item(WORK_ITEM_ID, checkpoints=checkpoints)
+    again = devops.process_work_item(WORK_ITEM_ID, checkpoints=checkpoints)
+
+    assert (first["status"], first["stage"]) == ("failed", "pull_request")
+    assert rerun["status"] == "succeeded"
+    assert fake_agents.model_runs() == runs_after_first == 1
+    assert again["pr_url"] == rerun["pr_url"]
+    assert len(ado_server.state.pull_requests) == 1
+
+
+def test_rerun_after_an_edit_pushes_onto_the_branch(ado_server, fake_agents, checkpoints, monkeypatch):
+    ado_server.state.add_work_item(WORK_ITEM_ID, "Ticket", "Parse a CSV file")
+    create_pull_request = devops.create_pull_request
+
+    monkeypatch.setattr(devops, "create_pull_request", no_pull_request)
+    devops.process_work_item(WORK_ITEM_ID, checkpoints=checkpoints)
+    monkeypatch.setattr(devops, "create_pull_request", create_pull_request)
+    ado_server.state.update_work_item(WORK_ITEM_ID, **{"System.Description": "Parse a CSV file and print totals"})
+    fake_agents.change_reply("len(numbers)", "max(len(numbers), 1)")
+    edited = devops.process_work_item(WORK_ITEM_ID, checkpoints=checkpoints)
+
+    assert edited["status"] == "succeeded", edited["error"]
+    assert fake_agents.model_runs() == 2
+    assert len(branch_pushes(ado_server, devops.branch_name_for(WORK_ITEM_ID))) == 2
+    assert len(ado_server.state.pull_requests) == 1
+
+
+def test_async_rerun_after_an_edit_pushes_onto_the_branch(ado_server, fake_agents, checkpoints, monkeypatch):
+    ado_server.state.add_work_item(WORK_ITEM_ID, "Ticket", "Parse a CSV file")
+    create_pull_request = async_devops_tasks.create_pull_request
+
+    # One event loop for every run, the aiohttp session is bound to it
+    async def scenario():
+        try:
+            monkeypatch.setattr(async_devops_tasks, "create_pull_request", no_pull_request_async)
+            first = await async_devops_tasks.process_work_item(WORK_ITEM_ID, checkpoints=checkpoints)
+            monkeypatch.setattr(async_devops_tasks, "create_pull_request", create_pull_request)
+            ado_server.state.update_work_item(WORK_ITEM_ID, **{"System.Description": "Parse a CSV file and print totals"})
+            fake_agents.change_reply("len(numbers)", "max(len(numbers), 1)")
+            return first, await async_devops_tasks.process_work_item(WORK_ITEM_ID, checkpoints=checkpoints)
+        finally:
+            await async_devops_tasks.close_clients()
+
+    first, edited = asyncio.run(scenario())
+
+    assert (first["status"], first["stage"]) == ("failed", "pull_request")
+    assert edited["status"] == "succeeded", edited["error"]
+    assert len(branch_pushes(ado_server, devops.branch_name_for(WORK_ITEM_ID))) == 2
+
+
+def test_a_claimed_work_item_is_skipped(ado_server, checkpoints):
+    ado_server.state.add_work_item(WORK_ITEM_ID, "Ticket", "Parse a CSV file")
+    run_key = f"{WORK_ITEM_ID}:{devops.branch_name_for(WORK_ITEM_ID)}"
+    checkpoints.claim(run_key, WORK_ITEM_ID, devops.branch_name_for(WORK_ITEM_ID), "script.java", "other-worker")
+
+    outcome = devops.process_work_item(WORK_ITEM_ID, checkpoints=checkpoints)
+
+    assert outcome["status"] == "skipped"
+    assert ado_server.state.pushes == []
@@ -0,0 +1,69 @@
+# Stitching a module back together after it was refactored unit by unit
+import pytest
+from chunked_refactor import split_units, _assemble
+from standards_checker import check_source
+
+SOURCE = '''import os
+
+
+def loadData(path):
+    return open(path).read()
+
+
+def report(path):
+    return len(loadData(path))
+'''
+RENAMES = {"loadData": "load_data"}
+
+
+def units_by_name():
+    units = split_units(SOURCE)
+    return units, {unit.name: unit for unit in units}
+
+
+def test_all_units_refactored_are_stitched_in_order():
+    units, named = units_by_name()
+    replacements = {
+        named["loadData"].start: "def load_data(path):\n    return open(path).read()\n",
+        named["report"].start: "def report(path):\n    return len(load_data(path))\n",
+    }
+
+    code, stats = _assemble(units, RENAMES, replacements, [])
+
+    assert "loadData" not in code
+    assert code.index("def load_data") < code.index("def report")
+    assert stats["refactored_units"] == 2
+
+
+def test_a_failed_unit_using_a_renamed_name_fails_the_module():
+    units, named = units_by_name()
+    replacements = {named["loadData"].start: "def load_data(path):\n    return open(path).read()\n"}
+
+    with pytest.raises(ValueError, match="report"):
+        _assemble(units, RENAMES, replacements, [named["report"].label])
+
+
+def test_units_are_joined_with_the_standard_blank_lines():
+    source = ("import os\ndef load(path):\n    return path\nclass Reader:\n    def a(self):\n        return 1\n\n\n\n"
+              "    def b(self):\n        return 2\n")
+    units = split_units(source)
+    reader = [unit for unit in units if unit.name == "Reader"][0]
+
+    code, _ = _assemble(units, {}, {reader.start: reader.text}, [])
+
+    assert [violation for violation in check_source(code, "script.py") if violation.rule == "BLANK_LINES"] == []
+    assert "return path\n\n\nclass Reader" in code
+
+
+def test_imports_added_to_a_unit_move_to_the_header():
+    units, named = units_by_name()
+    replacements = {
+        named["loadData"].start: "from typing import Any\nimport os\n\n\ndef load_data(path) -> Any:\n"
+                                 "    return open(path).read()\n",
+        named["report"].start: "import yaml\ndef report(path):\n    return len(load_data(path))\n",
+    }
+
+    code, _ = _assemble(units, RENAMES, replacements, [])
+
+    assert code.startswith("import os\nfrom typing import Any\n\nimport yaml\n\n\ndef load_data")
+    assert code.count("import os") == 1
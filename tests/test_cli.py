@@ -0,0 +1,29 @@
+# Every command line entry point imports and parses its arguments
+import os
+import sys
+import subprocess
+import pytest
+from conftest import ROOT
+
+ENTRY_POINTS = [
+    "agents/async_agents.py",
+    "agents/chat_with_agent.py",
+    "agents/chat_with_agent_refactor.py",
+    "agents/setup_agents.py",
+    "agents/tracing.py",
+    "agents/java/java-coding-agent-setup.py",
+    "agents/python/python-coding-agent-setup.py",
+    "devops_tasks/async_devops_tasks.py",
+    "devops_tasks/automate_devops_tasks.py",
+    "devops_tasks/work_item_daemon.py",
+]
+
+
+@pytest.mark.parametrize("script", ENTRY_POINTS)
+def test_help(script, tmp_path):
+    result = subprocess.run([sys.executable, os.path.join(ROOT, script), "--help"], cwd=tmp_path,
+                            capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.startswith("usage:")
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,13 @@
+# Grouping scripts by language for the per-language refactor lanes
+from language_router import group_by_language
+
+
+def test_group_by_language(tmp_path):
+    script = tmp_path / "deploy"
+    script.write_text("#!/usr/bin/env python3\nprint('deploy')\n", encoding="utf-8")
+    paths = ["a.py", "Main.java", str(script), "notes.txt", "b.py"]
+
+    assert group_by_language(paths) == ({"python": ["a.py", str(script), "b.py"], "java": ["Main.java"]},
+                                        ["notes.txt"])
+    assert group_by_language(paths, {"python": None}) == ({"python": ["a.py", str(script), "b.py"]},
+                                                          ["Main.java", "notes.txt"])
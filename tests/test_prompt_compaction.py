@@ -0,0 +1,42 @@
+# Compacting work item text: HTML layout is dropped, pasted logs keep their lines and get collapsed
+from prompt_compaction import html_to_text, compact_prompt
+
+LOG = "\n".join(f"2024-05-01 02:00:{second % 60:02d} ERROR [importer] Timeout after {1000 + second}ms"
+                for second in range(500))
+TRACE = "java.lang.IllegalStateException: pool exhausted\n" + "\n".join(
+    f"    at com.acme.importer.Step{index}.run(Step{index}.java:{index})" for index in range(40)
+)
+COLLAPSED_LOG = [
+    "2024-05-01 02:00:00 ERROR [importer] Timeout after 1000ms",
+    "(same line repeated 499 more times)",
+    "java.lang.IllegalStateException: pool exhausted",
+    "    at com.acme.importer.Step0.run(Step0.java:0)",
+    "    at com.acme.importer.Step1.run(Step1.java:1)",
+    "    at com.acme.importer.Step2.run(Step2.java:2)",
+    "    ... 36 more frames",
+    "    at com.acme.importer.Step39.run(Step39.java:39)",
+]
+
+
+def test_markup_line_breaks_are_layout():
+    html = "<div>Read orders.csv\n   and print&nbsp; totals</div><ul>\n<li> per customer</li>\n</ul><p>Done</p>"
+
+    assert html_to_text(html) == "Read orders.csv and print totals\n- per customer\n\nDone\n"
+
+
+def test_preformatted_text_keeps_its_lines():
+    assert html_to_text("<p>Log:</p><pre>\nfirst\n    indented\n</pre>") == "Log:\n\nfirst\n    indented"
+
+
+def test_log_in_pre_is_collapsed_not_trimmed():
+    compacted = compact_prompt(f"Task: Fix the importer\n<div>It crashes.</div><pre>{LOG}\n{TRACE}</pre>")
+
+    assert compacted["trimmed_sections"] == 0
+    assert compacted["text"].split("\n")[-len(COLLAPSED_LOG):] == COLLAPSED_LOG
+
+
+def test_plain_text_log_is_collapsed_not_trimmed():
+    compacted = compact_prompt(f"Task: Fix the importer\nIt crashes.\n\n{LOG}\n{TRACE}")
+
+    assert compacted["trimmed_sections"] == 0
+    assert compacted["text"].split("\n")[-len(COLLAPSED_LOG):] == COLLAPSED_LOG
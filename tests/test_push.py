@@ -0,0 +1,50 @@
+# Pushing generated scripts: unchanged files are left out, and later pushes go on top of the branch head
+import os
+import automate_devops_tasks as devops
+from conftest import branch_pushes
+
+BRANCH_NAME = "feature/workitem-1"
+
+
+def write_script(script_path, content):
+    os.makedirs(os.path.dirname(script_path), exist_ok=True)
+    with open(script_path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def test_only_changed_files_are_pushed(ado_server):
+    main_commit = devops.get_latest_commit()
+    devops.create_branch(BRANCH_NAME, main_commit)
+    write_script("generated_scripts/a.py", "print('a')\n")
+    write_script("generated_scripts/b.py", "print('b')\n")
+
+    assert devops.commit_scripts(["generated_scripts/a.py", "generated_scripts/b.py"], BRANCH_NAME, 1, main_commit)
+    write_script("generated_scripts/b.py", "print('b', flush=True)\n")
+    assert devops.commit_scripts(["generated_scripts/a.py", "generated_scripts/b.py"], BRANCH_NAME, 1)
+    assert devops.commit_scripts(["generated_scripts/a.py", "generated_scripts/b.py"], BRANCH_NAME, 1)
+
+    pushes = branch_pushes(ado_server, BRANCH_NAME)
+    assert len(pushes) == 2
+    assert [change["item"]["path"] for change in pushes[1]["commits"][0]["changes"]] == ["/generated_scripts/b.py"]
+    assert pushes[1]["commits"][0]["changes"][0]["changeType"] == "edit"
+
+
+def test_second_push_goes_on_top_of_the_branch_head(ado_server):
+    main_commit = devops.get_latest_commit()
+    devops.create_branch(BRANCH_NAME, main_commit)
+    write_script("generated_scripts/a.py", "print('a')\n")
+    assert devops.commit_script("generated_scripts/a.py", BRANCH_NAME, 1,
+                                devops.push_base_commit(main_commit, None), None)
+
+    write_script("generated_scripts/a.py", "print('a', flush=True)\n")
+    remote_blob = devops.get_item_object_id("/generated_scripts/a.py", BRANCH_NAME)
+    # main's commit is stale for the branch now, the fake server rejects it like Azure DevOps does
+    assert not devops.commit_script("generated_scripts/a.py", BRANCH_NAME, 1, main_commit, remote_blob)
+    assert devops.commit_script("generated_scripts/a.py", BRANCH_NAME, 1,
+                                devops.push_base_commit(main_commit, remote_blob), remote_blob)
+    assert len(branch_pushes(ado_server, BRANCH_NAME)) == 2
+
+
+def test_push_base_commit():
+    assert devops.push_base_commit("abc", None) == "abc"
+    assert devops.push_base_commit("abc", "blob") is None
@@ -0,0 +1,9 @@
+# The model quota the batch entry points print next to their worker count
+from run_scheduler import RunScheduler, describe_quota
+
+
+def test_describe_quota_names_the_limits_and_their_settings():
+    line = describe_quota(RunScheduler(requests_per_minute=60, tokens_per_minute=60000))
+
+    assert "60 requests/min" in line and "60000 tokens/min" in line
+    assert "MODEL_REQUESTS_PER_MINUTE" in line
@@ -0,0 +1,46 @@
+# The local check of the deterministic Python standards
+from standards_checker import check_source
+
+COMPLIANT = '''"""Totals."""
+import os
+
+
+def add(a: int, b: int) -> int:
+    """Add two numbers."""
+    return a + b
+'''
+
+
+def rules(source):
+    return {(violation.line, violation.rule) for violation in check_source(source, "script.py")}
+
+
+def test_compliant_source_has_no_violations():
+    assert check_source(COMPLIANT, "script.py") == []
+
+
+def test_naming_docstrings_and_type_hints():
+    source = '"""Totals."""\n\n\ndef badName(x):\n    return x\n\n\nclass thing:\n    pass\n\n\nf = lambda Value: Value\n'
+
+    assert rules(source) == {
+        (4, "FUNCTION_NAMES"), (4, "DOCSTRINGS"), (4, "TYPE_HINTS"),
+        (8, "CLASS_NAMES"), (8, "DOCSTRINGS"),
+        (12, "VARIABLE_NAMES"),
+    }
+
+
+def test_blank_lines_and_imports_order():
+    source = ('"""Totals."""\nimport yaml\nimport os\n\n\n'
+              'def a() -> None:\n    """A."""\n\ndef b() -> None:\n    """B."""\n')
+
+    assert rules(source) == {(3, "IMPORTS_ORDER"), (9, "BLANK_LINES")}
+
+
+def test_function_length():
+    source = '"""Totals."""\n\n\ndef f() -> None:\n    """F."""\n' + "    x = 1\n" * 60
+
+    assert rules(source) == {(4, "FUNCTION_LENGTH")}
+
+
+def test_module_docstring():
+    assert rules(COMPLIANT.split("\n", 1)[1]) == {(1, "DOCSTRINGS")}
@@ -0,0 +1,36 @@
+# Processes sharing one upload registry file
+import os
+from upload_registry import UploadRegistry
+
+
+def test_registries_on_one_file_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / "uploads.json")
+    first, second = UploadRegistry(path), UploadRegistry(path)
+
+    first.record("hash-a", "file-a", "a.py")
+    second.record("hash-b", "file-b", "b.py")
+    first.forget("hash-missing")
+
+    assert UploadRegistry(path).live_entries() == {"hash-a": "file-a", "hash-b": "file-b"}
+    assert not os.path.exists(f"{path}.lock")
+
+
+def test_only_one_registry_per_interval_claims_the_sweep(tmp_path):
+    path = str(tmp_path / "uploads.json")
+    first, second = UploadRegistry(path), UploadRegistry(path)
+
+    assert first.claim_sweep()
+    assert not second.claim_sweep()
+    assert not first.claim_sweep()
+    assert UploadRegistry(path, sweep_interval_seconds=0).claim_sweep()
+
+
+def test_a_stale_lock_file_is_taken_over(tmp_path):
+    path = str(tmp_path / "uploads.json")
+    with open(f"{path}.lock", "w") as f:
+        f.write("")
+    os.utime(f"{path}.lock", (0, 0))
+
+    UploadRegistry(path).record("hash-a", "file-a", "a.py")
+
+    assert UploadRegistry(path).lookup("hash-a") == "file-a"
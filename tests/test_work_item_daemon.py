@@ -0,0 +1,77 @@
+# The work item daemon: failed revisions are retried, updates go to the item's one branch,
+# and a restart does not redo what was handled
+import automate_devops_tasks as devops
+import work_item_daemon
+from work_item_daemon import WorkItemDaemon
+from conftest import branch_pushes
+
+WORK_ITEM_ID = 9001
+
+
+# Process everything queued so far on the calling thread, instead of the worker threads run() starts
+def drain(daemon):
+    daemon._queue.put(None)
+    daemon._work()
+
+
+def make_daemon(tmp_path):
+    return WorkItemDaemon(workers=1, poll_interval=0, state_path=str(tmp_path / "daemon.json"))
+
+
+def test_failed_revision_is_retried(ado_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(work_item_daemon, "RETRY_BACKOFF_SECONDS", 0)
+    create_pull_request = devops.create_pull_request
+    flaky = {WORK_ITEM_ID}
+
+    def flaky_create_pull_request(branch_name, work_item_id):
+        if work_item_id in flaky:
+            flaky.discard(work_item_id)
+            return None
+        return create_pull_request(branch_name, work_item_id)
+
+    monkeypatch.setattr(devops, "create_pull_request", flaky_create_pull_request)
+    daemon = make_daemon(tmp_path)
+    ado_server.state.add_work_item(WORK_ITEM_ID, "Ticket", "Parse a CSV file and print totals")
+
+    assert daemon.poll_once() == 1
+    drain(daemon)
+    assert daemon.metrics()["retrying"] == 1
+    assert daemon.poll_once() == 1
+    drain(daemon)
+
+    counters = daemon.metrics()["counters"]
+    assert (counters["failed"], counters["retried"], counters["succeeded"]) == (1, 1, 1)
+    assert daemon.metrics()["retrying"] == 0
+    assert daemon.handled[WORK_ITEM_ID][0] == 1
+    assert len(ado_server.state.pull_requests) == 1
+
+
+def test_update_goes_to_the_same_branch(ado_server, fake_agents, tmp_path):
+    daemon = make_daemon(tmp_path)
+    ado_server.state.add_work_item(WORK_ITEM_ID, "Ticket", "Parse a CSV file")
+    daemon.poll_once()
+    drain(daemon)
+
+    fake_agents.change_reply("len(numbers)", "max(len(numbers), 1)")
+    ado_server.state.update_work_item(WORK_ITEM_ID, **{"System.Description": "Parse a CSV file and print totals"})
+    assert daemon.poll_once() == 1
+    drain(daemon)
+
+    branches = [ref for ref in ado_server.state.refs if f"workitem-{WORK_ITEM_ID}" in ref]
+    assert branches == [f"refs/heads/{devops.branch_name_for(WORK_ITEM_ID)}"]
+    assert len(branch_pushes(ado_server, devops.branch_name_for(WORK_ITEM_ID))) == 2
+    assert len(ado_server.state.pull_requests) == 1
+    assert daemon.counters["succeeded"] == 2
+    assert daemon.handled[WORK_ITEM_ID][0] == 2
+
+
+def test_restart_does_not_redo_handled_revisions(ado_server, tmp_path):
+    daemon = make_daemon(tmp_path)
+    ado_server.state.add_work_item(WORK_ITEM_ID, "Ticket", "Parse a CSV file")
+    daemon.poll_once()
+    drain(daemon)
+
+    restarted = make_daemon(tmp_path)
+
+    assert restarted.handled == daemon.handled
+    assert restarted.poll_once() == 0
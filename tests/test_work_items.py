@@ -0,0 +1,53 @@
+# Bulk runs: one work item that raises is reported as failed, the others still get their outcomes
+import asyncio
+import automate_devops_tasks as devops
+import async_devops_tasks
+
+WORK_ITEM_IDS = [9001, 9002, 9003]
+BROKEN_ID = 9002
+
+
+def add_work_items(server):
+    for work_item_id in WORK_ITEM_IDS:
+        server.state.add_work_item(work_item_id, f"Ticket {work_item_id}", "Parse a CSV file and print totals")
+
+
+def test_a_raising_work_item_does_not_abort_the_batch(ado_server, monkeypatch):
+    add_work_items(ado_server)
+    process_work_item = devops.process_work_item
+
+    def flaky_process_work_item(work_item_id, *args, **kwargs):
+        if work_item_id == BROKEN_ID:
+            raise RuntimeError("checkpoint database is locked")
+        return process_work_item(work_item_id, *args, **kwargs)
+
+    monkeypatch.setattr(devops, "process_work_item", flaky_process_work_item)
+    outcomes = {outcome["work_item_id"]: outcome for outcome in devops.process_work_items(WORK_ITEM_IDS)}
+
+    assert sorted(outcomes) == WORK_ITEM_IDS
+    assert (outcomes[BROKEN_ID]["status"], outcomes[BROKEN_ID]["error"]) == ("failed", "checkpoint database is locked")
+    assert [outcomes[work_item_id]["status"] for work_item_id in (9001, 9003)] == ["succeeded", "succeeded"]
+
+
+def test_a_raising_work_item_does_not_abort_the_async_batch(ado_server, monkeypatch):
+    add_work_items(ado_server)
+    process_work_item = async_devops_tasks.process_work_item
+
+    async def flaky_process_work_item(work_item_id, *args, **kwargs):
+        if work_item_id == BROKEN_ID:
+            raise RuntimeError("checkpoint database is locked")
+        return await process_work_item(work_item_id, *args, **kwargs)
+
+    monkeypatch.setattr(async_devops_tasks, "process_work_item", flaky_process_work_item)
+
+    async def scenario():
+        try:
+            return await async_devops_tasks.process_work_items(WORK_ITEM_IDS)
+        finally:
+            await async_devops_tasks.close_clients()
+
+    outcomes = {outcome["work_item_id"]: outcome for outcome in asyncio.run(scenario())}
+
+    assert sorted(outcomes) == WORK_ITEM_IDS
+    assert outcomes[BROKEN_ID]["status"] == "failed"
+    assert [outcomes[work_item_id]["status"] for work_item_id in (9001, 9003)] == ["succeeded", "succeeded"]